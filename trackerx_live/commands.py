@@ -0,0 +1,54 @@
+import click
+import frappe
+from frappe.commands import get_site, pass_context
+
+
+@click.command("verify-scan-log-indexes")
+@pass_context
+def verify_scan_log_indexes(context):
+	"""EXPLAIN the Item Scan Log hot queries and fail if any of them does a full table scan"""
+	from trackerx_live.trackerx_live.utils.db_index_util import explain_item_scan_log_hot_queries
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		report = explain_item_scan_log_hot_queries()
+	finally:
+		frappe.destroy()
+
+	for row in report:
+		click.echo(
+			"{status} {query}: type={type} key={key} rows={rows} possible_keys={possible_keys}".format(
+				status="FAIL" if row["full_scan"] else "OK  ", **row
+			)
+		)
+
+	full_scans = [row["query"] for row in report if row["full_scan"]]
+	if full_scans:
+		raise click.ClickException("Full table scan on Item Scan Log in: " + ", ".join(full_scans))
+
+	click.secho("All Item Scan Log hot queries use an index", fg="green")
+
+
+@click.command("backfill-cell-targets")
+@click.option("--from-date", required=True, help="Start of the range, rounded down to the hour")
+@click.option("--to-date", required=True, help="End of the range, rounded up to the hour")
+@click.option("--cell", "physical_cell", help="Only backfill this Physical Cell")
+@pass_context
+def backfill_cell_targets(context, from_date, to_date, physical_cell=None):
+	"""Rebuild Hourly Target for a date range from Item Scan Log"""
+	from trackerx_live.trackerx_live.scheduler.target_scheduler import backfill_cell_targets as backfill
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		row_count = backfill(from_date, to_date, physical_cell=physical_cell)
+	finally:
+		frappe.destroy()
+
+	click.secho(f"Rebuilt {row_count} Hourly Target rows", fg="green")
+
+
+commands = [verify_scan_log_indexes, backfill_cell_targets]
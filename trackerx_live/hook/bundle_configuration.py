@@ -8,10 +8,16 @@ from frappe.utils import flt
 import math
 import json
 
+from trackerx_live.trackerx_live.services.bulk_activation_service import activate_cut_bundles
+
+
+TRACKING_ORDER_CREATION_EVENT = "trackerx_tracking_order_creation"
+
 def cuttingx_bundle_configuration_on_submit(doc, method=None):
-    create_tracking_order_from_bundle_creation(doc, method=None)
+    enqueue_tracking_order_creation(doc)
 
 def cuttingx_bundle_configuration_before_cancel(doc, method=None):
+    check_tracking_order_creation_before_cancel(doc)
     check_tracking_order_status_before_cancel(doc, method)
     pass
 
@@ -21,349 +27,360 @@ def cuttingx_bundle_configuration_before_on_cancel(doc, method=None):
 def cuttingx_bundle_configuration_before_delete(doc, method=None):
     delete_tracking_order(doc, method)
 
-def create_tracking_order_from_bundle_creation(doc, method=None):
+def set_tracking_order_creation_status(bundle_creation, status, tracking_order=None, message=None):
+    """Status fields on the Bundle Creation, pushed to its form once committed"""
+    values = {
+        "custom_tracking_order_status": status,
+        "custom_tracking_order_message": message
+    }
+    if tracking_order:
+        values["custom_tracking_order"] = tracking_order
+
+    frappe.db.set_value("Bundle Creation", bundle_creation, values, update_modified=False)
+    frappe.publish_realtime(
+        TRACKING_ORDER_CREATION_EVENT,
+        dict(values, bundle_creation=bundle_creation),
+        doctype="Bundle Creation",
+        docname=bundle_creation,
+        after_commit=True
+    )
+
+def enqueue_tracking_order_creation(doc):
     """
-    Auto-create Tracking Order when Bundle Creation is submitted
-    This function should be called via a hook in hooks.py
+    Queue the Tracking Order pipeline for a submitted Bundle Creation,
+    so the submit returns without waiting for it
     """
+    set_tracking_order_creation_status(doc.name, "Queued")
+    frappe.enqueue(
+        "trackerx_live.hook.bundle_configuration.process_tracking_order_creation",
+        queue="long",
+        timeout=3600,
+        job_id=f"trackerx_tracking_order_creation|{doc.name}",
+        deduplicate=True,
+        enqueue_after_commit=True,
+        bundle_creation=doc.name,
+        user=frappe.session.user
+    )
+
+def process_tracking_order_creation(bundle_creation, user=None):
+    """Background job for enqueue_tracking_order_creation, safe to run again after a failure"""
+    if user:
+        frappe.set_user(user)
+
     try:
-        # Create new Tracking Order document
-        tracking_order = frappe.new_doc("Tracking Order")
-        
-        # Set basic fields
-        tracking_order.reference_order_type = "Cut Order"
-        tracking_order.reference_order_number = doc.name
-        tracking_order.item = doc.fg_item
-        tracking_order.production_type = "Bundle"
-        tracking_order.order_status = "Created"
-        tracking_order.activation_status = "Ready"
-        current_company = frappe.defaults.get_user_default("company")
-        tracking_order.company = current_company
-
-        # main_component = None
-        # fg_item = frappe.get_doc("Item", tracking_order.item)
-        # if fg_item.custom_fg_components:
-        #     for fg_component in fg_item.custom_fg_components:
-        #         if fg_component.is_main_component:
-        #             main_component = fg_component.component_name
-
-        # Fetching Main Component from Bundle Configuration Components child table
-        main_component = None
-        if doc.get("table_bundle_creation_components"):
-            for comp_row in doc.table_bundle_creation_components:
-                if comp_row.get("is_main"):
-                    main_component = comp_row.component_name
-                    break                    
-
-        total_quantity = 0
-        # Create Bundle Configurations from Bundle Creation Items
-        
-        for bundle_item in doc.table_bundle_creation_item:
-            if bundle_item.no_of_bundles and bundle_item.unitsbundle:
-                qty = bundle_item.shade_cut_quantity if bundle_item.shade_cut_quantity > 0 else bundle_item.cut_quantity
-                full_bundles =math.floor(qty / bundle_item.unitsbundle)
-
-                bundle_config_row = frappe.new_doc("Tracking Order Bundle Configuration")
-                bundle_config_row.bc_name = f"BC-{bundle_item.size}-{bundle_item.shade}"
-                name_generator_list = ["BC", bundle_item.size ]
-                if bundle_item.shade:
-                    name_generator_list.append(bundle_item.shade)
-                    name_generator_list.append(str(bundle_item.idx))
-                bc_name = "-".join(name_generator_list)
-                bundle_config_row.bc_name = bc_name
-                bundle_config_row.size = bundle_item.size
-                bundle_config_row.bundle_quantity = bundle_item.unitsbundle
-                bundle_config_row.number_of_bundles = full_bundles
-                bundle_config_row.component = "__Default__"
-                bundle_config_row.production_type = "Bundle"
-                bundle_config_row.parent = tracking_order.name
-                bundle_config_row.parenttype = "Tracking Order"
-                bundle_config_row.parentfield = "bundle_configurations"
-                bundle_config_row.source = "Configuration"
-                bundle_config_row.work_order = bundle_item.work_order
-                bundle_config_row.sales_order = bundle_item.sales_order
-                bundle_config_row.shade = bundle_item.shade
-
-                total_quantity += bundle_config_row.bundle_quantity * bundle_config_row.number_of_bundles
-                
-                
-                tracking_order.bundle_configurations.append(bundle_config_row)
-
-                # # add odd bundles if any
-                # pending_units_in_odd_bundle = qty - full_bundles * bundle_item.unitsbundle
-                # if pending_units_in_odd_bundle > 0:
-                #     odd_bundle_config_row = frappe.new_doc("Tracking Order Bundle Configuration")
-                #     odd_bundle_config_row.bc_name = f"BC-{bundle_item.size}-{bundle_item.shade}-O"
-                #     odd_bundle_config_row.bc_name = f"{bc_name}-O"
-                #     odd_bundle_config_row.size = bundle_item.size
-                #     odd_bundle_config_row.bundle_quantity = pending_units_in_odd_bundle
-                #     odd_bundle_config_row.number_of_bundles = 1
-                #     odd_bundle_config_row.component = "__Default__"
-                #     odd_bundle_config_row.production_type = "Bundle"
-                #     odd_bundle_config_row.parent = tracking_order.name
-                #     odd_bundle_config_row.parenttype = "Tracking Order"
-                #     odd_bundle_config_row.parentfield = "bundle_configurations"
-                #     odd_bundle_config_row.source = "Configuration"
-                #     odd_bundle_config_row.work_order = bundle_item.work_order
-                #     odd_bundle_config_row.sales_order = bundle_item.sales_order
-                #     odd_bundle_config_row.shade = bundle_item.shade
-
-                #     tracking_order.bundle_configurations.append(odd_bundle_config_row)
-
-                #     total_quantity += odd_bundle_config_row.bundle_quantity * odd_bundle_config_row.number_of_bundles
+        doc = frappe.get_doc("Bundle Creation", bundle_creation)
+        # cancelled while queued
+        if doc.docstatus != 1:
+            return
 
-        
-        tracking_order.quantity = total_quantity
-        tracking_order.pending_production_quantity = total_quantity
+        set_tracking_order_creation_status(bundle_creation, "In Progress")
+        frappe.db.commit()
 
-        
-        # Create Tracking Components based on Bundle Details
-        components_added = set()
-        
-        for bundle_detail in doc.table_bundle_details:
-            component_key = bundle_detail.component if bundle_detail.component else "__Default__"
-            
-            if component_key not in components_added:
-                component_row = frappe.new_doc("Tracking Component")
-                component_row.component_name = component_key
-                component_row.is_main = 1 if component_key == main_component else 0
-                component_row.parent = tracking_order.name
-                component_row.parenttype = "Tracking Order"
-                component_row.parentfield = "tracking_components"
-                
-                tracking_order.tracking_components.append(component_row)
-                components_added.add(component_key)
-        
-        # If no components found, add default
-        if not components_added:
+        tracking_order = create_tracking_order_from_bundle_creation(doc)
+
+        # a queued bulk activation reports the outcome itself, see process_bulk_activation
+        if frappe.db.get_value("Tracking Order", tracking_order.name, "activation_status") == "In Progress":
+            set_tracking_order_creation_status(bundle_creation, "In Progress", tracking_order.name, "Activating cut bundles")
+        else:
+            set_tracking_order_creation_status(bundle_creation, "Completed", tracking_order.name)
+        frappe.db.commit()
+
+    except Exception as e:
+        frappe.db.rollback()
+        frappe.log_error(frappe.get_traceback(), "process_tracking_order_creation() error")
+        set_tracking_order_creation_status(bundle_creation, "Failed", message=str(e))
+        frappe.db.commit()
+
+@frappe.whitelist()
+def retry_tracking_order_creation(bundle_creation_name):
+    """
+    Queue a failed Tracking Order creation again, it resumes from the last completed step.
+    A failed bundle activation is queued again the same way.
+    """
+    doc = frappe.get_doc("Bundle Creation", bundle_creation_name)
+    doc.check_permission("submit")
+
+    if doc.docstatus != 1:
+        frappe.throw(f"Bundle Creation {doc.name} is not submitted", frappe.ValidationError)
+
+    if doc.get("custom_tracking_order_status") != "Failed":
+        frappe.throw(f"Tracking Order creation for {doc.name} has not failed", frappe.ValidationError)
+
+    enqueue_tracking_order_creation(doc)
+    return {"status": "Queued"}
+
+def check_tracking_order_creation_before_cancel(doc):
+    if doc.get("custom_tracking_order_status") in ("Queued", "In Progress"):
+        frappe.throw(
+            msg=f"The Tracking Order of {doc.name} is still being created, please cancel once it is completed",
+            title="Cancellation Not Allowed",
+            exc=frappe.ValidationError
+        )
+
+    # the activation job keeps inserting production items for the Tracking Order
+    activating = frappe.db.get_value(
+        "Tracking Order",
+        {"reference_order_number": doc.name, "docstatus": 1, "activation_status": "In Progress"},
+        "name"
+    )
+    if activating:
+        frappe.throw(
+            msg=f"Cut bundles of Tracking Order {activating} are still being activated, please cancel once it is completed",
+            title="Cancellation Not Allowed",
+            exc=frappe.ValidationError
+        )
+
+def get_existing_tracking_order(bundle_creation):
+    """Tracking Order an earlier run created for the Bundle Creation, if any"""
+    name = frappe.db.get_value(
+        "Tracking Order",
+        {"reference_order_type": "Cut Order", "reference_order_number": bundle_creation, "docstatus": ["<", 2]},
+        "name"
+    )
+    return frappe.get_doc("Tracking Order", name) if name else None
+
+def build_tracking_order(doc):
+    """New Tracking Order with bundle configurations, components and operation map of a Bundle Creation"""
+    # Create new Tracking Order document
+    tracking_order = frappe.new_doc("Tracking Order")
+
+    # Set basic fields
+    tracking_order.reference_order_type = "Cut Order"
+    tracking_order.reference_order_number = doc.name
+    tracking_order.item = doc.fg_item
+    tracking_order.production_type = "Bundle"
+    tracking_order.order_status = "Created"
+    tracking_order.activation_status = "Ready"
+    current_company = frappe.defaults.get_user_default("company")
+    tracking_order.company = current_company
+
+    # main_component = None
+    # fg_item = frappe.get_doc("Item", tracking_order.item)
+    # if fg_item.custom_fg_components:
+    #     for fg_component in fg_item.custom_fg_components:
+    #         if fg_component.is_main_component:
+    #             main_component = fg_component.component_name
+
+    # Fetching Main Component from Bundle Configuration Components child table
+    main_component = None
+    if doc.get("table_bundle_creation_components"):
+        for comp_row in doc.table_bundle_creation_components:
+            if comp_row.get("is_main"):
+                main_component = comp_row.component_name
+                break                    
+
+    total_quantity = 0
+    # Create Bundle Configurations from Bundle Creation Items
+
+    for bundle_item in doc.table_bundle_creation_item:
+        if bundle_item.no_of_bundles and bundle_item.unitsbundle:
+            qty = bundle_item.shade_cut_quantity if bundle_item.shade_cut_quantity > 0 else bundle_item.cut_quantity
+            full_bundles =math.floor(qty / bundle_item.unitsbundle)
+
+            bundle_config_row = frappe.new_doc("Tracking Order Bundle Configuration")
+            bundle_config_row.bc_name = f"BC-{bundle_item.size}-{bundle_item.shade}"
+            name_generator_list = ["BC", bundle_item.size ]
+            if bundle_item.shade:
+                name_generator_list.append(bundle_item.shade)
+                name_generator_list.append(str(bundle_item.idx))
+            bc_name = "-".join(name_generator_list)
+            bundle_config_row.bc_name = bc_name
+            bundle_config_row.size = bundle_item.size
+            bundle_config_row.bundle_quantity = bundle_item.unitsbundle
+            bundle_config_row.number_of_bundles = full_bundles
+            bundle_config_row.component = "__Default__"
+            bundle_config_row.production_type = "Bundle"
+            bundle_config_row.parent = tracking_order.name
+            bundle_config_row.parenttype = "Tracking Order"
+            bundle_config_row.parentfield = "bundle_configurations"
+            bundle_config_row.source = "Configuration"
+            bundle_config_row.work_order = bundle_item.work_order
+            bundle_config_row.sales_order = bundle_item.sales_order
+            bundle_config_row.shade = bundle_item.shade
+
+            total_quantity += bundle_config_row.bundle_quantity * bundle_config_row.number_of_bundles
+
+
+            tracking_order.bundle_configurations.append(bundle_config_row)
+
+            # # add odd bundles if any
+            # pending_units_in_odd_bundle = qty - full_bundles * bundle_item.unitsbundle
+            # if pending_units_in_odd_bundle > 0:
+            #     odd_bundle_config_row = frappe.new_doc("Tracking Order Bundle Configuration")
+            #     odd_bundle_config_row.bc_name = f"BC-{bundle_item.size}-{bundle_item.shade}-O"
+            #     odd_bundle_config_row.bc_name = f"{bc_name}-O"
+            #     odd_bundle_config_row.size = bundle_item.size
+            #     odd_bundle_config_row.bundle_quantity = pending_units_in_odd_bundle
+            #     odd_bundle_config_row.number_of_bundles = 1
+            #     odd_bundle_config_row.component = "__Default__"
+            #     odd_bundle_config_row.production_type = "Bundle"
+            #     odd_bundle_config_row.parent = tracking_order.name
+            #     odd_bundle_config_row.parenttype = "Tracking Order"
+            #     odd_bundle_config_row.parentfield = "bundle_configurations"
+            #     odd_bundle_config_row.source = "Configuration"
+            #     odd_bundle_config_row.work_order = bundle_item.work_order
+            #     odd_bundle_config_row.sales_order = bundle_item.sales_order
+            #     odd_bundle_config_row.shade = bundle_item.shade
+
+            #     tracking_order.bundle_configurations.append(odd_bundle_config_row)
+
+            #     total_quantity += odd_bundle_config_row.bundle_quantity * odd_bundle_config_row.number_of_bundles
+
+
+    tracking_order.quantity = total_quantity
+    tracking_order.pending_production_quantity = total_quantity
+
+
+    # Create Tracking Components based on Bundle Details
+    components_added = set()
+
+    for bundle_detail in doc.table_bundle_details:
+        component_key = bundle_detail.component if bundle_detail.component else "__Default__"
+
+        if component_key not in components_added:
             component_row = frappe.new_doc("Tracking Component")
-            component_row.component_name = "__Default__"
-            component_row.is_main = 1
+            component_row.component_name = component_key
+            component_row.is_main = 1 if component_key == main_component else 0
             component_row.parent = tracking_order.name
             component_row.parenttype = "Tracking Order"
             component_row.parentfield = "tracking_components"
-            
+
             tracking_order.tracking_components.append(component_row)
-        
-        # Generate operation map with error handling
-        try:
-            from trackerx_live.trackerx_live.utils.process_map_to_operation_map_util import generate_operation_map_from_item
-            result = generate_operation_map_from_item(doc.fg_item)
-            
-            for entry in result["operation_map_entries"]:
-                operation_row = frappe.new_doc("Operation Map")
-                operation_row.operation = entry["operation"]
-                operation_row.component = entry["component"]
-                operation_row.next_operation = entry["next_operation"]
-                operation_row.sequence_no = entry["sequence_no"]
-                operation_row.configs = entry["configs"] or {}
-                operation_row.parent = tracking_order.name
-                operation_row.parenttype = "Tracking Order"
-                operation_row.parentfield = "operation_map"
-                
-                tracking_order.operation_map.append(operation_row)
-                
-        except Exception as process_map_error:
-            frappe.log_error(f"Process map error for item {doc.fg_item}", f"{str(process_map_error)}")
-            # frappe.throw(f"Operation map error: {process_map_error}", frappe.ValidationError)
-            
-            # # Create a default operation map if process map generation fails
-            # default_operation = frappe.new_doc("Operation Map")
-            # default_operation.operation = "Sewing QC"
-            # default_operation.component = "__Default__"
-            # default_operation.next_operation = "Final QC"
-            # default_operation.sequence_no = 1
-            # default_operation.configs = ""
-            # default_operation.parent = tracking_order.name
-            # default_operation.parenttype = "Tracking Order"
-            # default_operation.parentfield = "operation_map"
-            
-            # tracking_order.operation_map.append(default_operation)
-            
-            # frappe.msgprint(f"Warning: Using default operation map for item {doc.fg_item}. Please check process map configuration.")
-
-        # Insert the document
-        tracking_order.insert(ignore_permissions=True)
-
-        # Get operation map and set last operation
-        operation_map = None
-        try:
-            from trackerx_live.trackerx_live.utils.operation_map_util import OperationMapManager
-            operation_map_manager = OperationMapManager()
-            operation_map = operation_map_manager.get_operation_map(tracking_order.name)
-            validation_result = operation_map.get_validation_result
-            final_operation = operation_map.get_final_production_operation()
-            if final_operation:
-                tracking_order.last_operation = final_operation
-            else:
-                tracking_order.last_operation = "Final QC"
-        except Exception as e:
-            # Truncate error message to prevent character length exceeded errors
-            error_msg = str(e)[:100] + "..." if len(str(e)) > 100 else str(e)
-            frappe.log_error(f"Operation map error: {error_msg}", "Bundle Configuration Operation Map")
+            components_added.add(component_key)
+
+    # If no components found, add default
+    if not components_added:
+        component_row = frappe.new_doc("Tracking Component")
+        component_row.component_name = "__Default__"
+        component_row.is_main = 1
+        component_row.parent = tracking_order.name
+        component_row.parenttype = "Tracking Order"
+        component_row.parentfield = "tracking_components"
+
+        tracking_order.tracking_components.append(component_row)
+
+    # Generate operation map with error handling
+    try:
+        from trackerx_live.trackerx_live.utils.process_map_to_operation_map_util import generate_operation_map_from_item
+        result = generate_operation_map_from_item(doc.fg_item)
+
+        for entry in result["operation_map_entries"]:
+            operation_row = frappe.new_doc("Operation Map")
+            operation_row.operation = entry["operation"]
+            operation_row.component = entry["component"]
+            operation_row.next_operation = entry["next_operation"]
+            operation_row.sequence_no = entry["sequence_no"]
+            operation_row.configs = entry["configs"] or {}
+            operation_row.parent = tracking_order.name
+            operation_row.parenttype = "Tracking Order"
+            operation_row.parentfield = "operation_map"
+
+            tracking_order.operation_map.append(operation_row)
+
+    except Exception as process_map_error:
+        frappe.log_error(f"Process map error for item {doc.fg_item}", f"{str(process_map_error)}")
+        # frappe.throw(f"Operation map error: {process_map_error}", frappe.ValidationError)
+
+        # # Create a default operation map if process map generation fails
+        # default_operation = frappe.new_doc("Operation Map")
+        # default_operation.operation = "Sewing QC"
+        # default_operation.component = "__Default__"
+        # default_operation.next_operation = "Final QC"
+        # default_operation.sequence_no = 1
+        # default_operation.configs = ""
+        # default_operation.parent = tracking_order.name
+        # default_operation.parenttype = "Tracking Order"
+        # default_operation.parentfield = "operation_map"
+
+        # tracking_order.operation_map.append(default_operation)
+
+        # frappe.msgprint(f"Warning: Using default operation map for item {doc.fg_item}. Please check process map configuration.")
+
+    return tracking_order
+
+def create_tracking_order_from_bundle_creation(doc, method=None):
+    """
+    Auto-create Tracking Order when Bundle Creation is submitted
+    Runs in process_tracking_order_creation. Every step is committed and skipped
+    when an earlier run already did it, so a failed creation can be resumed.
+    """
+    try:
+        tracking_order = get_existing_tracking_order(doc.name)
+
+        if not tracking_order:
+            tracking_order = build_tracking_order(doc)
+
+            # Insert the document
+            tracking_order.insert(ignore_permissions=True)
+            set_tracking_order_creation_status(doc.name, "In Progress", tracking_order.name, "Tracking Order created")
+            frappe.db.commit()
+
+        if tracking_order.docstatus == 0:
+            # Get operation map and set last operation
+            operation_map = None
+            try:
+                from trackerx_live.trackerx_live.utils.operation_map_util import OperationMapManager
+                operation_map_manager = OperationMapManager()
+                operation_map = operation_map_manager.get_operation_map(tracking_order.name)
+                validation_result = operation_map.get_validation_result
+                final_operation = operation_map.get_final_production_operation()
+                if final_operation:
+                    tracking_order.last_operation = final_operation
+                else:
+                    tracking_order.last_operation = "Final QC"
+            except Exception as e:
+                # Truncate error message to prevent character length exceeded errors
+                error_msg = str(e)[:100] + "..." if len(str(e)) > 100 else str(e)
+                frappe.log_error(f"Operation map error: {error_msg}", "Bundle Configuration Operation Map")
             
 
-        # Create physical cell wise last operation - FIXED FILTER SYNTAX
-        physical_cell_wise_last_operation = []
+            # Create physical cell wise last operation - FIXED FILTER SYNTAX
+            physical_cell_wise_last_operation = []
         
-        try:
-            physical_cells = frappe.get_all(
-                "Physical Cell", 
-                filters={"name": ["!=", "QR/Barcode Cut Bundle Activation"]},  # FIXED: Proper filter syntax
-                fields=["name"]
-            )
+            try:
+                physical_cells = frappe.get_all(
+                    "Physical Cell", 
+                    filters={"name": ["!=", "QR/Barcode Cut Bundle Activation"]},  # FIXED: Proper filter syntax
+                    fields=["name"]
+                )
             
-            for physical_cell in physical_cells:
-                cell_last_operation = frappe.new_doc("Tracking Order Physical Cell Last Operation")
-                cell_last_operation.physical_cell = physical_cell.name  # FIXED: Access the name attribute
-                cell_last_operation.operation = tracking_order.last_operation
-                cell_last_operation.parent = tracking_order.name
-                cell_last_operation.parenttype = "Tracking Order"
-                cell_last_operation.parentfield = "physical_cell_last_operation"
+                for physical_cell in physical_cells:
+                    cell_last_operation = frappe.new_doc("Tracking Order Physical Cell Last Operation")
+                    cell_last_operation.physical_cell = physical_cell.name  # FIXED: Access the name attribute
+                    cell_last_operation.operation = tracking_order.last_operation
+                    cell_last_operation.parent = tracking_order.name
+                    cell_last_operation.parenttype = "Tracking Order"
+                    cell_last_operation.parentfield = "physical_cell_last_operation"
                 
-                physical_cell_wise_last_operation.append(cell_last_operation)
+                    physical_cell_wise_last_operation.append(cell_last_operation)
 
-            tracking_order.physical_cell_last_operation = physical_cell_wise_last_operation
+                tracking_order.physical_cell_last_operation = physical_cell_wise_last_operation
             
-        except Exception as physical_cell_error:
-            frappe.log_error(f"Physical cell configuration error: {str(physical_cell_error)}")
-            #frappe.msgprint("Warning: Could not configure physical cells. Please check Physical Cell master data.")
+            except Exception as physical_cell_error:
+                frappe.log_error(f"Physical cell configuration error: {str(physical_cell_error)}")
+                #frappe.msgprint("Warning: Could not configure physical cells. Please check Physical Cell master data.")
 
-        tracking_order.save()
+            tracking_order.save()
         
-        # Submit the Tracking Order
-        tracking_order = tracking_order.submit()
+            # Submit the Tracking Order
+            tracking_order = tracking_order.submit()
+            set_tracking_order_creation_status(doc.name, "In Progress", tracking_order.name, "Tracking Order submitted")
+            frappe.db.commit()
 
         is_auto_activation_required = doc.tracking_tech in ('Barcode', 'QR Code')
 
-        if is_auto_activation_required:
-            import copy
-            create_production_items(doc, tracking_order)
-
-        
-            frappe.db.set_value('Tracking Order', tracking_order.name, 'activation_status', 'Completed')
+        if is_auto_activation_required and tracking_order.activation_status != "Completed":
+            # large cut orders are activated in the background, see activate_cut_bundles
+            activate_cut_bundles(doc, tracking_order)
 
-            
-            
-        
         frappe.logger().info(f"Auto-created Tracking Order {tracking_order.name} from Bundle Creation {doc.name}")
+        return tracking_order
         
     except Exception as e:
         frappe.log_error(f"Error creating Tracking Order from Bundle Creation {doc.name}", f"{str(e)}")
         frappe.throw(f"{str(e)}", frappe.ValidationError, "Failed to submit Bundle Configuration")
 
 
-def create_production_items(doc, tracking_order):
-
-
-    try:
-        # Create bundle configurations for each component
-        component_bc_dict = {}
-        
-        for bundle_configuration in tracking_order.bundle_configurations:
-            for component in tracking_order.tracking_components:
-                key = f'{bundle_configuration.size}---{component.component_name}---{bundle_configuration.shade}---{bundle_configuration.bundle_quantity}'
-                
-                if key not in component_bc_dict:
-                    component_bundle_configuration = frappe.new_doc("Tracking Order Bundle Configuration")
-                    component_bundle_configuration.bc_name = bundle_configuration.bc_name
-                    component_bundle_configuration.size = bundle_configuration.size
-                    component_bundle_configuration.bundle_quantity = bundle_configuration.bundle_quantity
-                    component_bundle_configuration.number_of_bundles = bundle_configuration.number_of_bundles
-                    component_bundle_configuration.production_type = bundle_configuration.production_type
-                    component_bundle_configuration.component = component.component_name
-                    component_bundle_configuration.parent_component = bundle_configuration.name
-                    component_bundle_configuration.parent = tracking_order.name
-                    component_bundle_configuration.parenttype = "Tracking Order"
-                    component_bundle_configuration.parentfield = "component_bundle_configuration"
-                    component_bundle_configuration.source = "Activation"
-                    component_bundle_configuration.activation_status = "Completed"
-
-
-                    component_bundle_configuration.insert(ignore_permissions=True)
-                    component_bc_dict[key] = component_bundle_configuration
-
-        component_by_name = {}
-        for comp in tracking_order.tracking_components:
-            key = comp.component_name
-            component_by_name[key] = comp.name
-
-        for bundle in doc.table_bundle_details:
-            # Create tracking tag
-            tag = frappe.new_doc("Tracking Tag")
-            tag.tag_number = bundle.bundle_id
-            tag.tag_type = doc.tracking_tech
-            tag.status = 'Active'
-            tag.activation_time = frappe.utils.now()
-            tag.last_used_on = frappe.utils.now()
-            tag.remarks = None
-            tag.activation_source = 'Cut Bundle'
-            tag.insert(ignore_permissions=True)
-
-            # Build the key for component lookup
-            key = f'{bundle.size}---{bundle.component}---{bundle.shade}---{bundle.unitsbundle}'
-            
-            if key not in component_bc_dict:
-                frappe.log_error(f"Component bundle configuration not found for key: {key}")
-                continue
-            
-            # Create production item
-            production_item = frappe.new_doc("Production Item")
-            production_item.production_item_number = bundle.bundle_id
-            production_item.tracking_order = tracking_order.name
-            production_item.bundle_configuration = component_bc_dict[key].name
-            production_item.tracking_tag = tag.name
-            production_item.component = component_by_name[bundle.component]
-            production_item.device_id = 'None'
-            production_item.size = bundle.size
-            production_item.quantity = bundle.unitsbundle
-            production_item.status = 'Activated'
-            production_item.current_operation = 'QR/Barcode Cut Bundle Activation'
-            production_item.next_operation = 'Activation'
-            production_item.current_workstation = 'QR/Barcode Cut Bundle Activation'
-            production_item.next_workstation = 'Activation WS'
-            production_item.source = 'Activation'
-            production_item.tracking_status = 'Active'
-            production_item.unlinked_source = None
-            production_item.physical_cell = 'QR/Barcode Cut Bundle Activation'
-            production_item.type = "Component" if len(tracking_order.tracking_components) > 1 else "Unit"
-
-            production_item.insert(ignore_permissions=True)
-
-            # Create production item tag map
-            production_item_tag_map = frappe.new_doc("Production Item Tag Map")
-            production_item_tag_map.production_item = production_item.name
-            production_item_tag_map.tracking_tag = tag.name
-            production_item_tag_map.linked_on = frappe.utils.now()
-            production_item_tag_map.is_active = True
-            production_item_tag_map.activated_source = 'Cut Bundle'
-            production_item_tag_map.insert(ignore_permissions=True)
-
-            # Create item scan log
-            item_scan_log = frappe.new_doc("Item Scan Log")
-            item_scan_log.production_item = production_item.name
-            item_scan_log.workstation = 'QR/Barcode Cut Bundle Activation'
-            item_scan_log.operation = 'QR/Barcode Cut Bundle Activation'
-            item_scan_log.physical_cell = 'QR/Barcode Cut Bundle Activation'
-            item_scan_log.scanned_by = frappe.session.user
-            item_scan_log.scan_time = frappe.utils.now_datetime()
-            item_scan_log.logged_time = frappe.utils.now_datetime()
-            item_scan_log.status = 'Activated'
-            item_scan_log.log_status = 'Completed'
-            item_scan_log.log_type = 'Auto'
-            item_scan_log.production_item_type = production_item.type 
-            item_scan_log.dut = None
-            item_scan_log.insert(ignore_permissions=True)
-
-            # FIXED: Proper method call
-            production_item.last_scan_log = item_scan_log.name  # Set as attribute, not method call
-            production_item.save()
-            
-    except Exception as e:
-        frappe.log_error(f"Error in create_production_items", f"{str(e)}")
-        frappe.throw(f"Failed to create production items: {str(e)}")
-
-
 def check_tracking_order_status_before_cancel(doc, method):
     """
     Hook that runs before canceling Bundle Creation
@@ -10,7 +10,7 @@ fixtures = [
     {
         "dt": "Custom Field",
         "filters": [
-            ["dt", "in", ["Operation"]],
+            ["dt", "in", ["Operation", "Bundle Creation"]],
             ["module", "=", "TrackerX Live"]
         ]
     },
@@ -113,6 +113,13 @@ doctype_js = {"Bundle Creation" : "public/js/bundle_creation.js"}
 # before_uninstall = "trackerx_live.uninstall.before_uninstall"
 # after_uninstall = "trackerx_live.uninstall.after_uninstall"
 
+# Migration
+# ------------
+
+after_migrate = [
+    "trackerx_live.trackerx_live.utils.cell_operator_ws_util.warm_workstation_context_index"
+]
+
 # Integration Setup
 # ------------------
 # To set up dependencies/integrations with other apps
@@ -172,7 +179,66 @@ doc_events = {
         "before_cancel": "trackerx_live.hook.bundle_configuration.cuttingx_bundle_configuration_before_cancel",
         "on_cancel": "trackerx_live.hook.bundle_configuration.cuttingx_bundle_configuration_before_on_cancel",
         "before_delete": "trackerx_live.hook.bundle_configuration.cuttingx_bundle_configuration_before_delete"
-    }
+    },
+    # Invalidate cached master data projections used by the scan APIs
+    "Operation": {
+        "on_update": [
+            "trackerx_live.trackerx_live.services.master_data_cache.invalidate_master_data",
+            "trackerx_live.trackerx_live.utils.cell_operator_ws_util.clear_workstation_context_index"
+        ],
+        "on_trash": [
+            "trackerx_live.trackerx_live.services.master_data_cache.invalidate_master_data",
+            "trackerx_live.trackerx_live.utils.cell_operator_ws_util.clear_workstation_context_index"
+        ]
+    },
+    "Operation Group": {
+        "on_update": "trackerx_live.trackerx_live.services.master_data_cache.invalidate_master_data",
+        "on_trash": "trackerx_live.trackerx_live.services.master_data_cache.invalidate_master_data"
+    },
+    "Tracking Order": {
+        "on_update": [
+            "trackerx_live.trackerx_live.services.master_data_cache.invalidate_master_data",
+            "trackerx_live.trackerx_live.utils.operation_map_util.invalidate_operation_map"
+        ],
+        "on_update_after_submit": [
+            "trackerx_live.trackerx_live.services.master_data_cache.invalidate_master_data",
+            "trackerx_live.trackerx_live.utils.operation_map_util.invalidate_operation_map"
+        ],
+        "on_cancel": "trackerx_live.trackerx_live.services.master_data_cache.invalidate_master_data",
+        "on_trash": [
+            "trackerx_live.trackerx_live.services.master_data_cache.invalidate_master_data",
+            "trackerx_live.trackerx_live.utils.operation_map_util.invalidate_operation_map"
+        ]
+    },
+    "Tracking Order Bundle Configuration": {
+        "on_update": "trackerx_live.trackerx_live.services.master_data_cache.invalidate_master_data",
+        "on_trash": "trackerx_live.trackerx_live.services.master_data_cache.invalidate_master_data"
+    },
+    "Item": {
+        "on_update": "trackerx_live.trackerx_live.services.master_data_cache.invalidate_master_data",
+        "on_trash": "trackerx_live.trackerx_live.services.master_data_cache.invalidate_master_data"
+    },
+    "Style Master": {
+        "on_update": "trackerx_live.trackerx_live.services.master_data_cache.invalidate_master_data",
+        "on_trash": "trackerx_live.trackerx_live.services.master_data_cache.invalidate_master_data"
+    },
+    "Physical Cell": {
+        "on_update": [
+            "trackerx_live.trackerx_live.services.master_data_cache.invalidate_master_data",
+            "trackerx_live.trackerx_live.utils.cell_operator_ws_util.clear_workstation_context_index",
+            "trackerx_live.trackerx_live.utils.shift_period_util.clear_cell_shifts"
+        ],
+        "on_trash": [
+            "trackerx_live.trackerx_live.services.master_data_cache.invalidate_master_data",
+            "trackerx_live.trackerx_live.utils.cell_operator_ws_util.clear_workstation_context_index",
+            "trackerx_live.trackerx_live.utils.shift_period_util.clear_cell_shifts"
+        ]
+    },
+    "Cut Kit Plan": {
+        "on_update": "trackerx_live.trackerx_live.utils.operation_map_util.invalidate_operation_map",
+        "on_submit": "trackerx_live.trackerx_live.utils.operation_map_util.invalidate_operation_map",
+        "on_cancel": "trackerx_live.trackerx_live.utils.operation_map_util.invalidate_operation_map"
+    },
     # "Cut Kit Plan": {
     #     "on_submit": "trackerx_live.hook.cut_kit_plan.cuttingx_cut_kit_plan_on_submit"
        
@@ -0,0 +1,60 @@
+import frappe
+
+from trackerx_live.trackerx_live.doctype.hourly_target.hourly_target import HOURLY_TARGET_UNIQUE_KEY
+
+
+def execute():
+    """
+    Merge duplicate Hourly Target rows and add the unique key on
+    (physical_cell, operation, workstation, from_time, to_time).
+    Runs before model sync, so the key can be created by on_doctype_update.
+    """
+    if not frappe.db.table_exists("Hourly Target"):
+        return
+
+    # operation level rows are stored with an empty workstation, NULLs would bypass the unique key
+    frappe.db.sql("UPDATE `tabHourly Target` SET workstation = '' WHERE workstation IS NULL")
+
+    duplicates = frappe.db.sql("""
+        SELECT physical_cell, operation, workstation, from_time, to_time,
+            SUBSTRING_INDEX(GROUP_CONCAT(name ORDER BY creation ASC), ',', 1) AS keep_name,
+            SUM(COALESCE(target, 0)) AS target,
+            SUM(COALESCE(defective_unit_limit, 0)) AS defective_unit_limit,
+            SUM(COALESCE(defects_limit, 0)) AS defects_limit,
+            SUM(COALESCE(output, 0)) AS output,
+            SUM(COALESCE(produced_minutes, 0)) AS produced_minutes,
+            SUM(COALESCE(target_minutes, 0)) AS target_minutes,
+            MAX(COALESCE(working_time_in_mins, 0)) AS working_time_in_mins,
+            MAX(COALESCE(available_minutes, 0)) AS available_minutes,
+            MAX(COALESCE(no_of_operators, 0)) AS no_of_operators
+        FROM `tabHourly Target`
+        GROUP BY physical_cell, operation, workstation, from_time, to_time
+        HAVING COUNT(*) > 1
+    """, as_dict=True)
+
+    for group in duplicates:
+        frappe.db.sql("""
+            UPDATE `tabHourly Target`
+            SET target = %(target)s,
+                defective_unit_limit = %(defective_unit_limit)s,
+                defects_limit = %(defects_limit)s,
+                output = %(output)s,
+                produced_minutes = %(produced_minutes)s,
+                target_minutes = %(target_minutes)s,
+                working_time_in_mins = %(working_time_in_mins)s,
+                available_minutes = %(available_minutes)s,
+                no_of_operators = %(no_of_operators)s
+            WHERE name = %(keep_name)s
+        """, group)
+
+        frappe.db.sql("""
+            DELETE FROM `tabHourly Target`
+            WHERE physical_cell <=> %(physical_cell)s
+              AND operation <=> %(operation)s
+              AND workstation <=> %(workstation)s
+              AND from_time <=> %(from_time)s
+              AND to_time <=> %(to_time)s
+              AND name != %(keep_name)s
+        """, group)
+
+    frappe.db.add_unique("Hourly Target", HOURLY_TARGET_UNIQUE_KEY, constraint_name="unique_hourly_target")
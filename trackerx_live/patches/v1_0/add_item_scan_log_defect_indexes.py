@@ -0,0 +1,5 @@
+from trackerx_live.trackerx_live.utils.db_index_util import add_item_scan_log_defect_indexes
+
+
+def execute():
+    add_item_scan_log_defect_indexes()
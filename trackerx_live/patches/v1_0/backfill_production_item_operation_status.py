@@ -0,0 +1,5 @@
+from trackerx_live.trackerx_live.services.operation_status_service import rebuild_operation_statuses
+
+
+def execute():
+    rebuild_operation_statuses()
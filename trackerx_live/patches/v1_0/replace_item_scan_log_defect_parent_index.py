@@ -0,0 +1,9 @@
+from trackerx_live.trackerx_live.utils.db_index_util import (
+    add_item_scan_log_defect_indexes,
+    drop_stale_item_scan_log_defect_indexes,
+)
+
+
+def execute():
+    drop_stale_item_scan_log_defect_indexes()
+    add_item_scan_log_defect_indexes()
@@ -1,4 +1,27 @@
 frappe.ui.form.on('Bundle Creation', {
+    refresh: function(frm) {
+        // Tracking Order is created in a background job after submit
+        frappe.realtime.off('trackerx_tracking_order_creation');
+        frappe.realtime.on('trackerx_tracking_order_creation', function(data) {
+            if (data.bundle_creation === frm.doc.name) {
+                frm.reload_doc();
+            }
+        });
+
+        if (frm.doc.docstatus === 1 && frm.doc.custom_tracking_order_status === 'Failed') {
+            frm.add_custom_button(__('Retry Tracking Order'), function() {
+                frappe.call({
+                    method: 'trackerx_live.hook.bundle_configuration.retry_tracking_order_creation',
+                    args: {
+                        bundle_creation_name: frm.doc.name
+                    },
+                    callback: function() {
+                        frm.reload_doc();
+                    }
+                });
+            });
+        }
+    },
     before_cancel: function(frm) {
         // Check if we need confirmation for cancellation
         frappe.call({
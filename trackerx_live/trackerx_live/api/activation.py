@@ -4,6 +4,8 @@ import json
 from trackerx_live.trackerx_live.utils.cell_operator_ws_util import get_cell_operator_by_ws, validate_workstation_for_supported_operation
 from trackerx_live.trackerx_live.api.bundle_configuration_info import get_bundle_configuration_info
 from frappe.exceptions import ValidationError
+from trackerx_live.trackerx_live.services.production_rollup_service import build_rollup_row, record_scan_logs
+from trackerx_live.trackerx_live.services.live_counter_service import publish_counter_deltas
 
 #------------------------------------------------
 # function for production_item_number autoname 
@@ -201,6 +203,7 @@ def create_production_item(tracking_order, component_name, tracking_tags,
         # ---------------------------
         # Create Production Items (one per tag)
         created_items = []
+        rollup_rows = []
         for tag_id in tag_ids:
             production_item_number = get_next_production_item_number(tracking_order)
 
@@ -257,6 +260,10 @@ def create_production_item(tracking_order, component_name, tracking_tags,
                 
             })
             scan_log_doc.insert()
+            rollup_rows.append(build_rollup_row(scan_log_doc, quantity=doc.quantity))
+
+        record_scan_logs(rollup_rows)
+        publish_counter_deltas(rollup_rows)
 
         # --------------------------------
         # Post-Activation Status Updates
@@ -2,6 +2,7 @@ import frappe
 import json
 from frappe import _
 from trackerx_live.trackerx_live.utils.cell_operator_ws_util import get_cell_operator_by_ws, validate_workstation_for_supported_operation
+from trackerx_live.trackerx_live.utils.tracking_tag_util import resolve_tags
 
 
 @frappe.whitelist()
@@ -23,23 +24,15 @@ def auto_unlink_tags(tag_numbers, ws_name=None):
         qcg_bulk_error_beans = []
         production_item_doc = None
 
-        for tracking_tag_number in tag_numbers:
-            tag = frappe.get_all(
-                "Tracking Tag",
-                filters={"tag_number": tracking_tag_number},
-                fields=["name"]
-            )
+        # Resolve all tags to their active maps in one query
+        resolved_tags = resolve_tags(tag_numbers)
 
-            if not tag:
+        for tracking_tag_number in tag_numbers:
+            if tracking_tag_number in resolved_tags.missing:
                 not_found_tags.append(tracking_tag_number)
                 continue
 
-            tag_id = tag[0].name
-            tag_map = frappe.get_all(
-                "Production Item Tag Map",
-                filters={"tracking_tag": tag_id, "is_active": 1},
-                fields=["name", "production_item"]
-            )
+            tag_map = resolved_tags.tags.get(tracking_tag_number)
 
             if not tag_map:
                 skipped_tags.append(tracking_tag_number)
@@ -53,12 +46,12 @@ def auto_unlink_tags(tag_numbers, ws_name=None):
             current_operation = ws_info["operation_name"]
             validate_workstation_for_supported_operation(workstation=ws_name, operation=current_operation, api_source="Unlink")        
 
-            tag_doc = frappe.get_doc("Production Item Tag Map", tag_map[0].name)
+            tag_doc = frappe.get_doc("Production Item Tag Map", tag_map.tag_map)
             tag_doc.is_active = 0
             tag_doc.deactivated_source = "EOL UnLink"
             tag_doc.save()
 
-            production_item_name = tag_map[0].get("production_item")
+            production_item_name = tag_map.get("production_item")
             if production_item_name:
                 production_item_doc = frappe.get_doc("Production Item", production_item_name)
                 production_item_doc.tracking_status = "Unlinked"
@@ -8,6 +8,13 @@ from trackerx_live.trackerx_live.api.counted_info import get_counted_info
 from trackerx_live.trackerx_live.utils.cell_operator_ws_util import validate_workstation_for_supported_operation 
 from trackerx_live.trackerx_live.utils.cell_operator_ws_util import get_cell_operator_by_ws 
 from trackerx_live.trackerx_live.utils.sequence_of_operation import SequenceOfOpeationUtil
+from trackerx_live.trackerx_live.utils.tracking_tag_util import resolve_tags
+from trackerx_live.trackerx_live.services.master_data_cache import get_master_data
+from trackerx_live.trackerx_live.services.scan_ingestion_service import build_scan_log_row, insert_scan_logs, set_last_scan_logs
+from trackerx_live.trackerx_live.services.production_rollup_service import build_rollup_row, record_scan_logs
+from trackerx_live.trackerx_live.services.live_counter_service import publish_counter_deltas
+from trackerx_live.trackerx_live.services.operation_progress_service import mark_operation_completed
+from trackerx_live.trackerx_live.services.operation_status_service import record_operation_statuses
 
 
 @frappe.whitelist()
@@ -43,66 +50,101 @@ def count_tags(tag_numbers, ws_name):
         current_workstation = ws_info["workstation"]
 
         all_scanned_units_info = []
+        rollup_rows = []
+        new_scan_logs = []
+
+        # Validate the whole batch up front
+        if current_operation and current_workstation:
+            validate_workstation_for_supported_operation(workstation=current_workstation, operation=current_operation, api_source="Count")
+
+        # Resolve all tags to their production items in one query
+        resolved_tags = resolve_tags(tag_numbers)
+        resolved_items = resolved_tags.tags.values()
+
+        passed_logs_by_item = SequenceOfOpeationUtil.get_already_passed_logs(
+            production_items=[item.production_item for item in resolved_items],
+            operation=current_operation
+        )
+
+        components = list({item.component for item in resolved_items if item.component})
+        component_names = {
+            row.name: row.component_name
+            for row in frappe.get_all(
+                "Tracking Component",
+                filters={"name": ["in", components]},
+                fields=["name", "component_name"]
+            )
+        } if components else {}
 
+        scan_time = now_datetime()
         current_unit_count = 0
         for tag_number in tag_numbers:
-            tag = frappe.get_all("Tracking Tag", filters={"tag_number": tag_number}, fields=["name"])
-            if not tag:
+            if tag_number in resolved_tags.missing:
                 errors.append({"tag": tag_number, "reason": "Tag not found"})
                 continue
-            tag_id = tag[0]["name"]
 
-            tag_map = frappe.db.get_value(
-                "Production Item Tag Map",
-                {"tracking_tag": tag_id},
-                ["name", "is_active", "production_item"],
-                as_dict=True
-            )
+            production_item_doc = resolved_tags.tags.get(tag_number)
 
-            if not tag_map:
-                errors.append({"tag": tag_number, "reason": "Tag not linked"})
-                continue
-            if not tag_map.is_active:
-                errors.append({"tag": tag_number, "reason": "Tag is deactivated"})
+            if not production_item_doc:
+                if tag_number in resolved_tags.deactivated:
+                    errors.append({"tag": tag_number, "reason": "Tag is deactivated"})
+                else:
+                    errors.append({"tag": tag_number, "reason": "Tag not linked"})
                 continue
 
-            result = SequenceOfOpeationUtil.can_this_item_scan_in_this_operation(production_item=tag_map.production_item, workstation=current_workstation, operation=current_operation, physical_cell=physical_cell)
-            if not result["is_allowed"]:
-                errors.append({"tag": tag_number, "reason": result["reason"], "data": result["old_logs"]})
+            if not current_operation or not current_workstation:
+                errors.append({"tag": tag_number, "reason": "Missing operation/workstation"})
                 continue
 
-            production_item_doc = frappe.get_doc("Production Item", tag_map.production_item)
+            old_logs = passed_logs_by_item.get(production_item_doc.production_item)
+            if old_logs:
+                errors.append({"tag": tag_number, "reason": "ALREADY_PASSED", "data": old_logs})
+                continue
 
-            if not current_operation or not current_workstation:
-                errors.append({"tag": tag_number, "reason": "Missing operation/workstation"})
+            flow = SequenceOfOpeationUtil.check_operation_flow(
+                production_item=production_item_doc.production_item,
+                tracking_order=production_item_doc.tracking_order,
+                component=production_item_doc.component,
+                operation=current_operation
+            )
+            if not flow["is_allowed"]:
+                errors.append({"tag": tag_number, "reason": flow["reason"], "data": flow["skipped_operations"]})
                 continue
-            
-            # validate workstation for supported operation
-            validate_workstation_for_supported_operation(workstation=current_workstation, operation=current_operation, api_source="Count")        
 
-            
-            # Log scan
-            new_scan_log = frappe.new_doc("Item Scan Log")
-            new_scan_log.production_item = production_item_doc.name
-            new_scan_log.operation = current_operation
-            new_scan_log.workstation = current_workstation
-            new_scan_log.physical_cell = physical_cell
-            new_scan_log.scanned_by = frappe.session.user
-            new_scan_log.scan_time = now_datetime()
-            new_scan_log.logged_time = now_datetime()
-            new_scan_log.status = "Counted"
-            new_scan_log.log_status = "Completed"
-            new_scan_log.log_type = "User Scanned"
-            new_scan_log.production_item_type = production_item_doc.type
-
-            new_scan_log.insert()
+            # Log scan, written with the rest of the batch after the loop
+            new_scan_log = build_scan_log_row(
+                production_item=production_item_doc.production_item,
+                operation=current_operation,
+                workstation=current_workstation,
+                physical_cell=physical_cell,
+                scanned_by=frappe.session.user,
+                scan_time=scan_time,
+                logged_time=scan_time,
+                status="Counted",
+                log_status="Completed",
+                log_type="User Scanned",
+                production_item_type=production_item_doc.type
+            )
+            new_scan_logs.append(new_scan_log)
             created_logs.append({"tag": tag_number, "log": new_scan_log.name})
+            rollup_rows.append(build_rollup_row(new_scan_log, quantity=production_item_doc.quantity, defects_count=0))
+            mark_operation_completed(
+                production_item_doc.production_item,
+                production_item_doc.tracking_order,
+                production_item_doc.component,
+                current_operation
+            )
+
+            # A bundle read through several tags in the same batch is counted once
+            passed_logs_by_item[production_item_doc.production_item] = [
+                {"name": new_scan_log.name, "status": new_scan_log.status, "creation": scan_time}
+            ]
 
             current_unit_count += production_item_doc.quantity
 
-            tracking_order_doc = frappe.get_doc("Tracking Order", production_item_doc.tracking_order)
+            tracking_order_doc = get_master_data("Tracking Order", production_item_doc.tracking_order)
 
-            fg_item_doc = frappe.get_doc("Item", tracking_order_doc.item)
+            fg_item_doc = get_master_data("Item", tracking_order_doc.item)
 
             unit_info = {
                 "operation_name": current_operation,
@@ -117,7 +159,7 @@ def count_tags(tag_numbers, ws_name):
             }
 
             # Track component-wise totals
-            comp_name = frappe.db.get_value("Tracking Component", production_item_doc.component, "component_name")
+            comp_name = component_names.get(production_item_doc.component)
             if comp_name:
                 if comp_name not in current_components_map:
                     current_components_map[comp_name] = 0
@@ -127,6 +169,10 @@ def count_tags(tag_numbers, ws_name):
             #TODO : commenting for now 
             # check_and_complete_production_item(production_item_doc, current_operation)
 
+        insert_scan_logs(new_scan_logs)
+        record_operation_statuses(new_scan_logs)
+        set_last_scan_logs({log.production_item: log.name for log in new_scan_logs})
+
         # if created_logs:
         #     frappe.db.commit()
 
@@ -163,7 +209,9 @@ def count_tags(tag_numbers, ws_name):
         
 
         all_scanned_units_info.append(unit_info)
-        
+
+        record_scan_logs(rollup_rows)
+        publish_counter_deltas(rollup_rows)
         frappe.db.commit()
         return {
             "status": "success",
@@ -11,6 +11,8 @@ from frappe import _
 from frappe.utils import now_datetime
 from functools import wraps
 import trackerx_live.trackerx_live.utils.tracking_tag_util as tracking_tag_util
+from trackerx_live.trackerx_live.services.production_rollup_service import build_rollup_row, record_scan_logs
+from trackerx_live.trackerx_live.services.live_counter_service import publish_counter_deltas
 
 
 # Role-based access control decorator
@@ -393,6 +395,11 @@ def reclassify(production_item_name, defective_units):
             old_scan_log.log_status = "SP Override"
             old_scan_log.remarks = f"Overriden by {frappe.session.user} for SP review. Original remarks: {old_scan_log.remarks or 'None'}"
             old_scan_log.save(ignore_permissions=True)
+
+            # The overridden log no longer counts in the production rollup
+            voided_rows = [build_rollup_row(old_scan_log, quantity=prod_item.quantity)]
+            record_scan_logs(voided_rows, sign=-1)
+            publish_counter_deltas(voided_rows, sign=-1)
             
             # Create new scan log
             new_scan_log = frappe.get_doc({
@@ -426,6 +433,10 @@ def reclassify(production_item_name, defective_units):
                 })
             
             new_scan_log.insert(ignore_permissions=True)
+
+            rollup_rows = [build_rollup_row(new_scan_log, quantity=prod_item.quantity)]
+            record_scan_logs(rollup_rows)
+            publish_counter_deltas(rollup_rows)
             
             # Update production item with new scan log
             prod_item.last_scan_log = new_scan_log.name
@@ -1,6 +1,8 @@
 import frappe
 from frappe import _
 from trackerx_live.trackerx_live.utils.cell_operator_ws_util import get_cell_operator_by_ws
+from trackerx_live.trackerx_live.utils.tracking_tag_util import resolve_tags
+from trackerx_live.trackerx_live.services.master_data_cache import get_master_data
 import json
 
 from trackerx_live.trackerx_live.utils.trackerx_live_settings_util import TrackerXLiveSettings
@@ -35,56 +37,40 @@ def get_item_information(tags, workstation, remarks=None):
         operation = ws_info["operation_name"]
         physical_cell = ws_info["cell_id"]
 
-        
+        # Resolve all tags to their production items in one query
+        resolved_tags = resolve_tags(tags)
 
         for tag_number in tags:
             try:
                 # --- Validate Tag ---
-                tag = frappe.get_all(
-                    "Tracking Tag",
-                    filters={"tag_number": tag_number},
-                    fields=["name"]
-                )
-                if not tag:
+                if tag_number in resolved_tags.missing:
                     frappe.throw(
                         f"Invalid tag! This tag is not activated, Please use activated tag. Contact your supervisor",
                         frappe.ValidationError
                     )
 
-                tag_id = tag[0]["name"]
-
-                tag_map = frappe.db.get_value(
-                    "Production Item Tag Map",
-                    {"tracking_tag": tag_id},
-                    ["name", "is_active", "production_item"],
-                    as_dict=True
-                )
+                # --- Get Production Item ---
+                production_item_doc = resolved_tags.tags.get(tag_number)
 
-                if not tag_map or not tag_map.is_active:
+                if not production_item_doc:
                     frappe.throw(
                         f"Invalid Tag! Tag already unlinked, Please use activated tag. Contact your supervisor",
                         frappe.ValidationError
                     )
-                
-
-                # --- Get Production Item ---
-                production_item_name = tag_map.production_item
-
-                production_item_doc = frappe.get_doc("Production Item", production_item_name)
 
-                production_item_bc_doc = frappe.get_doc("Tracking Order Bundle Configuration", production_item_doc.bundle_configuration)
+                production_item_bc_doc = get_master_data("Tracking Order Bundle Configuration", production_item_doc.bundle_configuration)
 
-                operation_doc = frappe.get_doc("Operation", operation)
+                operation_doc = get_master_data("Operation", operation)
 
-                operation_group_doc = frappe.get_doc("Operation Group", operation_doc.custom_operation_group)
+                operation_group_doc = get_master_data("Operation Group", operation_doc.custom_operation_group)
 
-                tracking_order_doc = frappe.get_doc("Tracking Order", production_item_doc.tracking_order)
+                tracking_order_doc = get_master_data("Tracking Order", production_item_doc.tracking_order)
 
-                fg_item_doc = frappe.get_doc("Item", tracking_order_doc.item)
+                fg_item_doc = get_master_data("Item", tracking_order_doc.item)
 
-                style_master_doc = frappe.get_doc("Style Master", fg_item_doc.custom_style_master)
+                style_master_doc = get_master_data("Style Master", fg_item_doc.custom_style_master)
 
-                physical_cell_doc = frappe.get_doc("Physical Cell", physical_cell)
+                physical_cell_doc = get_master_data("Physical Cell", physical_cell)
 
                 prev_operations = []
                 # from trackerx_live.trackerx_live.utils.operation_map_util import OperationMapManager
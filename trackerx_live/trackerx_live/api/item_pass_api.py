@@ -3,6 +3,10 @@ from frappe import _
 from frappe.utils import now_datetime
 from frappe.exceptions import ValidationError
 from trackerx_live.trackerx_live.utils.production_completion_util import check_and_complete_production_item
+from trackerx_live.trackerx_live.services.production_rollup_service import build_rollup_changes, record_scan_logs
+from trackerx_live.trackerx_live.services.live_counter_service import publish_counter_deltas
+from trackerx_live.trackerx_live.services.operation_progress_service import mark_operation_completed
+from trackerx_live.trackerx_live.services.scan_write_service import get_scan_write_status
 
 @frappe.whitelist()
 def item_pass(scan_log_id, remarks=None):
@@ -13,6 +17,12 @@ def item_pass(scan_log_id, remarks=None):
         # Current logged time
         logged_time = now_datetime()
 
+        # Scans written in async mode may still be on the queue
+        if not frappe.db.exists("Item Scan Log", scan_log_id):
+            write_status = get_scan_write_status([scan_log_id])[scan_log_id]
+            if write_status["status"] == "Queued":
+                frappe.throw(_("Scan {0} is still being saved, please retry").format(scan_log_id), ValidationError)
+
         # Get existing Item Scan Log by ID
         scan_log_doc = frappe.get_doc("Item Scan Log", scan_log_id)
         if not scan_log_doc:
@@ -25,6 +35,7 @@ def item_pass(scan_log_id, remarks=None):
             cycle_time = round(cycle_time, 2)
 
         # Update fields
+        previous_scan_log = scan_log_doc.as_dict()
         scan_log_doc.logged_time = logged_time
         scan_log_doc.log_status = "Completed"
         scan_log_doc.status = "Pass"
@@ -34,6 +45,19 @@ def item_pass(scan_log_id, remarks=None):
         production_item_doc = frappe.get_doc("Production Item", scan_log_doc.production_item)
         current_operation = scan_log_doc.operation
 
+        # a log passed again replaces its earlier counts
+        removed_rows, rollup_rows = build_rollup_changes(previous_scan_log, scan_log_doc, quantity=production_item_doc.quantity)
+        record_scan_logs(removed_rows, sign=-1)
+        publish_counter_deltas(removed_rows, sign=-1)
+        record_scan_logs(rollup_rows)
+        publish_counter_deltas(rollup_rows)
+        mark_operation_completed(
+            production_item_doc.name,
+            production_item_doc.tracking_order,
+            production_item_doc.component,
+            current_operation
+        )
+
         # Call the util function
         check_and_complete_production_item(production_item_doc, current_operation)
 
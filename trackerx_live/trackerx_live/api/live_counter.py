@@ -0,0 +1,49 @@
+import frappe
+from frappe import _
+from frappe.exceptions import ValidationError
+from trackerx_live.trackerx_live.services.live_counter_service import (
+    LIVE_COUNTER_EVENT,
+    LIVE_COUNTER_RECONCILE_INTERVAL,
+    get_current_sequence,
+    get_live_counter_snapshot,
+)
+
+
+@frappe.whitelist()
+def subscribe_live_counters(physical_cell=None, workstation=None):
+    """
+    Baseline for screens and handhelds that keep live counters from realtime events.
+
+    The client joins the returned room with frappe.realtime.doc_subscribe(doctype, docname),
+    applies every `trackerx_live_counter` event with a seq above the returned one to the
+    snapshot, and calls this again every reconcile_interval seconds or on a seq gap.
+    A workstation subscription only receives that workstation's events.
+    """
+    try:
+        if not (physical_cell or workstation):
+            frappe.throw(_("Physical Cell or Workstation is required"), ValidationError)
+
+        doctype, docname = ("Workstation", workstation) if workstation else ("Physical Cell", physical_cell)
+
+        # read the sequence first, deltas published while the snapshot runs are applied twice at worst until the next reconcile
+        seq = get_current_sequence(doctype, docname)
+        snapshot = get_live_counter_snapshot(physical_cell=physical_cell, workstation=workstation)
+
+        return {
+            "status": "success",
+            "event": LIVE_COUNTER_EVENT,
+            "room": {"doctype": doctype, "docname": docname},
+            "seq": seq,
+            "snapshot": snapshot,
+            "reconcile_interval": LIVE_COUNTER_RECONCILE_INTERVAL,
+        }
+
+    except frappe.ValidationError as e:
+        frappe.log_error(frappe.get_traceback(), "subscribe_live_counters() error")
+        frappe.local.response.http_status_code = 400
+        return {"status": "error", "message": str(e)}
+
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "subscribe_live_counters() error")
+        frappe.local.response.http_status_code = 500
+        return {"status": "error", "message": str(e)}
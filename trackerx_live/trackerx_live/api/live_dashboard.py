@@ -2,10 +2,22 @@ import frappe
 from datetime import datetime, timedelta
 from frappe.utils import now_datetime, today, get_datetime
 import math
-from frappe.utils import nowdate
+from frappe.utils import nowdate, add_months
+
+from trackerx_live.trackerx_live.services.dashboard_cache import cached_dashboard_tile
+from trackerx_live.trackerx_live.utils.shift_period_util import (
+    SHIFT_PERIODS,
+    get_working_windows,
+    overlaps_working_time,
+    resolve_shift_period,
+)
+
+
+DASHBOARD_PERIODS = ['today', 'current_hour', 'last_one_hour', *SHIFT_PERIODS]
 
 
 @frappe.whitelist()
+@cached_dashboard_tile("production_count")
 def get_production_count(**kwargs):
     """
     API to get production count based on Item Scan Log
@@ -94,7 +106,7 @@ def build_filters(period, device_id=None, workstation=None, operation=None, phys
             filters['status'] = status_filter
     
     # Add time-based filters
-    time_filters = get_time_filters(period)
+    time_filters = get_time_filters(period, physical_cell)
     filters.update(time_filters)
     
     # Add optional filters
@@ -124,11 +136,18 @@ def build_filters(period, device_id=None, workstation=None, operation=None, phys
     
     return filters
 
-def get_start_and_end_time(period):
-    """Get time-based filters based on period"""
+def get_start_and_end_time(period, physical_cell=None):
+    """
+    Get time-based filters based on period.
+    Shift periods (current_shift, previous_shift, shift_to_date) follow the
+    working hours of physical_cell, which must be a single cell.
+    """
     current_time = now_datetime()
     
-    if period == 'current_hour':
+    if period in SHIFT_PERIODS:
+        return resolve_shift_period(period, physical_cell, now=current_time)
+
+    elif period == 'current_hour':
         # From current hour start to now
         start_time = current_time.replace(minute=0, second=0, microsecond=0)
         return start_time, current_time
@@ -152,11 +171,17 @@ def get_start_and_end_time(period):
         return start_time, end_time
 
 
-def get_time_filters(period):
+def get_time_filters(period, physical_cell=None):
     """Get time-based filters based on period"""
     current_time = now_datetime()
     
-    if period == 'current_hour':
+    if period in SHIFT_PERIODS:
+        start_time, end_time = resolve_shift_period(period, physical_cell, now=current_time)
+        return {
+            'logged_time': ['between', [start_time, end_time]]
+        }
+
+    elif period == 'current_hour':
         # From current hour start to now
         start_time = current_time.replace(minute=0, second=0, microsecond=0)
         return {
@@ -186,45 +211,76 @@ def get_time_filters(period):
         }
 
 
+def get_window_filters(period, minutes=None, physical_cell=None):
+    """
+    logged_time filter for windows build_filters does not cover:
+    - minutes: the last N minutes
+    - period 'shift': same as shift_to_date
+    Returns {} when the period's own filter applies.
+    """
+    current_time = now_datetime()
+
+    if minutes:
+        try:
+            minutes = int(minutes)
+        except (TypeError, ValueError):
+            frappe.throw("minutes must be a number")
+        if minutes <= 0:
+            frappe.throw("minutes must be a positive number")
+        return {'logged_time': ['between', [current_time - timedelta(minutes=minutes), current_time]]}
+
+    if period == 'shift':
+        start_time, end_time = resolve_shift_period('shift_to_date', physical_cell, now=current_time)
+        return {'logged_time': ['between', [start_time, end_time]]}
+
+    return {}
+
+
 def get_output_count(filters):
     """Calculate the total production count based on filters"""
     try:
-        # Get all Item Scan Log records that match the filters
-        scan_logs = frappe.get_all(
-            'Item Scan Log',
-            filters=filters,
-            fields=['production_item']
-        )
-        
-        if not scan_logs:
-            return 0
-        
-        # Get unique production items
-        production_items = list(set([log.production_item for log in scan_logs]))
-        
-        # Calculate total quantity
-        total_quantity = 0
-        
-        for item in production_items:
-            # Get quantity from Production Item
-            item_doc = frappe.get_doc('Production Item', item)
-            quantity = item_doc.get('quantity', 1)  # Default to 1 if quantity field doesn't exist
-            total_quantity += quantity
-        
-        return total_quantity
+        # The rollup sums passes per log, which matches distinct items only within a single operation
+        if isinstance(filters.get('operation'), str):
+            rollup_count = get_rollup_count(filters, "good_qty")
+            if rollup_count is not None:
+                return rollup_count
+
+        from trackerx_live.trackerx_live.services.output_service import get_output_quantity
+        return get_output_quantity(filters)
         
     except Exception as e:
         frappe.log_error(f"Error in get_output_count: {str(e)}")
         return 0
 
 
+def get_rollup_count(filters, counter):
+    """
+    Read a counter from Production Minute Rollup for build_filters style filters.
+    Returns None when the rollup is disabled or can't answer the filters (device_id
+    is not rolled up), so the caller falls back to Item Scan Log.
+    """
+    from trackerx_live.trackerx_live.utils.trackerx_live_settings_util import TrackerXLiveSettings
+    from trackerx_live.trackerx_live.services.production_rollup_service import get_rollup_totals
+
+    if not TrackerXLiveSettings.is_dashboard_rollup_enabled() or filters.get('device_id'):
+        return None
+
+    operator, operand = filters['logged_time']
+    if operator == 'between':
+        start_time, end_time = operand
+    else:
+        start_time, end_time = operand, now_datetime()
+
+    return get_rollup_totals(filters, start_time, end_time)[counter]
+
+
 # Placeholder functions for future integration
 def get_ie_target(inputs):
     """
     Placeholder function to calculate IE Target
     To be implemented based on your business logic
     """
-    start_time, end_time = get_start_and_end_time(inputs["period"])
+    start_time, end_time = get_start_and_end_time(inputs["period"], inputs.get("physical_cell"))
     from trackerx_live.trackerx_live.services.target_service import LiveTargetService
     target_service = LiveTargetService()
     return math.ceil(target_service.get_total_target(inputs=inputs, from_date=start_time, to_date=end_time))
@@ -236,7 +292,7 @@ def get_full_ie_target(inputs):
     Placeholder function to calculate Full IE Target
     To be implemented based on your business logic
     """
-    start_time, end_time = get_start_and_end_time(inputs["period"])
+    start_time, end_time = get_start_and_end_time(inputs["period"], inputs.get("physical_cell"))
     from trackerx_live.trackerx_live.services.target_service import LiveTargetService
     target_service = LiveTargetService()
     return math.ceil(target_service.get_total_target(inputs=inputs, from_date=start_time, to_date=end_time))
@@ -299,7 +355,7 @@ def validate_parameters(kwargs):
     validated = {}
     
     # Validate period
-    valid_periods = ['current_hour', 'last_one_hour', 'today']
+    valid_periods = DASHBOARD_PERIODS
     period = kwargs.get('period', 'today')
     if period not in valid_periods:
         period = 'today'
@@ -345,6 +401,7 @@ def test_production_count():
 
 
 @frappe.whitelist()
+@cached_dashboard_tile("defective_unit_count")
 def get_defective_unit_count(**kwargs):
     """
     API to get defective unit count based on Item Scan Log
@@ -379,7 +436,9 @@ def get_defective_unit_count(**kwargs):
         filters = build_filters(period, device_id, workstation, operation, physical_cell, status_filter=defect_statuses)
         
         # Get defective unit count (count of records, not sum of quantities)
-        defective_count = frappe.db.count('Item Scan Log', filters)
+        defective_count = get_rollup_count(filters, "defective_units")
+        if defective_count is None:
+            defective_count = frappe.db.count('Item Scan Log', filters)
         limit = math.floor(get_defective_unit_limit(inputs))
         return {
             "data": {
@@ -401,14 +460,14 @@ def get_defective_unit_count(**kwargs):
         }
 
 def get_defective_unit_limit(inputs):
-    start_time, end_time = get_start_and_end_time(inputs["period"])
+    start_time, end_time = get_start_and_end_time(inputs["period"], inputs.get("physical_cell"))
     from trackerx_live.trackerx_live.services.target_service import LiveTargetService
     target_service = LiveTargetService()
     return math.floor(target_service.get_defective_unit_limit(inputs=inputs, from_date=start_time, to_date=end_time)) or 0
     
 
 def get_defects_limit(inputs):
-    start_time, end_time = get_start_and_end_time(inputs["period"])
+    start_time, end_time = get_start_and_end_time(inputs["period"], inputs.get("physical_cell"))
     from trackerx_live.trackerx_live.services.target_service import LiveTargetService
     target_service = LiveTargetService()
     return math.floor(target_service.get_defects_limit(inputs=inputs, from_date=start_time, to_date=end_time)) or 0
@@ -417,7 +476,7 @@ def get_defective_unit_threshold(defective_count, limit):
     if limit == 0:
         return "GREEN"
 
-    threshold = get_threshold_percentage
+    threshold = get_threshold_percentage()
     defective_percentage = defective_count * 100 / limit
 
     if defective_percentage >= 100:
@@ -431,12 +490,14 @@ def get_defective_unit_threshold(defective_count, limit):
 
 
 @frappe.whitelist()
+@cached_dashboard_tile("defects_count")
 def get_defects_count(**kwargs):
     """
     API to get total defects count based on child table entries
     
     Parameters:
-    - period: 'current_hour', 'last_one_hour', 'today' (default: 'today')
+    - period: 'current_hour', 'last_one_hour', 'today', 'shift' (default: 'today')
+    - minutes: last N minutes, overrides period
     - device_id: string or list of device IDs
     - workstation: string or list of workstations
     - operation: string or list of operations
@@ -462,29 +523,22 @@ def get_defects_count(**kwargs):
         
         # Build filters for Item Scan Log
         filters = build_filters(period, device_id, workstation, operation, physical_cell)
-        
-        # Get Item Scan Log records that match the filters
-        scan_logs = frappe.get_all(
-            'Item Scan Log',
-            filters=filters,
-            fields=['name']
-        )
-        
-        if not scan_logs:
+        filters.update(get_window_filters(period, kwargs.get('minutes'), physical_cell))
+
+        rollup_defects_count = get_rollup_count(filters, "defects_count")
+        if rollup_defects_count is not None:
+            limit = math.floor(get_defects_limit(inputs=inputs))
             return {
                 "data": {
-                    "defects_count": 0,
-                    "limit": 0,
-                    "color": "GREEN"
+                    "defects_count": rollup_defects_count,
+                    "limit": limit,
+                    "color": get_defective_unit_threshold(rollup_defects_count, limit)
                 }
             }
-        
-        # Get defect count from child table
-        parent_names = [log.name for log in scan_logs]
-        defects_count = frappe.db.count(
-            'Item Scan Log Defect',
-            {'parent': ['in', parent_names]}
-        )
+
+        # Count defect rows of the matching logs in one JOIN
+        from trackerx_live.trackerx_live.services.output_service import get_defects_count as count_defects
+        defects_count = count_defects(filters)
 
         limit = math.floor(get_defects_limit(inputs=inputs))
         
@@ -509,11 +563,15 @@ def get_defects_count(**kwargs):
 
 
 @frappe.whitelist()
+@cached_dashboard_tile("top_defects_last_hour")
 def get_top_defects_last_hour(**kwargs):
     """
     API to get top defects in the last 1 hour
     
     Parameters:
+    - period: 'last_one_hour', 'current_hour', 'today', 'shift' (default: 'last_one_hour')
+    - minutes: last N minutes, overrides period
+    - limit: number of defects to return (default: all)
     - device_id: string or list of device IDs
     - workstation: string or list of workstations
     - operation: string or list of operations
@@ -523,45 +581,19 @@ def get_top_defects_last_hour(**kwargs):
     """
     try:
         # Get parameters
+        period = kwargs.get('period') or 'last_one_hour'
         device_id = kwargs.get('device_id')
         workstation = kwargs.get('workstation')
         operation = kwargs.get('operation')
         physical_cell = kwargs.get('physical_cell')
         
-        # Build filters for last 1 hour
-        filters = build_filters('last_one_hour', device_id, workstation, operation, physical_cell)
-        
-        # Get Item Scan Log records from last hour
-        scan_logs = frappe.get_all(
-            'Item Scan Log',
-            filters=filters,
-            fields=['name']
-        )
-        
-        if not scan_logs:
-            return {
-                "data": {
-                    "top_defects": []
-                }
-            }
-        
-        # Get defects from child table with frequency count
-        parent_names = [log.name for log in scan_logs]
+        # Build filters for the window, last 1 hour by default
+        filters = build_filters(period, device_id, workstation, operation, physical_cell)
+        filters.update(get_window_filters(period, kwargs.get('minutes'), physical_cell))
         
-        defects_data = frappe.db.sql("""
-            SELECT 
-                defect,
-                defect_code,
-                defect_description,
-                defect_type,
-                severity,
-                COUNT(*) as frequency
-            FROM `tabItem Scan Log Defect`
-            WHERE parent IN %(parent_names)s
-                AND defect IS NOT NULL
-            GROUP BY defect, defect_code, defect_description, defect_type, severity
-            ORDER BY frequency DESC
-        """, {'parent_names': parent_names}, as_dict=True)
+        # Defects of the matching logs with frequency count, one indexed JOIN
+        from trackerx_live.trackerx_live.services.output_service import get_top_defects
+        defects_data = get_top_defects(filters, limit=kwargs.get('limit'))
         
         return {
             "data": {
@@ -584,9 +616,14 @@ from frappe.utils import now_datetime, today, get_datetime
 from datetime import timedelta, datetime
 
 @frappe.whitelist()
+@cached_dashboard_tile("output_line_graph")
 def get_output_line_graph(**kwargs):
     """
     API to get hourly output count for today (line graph data)
+
+    Optional:
+    - period: a shift period (current_shift, previous_shift, shift_to_date) draws the cell's shift instead of today
+    - bucket_minutes: bucket width in minutes (default 60), must divide a day evenly, e.g. 15 or 30
     """
     try:
         # --- Input params ---
@@ -595,6 +632,7 @@ def get_output_line_graph(**kwargs):
         operation = kwargs.get('operation')
         physical_cell = kwargs.get('physical_cell')
         period = kwargs.get('period', 'today')
+        bucket_minutes = get_bucket_minutes(kwargs.get('bucket_minutes'))
 
         inputs = {
             "period": period,
@@ -605,11 +643,14 @@ def get_output_line_graph(**kwargs):
         }
 
         # --- Get Hourly Target from LiveTargetService ---
-        from trackerx_live.trackerx_live.services.target_service import LiveTargetService
-        start_time, end_time = get_start_and_end_time(period)
+        from trackerx_live.trackerx_live.services.target_service import LiveTargetService, get_bucket_origin
+        from trackerx_live.trackerx_live.services.output_service import get_output_quantity_by_bucket
+        start_time, end_time = get_start_and_end_time(period, physical_cell)
         target_service = LiveTargetService()
-        hourly_target = target_service.get_hourly_target(inputs=inputs, from_date=start_time, to_date=end_time)
-        # hourly_target: dict like {datetime(2025,10,21,8,0): 100.0, ...}
+        target_by_bucket = target_service.get_hourly_target(
+            inputs=inputs, from_date=start_time, to_date=end_time, bucket_minutes=bucket_minutes
+        )
+        # target_by_bucket: {bucket_start: target}, buckets aligned to midnight like the graph's
 
         # --- Base Filters ---
         filters = {'log_status': 'Completed', 'status': 'Pass'}
@@ -622,75 +663,53 @@ def get_output_line_graph(**kwargs):
                 else:
                     filters[field] = val
 
-        # --- Today's time window ---
-        from frappe.utils import get_time
-        today_start = get_datetime(today() + " 00:00:00")
+        # --- Graph window: today, or the whole shift for shift periods ---
         current_time = now_datetime()
+        if period in SHIFT_PERIODS:
+            graph_start, graph_end = start_time, end_time
+        else:
+            graph_start = get_datetime(today() + " 00:00:00")
+            graph_end = graph_start + timedelta(days=1)
 
-        # --- Get Physical Cell timings ---
-        cell_start, cell_end = None, None
-        if physical_cell:
-            
-            cell_doc = frappe.get_doc("Physical Cell", physical_cell)
-            start_time_obj = get_time(cell_doc.start_time)
-            end_time_obj = get_time(cell_doc.end_time)
-            
-            cell_start = datetime.combine(today_start.date(), start_time_obj)
-            cell_end = datetime.combine(today_start.date(), end_time_obj)
-            # Handle cross-midnight scenario
-            if cell_end <= cell_start:
-                cell_end += timedelta(days=1)
-
-        # --- Collect Hourly Data ---
+        # --- Physical Cell working time (shift without breaks, may cross midnight) ---
+        working_windows = []
+        if physical_cell and isinstance(physical_cell, str):
+            working_windows = get_working_windows(physical_cell, graph_start, graph_end)
+
+        # --- Output for the whole window in one query ---
+        # a shift starting between bucket boundaries gets a shorter first bucket
+        bucket_origin = get_bucket_origin(graph_start, bucket_minutes)
+        filters['logged_time'] = ['between', [graph_start, min(current_time, graph_end)]]
+        output_by_bucket = get_output_quantity_by_bucket(filters, bucket_origin=bucket_origin, bucket_minutes=bucket_minutes)
+
+        # --- Collect Bucket Data ---
         hourly_data = []
+        bucket_count = math.ceil((graph_end - bucket_origin).total_seconds() / (bucket_minutes * 60))
 
-        for hour in range(24):
-            hour_start = today_start + timedelta(hours=hour)
-            hour_end = hour_start + timedelta(hours=1)
+        for bucket in range(bucket_count):
+            bucket_start = bucket_origin + timedelta(minutes=bucket * bucket_minutes)
+            bucket_end = min(bucket_start + timedelta(minutes=bucket_minutes), graph_end)
 
-            # Skip future hours
-            if hour_start > current_time:
+            # Skip future buckets
+            if bucket_start > current_time:
                 break
 
-            # Adjust end time for ongoing hour
-            if hour_end > current_time:
-                hour_end = current_time
-
-            # Build hour filter
-            hour_filters = filters.copy()
-            hour_filters['logged_time'] = ['between', [hour_start, hour_end]]
-
-            # Fetch scan logs
-            scan_logs = frappe.get_all('Item Scan Log', filters=hour_filters, fields=['production_item'])
-            hour_count = 0
-            if scan_logs:
-                production_items = list(set([log.production_item for log in scan_logs]))
-                for item in production_items:
-                    try:
-                        item_doc = frappe.get_doc('Production Item', item)
-                        hour_count += item_doc.get('quantity', 1)
-                    except Exception:
-                        hour_count += 1
-
-            # --- Get target for this hour ---
-            target_value = 0
-            for target_time, value in hourly_target.items():
-                if target_time.hour == hour:
-                    target_value = value
-                    break
-
-            # --- Cell timing filter logic ---
+            bucket_output = output_by_bucket.get(bucket, 0)
+            target_value = target_by_bucket.get(bucket_start, 0)
+
+            # --- Cell timing filter logic, buckets outside working time (e.g. breaks) are skipped ---
+            bucket_start = max(bucket_start, graph_start)
             in_cell_timing = (
-                cell_start is None or
-                (cell_start <= hour_start < cell_end)
+                not working_windows or
+                overlaps_working_time(working_windows, bucket_start, bucket_end)
             )
-            include_hour = in_cell_timing or hour_count > 0
+            include_bucket = in_cell_timing or bucket_output > 0
 
-            if include_hour:
+            if include_bucket:
                 hourly_data.append({
-                    "hour": f"{hour:02d}:00",
-                    "hour_label": f"{hour:02d}:00-{(hour+1)%24:02d}:00",
-                    "output_count": hour_count,
+                    "hour": bucket_start.strftime("%H:%M"),
+                    "hour_label": f"{bucket_start.strftime('%H:%M')}-{bucket_end.strftime('%H:%M')}",
+                    "output_count": bucket_output,
                     "target": target_value
                 })
 
@@ -714,6 +733,22 @@ def get_output_line_graph(**kwargs):
         }
 
 
+def get_bucket_minutes(bucket_minutes=None):
+    """Validate the line graph bucket width, defaults to one hour"""
+    if not bucket_minutes:
+        return 60
+
+    try:
+        bucket_minutes = int(bucket_minutes)
+    except (TypeError, ValueError):
+        frappe.throw("bucket_minutes must be a number of minutes")
+
+    if bucket_minutes <= 0 or (24 * 60) % bucket_minutes != 0:
+        frappe.throw("bucket_minutes must divide a day evenly, e.g. 15, 30, 60 or 120")
+
+    return bucket_minutes
+
+
 # HTTP API endpoints for all the new functions
 @frappe.whitelist(allow_guest=False, methods=['GET', 'POST'])
 def defective_unit_count_api():
@@ -776,6 +811,7 @@ def tv_dashboards_display_time():
 
 
 @frappe.whitelist()
+@cached_dashboard_tile("rft_wip_style_operators_count")
 def get_rft_wip_style_operators_count(**kwargs):
 
     period = kwargs.get('period', 'today')
@@ -792,7 +828,7 @@ def get_rft_wip_style_operators_count(**kwargs):
             "rft": get_rft(workstation, operation, physical_cell),
             "wip": get_wip(workstation, operation, physical_cell),
             "cell_wip": get_cell_wip(workstation, operation, physical_cell),
-            "style": running_fg.style,
+            "style": running_fg.style if running_fg else None,
             "operator": get_operator_count(workstation, operation, physical_cell)
         }
     }
@@ -840,6 +876,48 @@ def get_running_style(workstation, operation, physical_cell):
     if not result:
         return None
     return result[0]
+
+
+def get_running_styles(physical_cells, as_of=None):
+    """
+    Batch version of get_running_style for the target scheduler.
+    Returns {physical_cell: {"style", "item"}} from the latest scan of each cell,
+    today first and otherwise within the last month.
+    as_of resolves the style at a past time (scans before it, "today" being its date).
+    """
+    running_styles = {}
+    as_of = get_datetime(as_of) if as_of else now_datetime()
+    day_start = as_of.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    for window_start in (day_start, add_months(day_start, -1)):
+        pending_cells = [cell for cell in physical_cells or [] if cell not in running_styles]
+        if not pending_cells:
+            break
+
+        result = frappe.db.sql("""
+            SELECT
+                sl.physical_cell,
+                itm.item_name as style,
+                itm.name as item
+            FROM (
+                SELECT sl.physical_cell, MAX(sl.creation) AS last_creation
+                FROM `tabItem Scan Log` sl
+                WHERE sl.physical_cell IN %(physical_cells)s
+                AND sl.creation >= %(window_start)s
+                AND sl.creation < %(as_of)s
+                GROUP BY sl.physical_cell
+            ) last_scan
+            INNER JOIN `tabItem Scan Log` sl
+                ON sl.physical_cell = last_scan.physical_cell AND sl.creation = last_scan.last_creation
+            INNER JOIN `tabProduction Item` pi on pi.name = sl.production_item
+            INNER JOIN `tabTracking Order` tor on tor.name = pi.tracking_order
+            INNER JOIN `tabItem` itm on itm.name = tor.item
+        """, {'physical_cells': tuple(pending_cells), 'window_start': window_start, 'as_of': as_of}, as_dict=True)
+
+        for row in result:
+            running_styles.setdefault(row.physical_cell, frappe._dict(style=row.style, item=row.item))
+
+    return running_styles
     
 
 def get_operator_count(workstation=None, operation=None, physical_cell=None):
@@ -899,13 +977,14 @@ starts here
 
 
 @frappe.whitelist()
+@cached_dashboard_tile("efficiency_count")
 def get_efficiency_count(**kwargs):
     period = kwargs.get('period')
     if not period:
         frappe.throw("period is mandatory")
 
-    if period not in ['today', 'current_hour', 'last_one_hour']:
-        frappe.throw("Invalid period. Allowed values: today, current_hour, last_one_hour")
+    if period not in DASHBOARD_PERIODS:
+        frappe.throw(f"Invalid period. Allowed values: {', '.join(DASHBOARD_PERIODS)}")
 
     workstation = kwargs.get('workstation')
     operation = kwargs.get('operation')
@@ -916,7 +995,7 @@ def get_efficiency_count(**kwargs):
         frappe.throw("At least one of physical_cell, operation, or workstation is required")
 
     # Time Period
-    start_time, end_time = get_start_and_end_time(period)
+    start_time, end_time = get_start_and_end_time(period, physical_cell)
 
     # Dynamic Filters
     filters = {
@@ -933,6 +1012,12 @@ def get_efficiency_count(**kwargs):
         ["SUM(produced_minutes)", "SUM(available_minutes)", "SUM(target_minutes)"]
     ) or (0, 0, 0)
 
+    return {
+        "data": get_efficiency_data(total_produced_minutes, total_available_minutes, total_target_minutes)
+    }
+
+
+def get_efficiency_data(total_produced_minutes, total_available_minutes, total_target_minutes):
     output_eff = 0
     target_eff = 0
 
@@ -941,22 +1026,21 @@ def get_efficiency_count(**kwargs):
         target_eff = round((total_target_minutes / total_available_minutes) * 100, 2)
 
     return {
-        "data": {
-            "output": output_eff,
-            "target": target_eff,
-            "color": get_output_color(output_count=output_eff, ie_target=target_eff)
-        }
+        "output": output_eff,
+        "target": target_eff,
+        "color": get_output_color(output_count=output_eff, ie_target=target_eff)
     }
 
 
 @frappe.whitelist()
+@cached_dashboard_tile("efficiency_line_graph")
 def get_efficiency_line_graph(**kwargs):
     period = kwargs.get('period')
     if not period:
         frappe.throw("period is mandatory")
 
-    if period not in ['today', 'current_hour', 'last_one_hour']:
-        frappe.throw("Invalid period. Allowed values: today, current_hour, last_one_hour")
+    if period not in DASHBOARD_PERIODS:
+        frappe.throw(f"Invalid period. Allowed values: {', '.join(DASHBOARD_PERIODS)}")
 
     workstation = kwargs.get('workstation')
     operation = kwargs.get('operation')
@@ -966,7 +1050,7 @@ def get_efficiency_line_graph(**kwargs):
     if not (physical_cell or operation or workstation):
         frappe.throw("At least one of physical_cell, operation, or workstation is required")
 
-    start_time, end_time = get_start_and_end_time(period)
+    start_time, end_time = get_start_and_end_time(period, physical_cell)
 
     # Dynamic SQL filter builder
     conditions = []
@@ -1029,3 +1113,180 @@ def get_efficiency_line_graph(**kwargs):
             "hourly_output": hourly_output
         }
     }
+
+
+SNAPSHOT_PERIODS = DASHBOARD_PERIODS
+DEFECT_STATUSES = ['QC Rework', 'QC Reject', 'QC Recut']
+
+
+@frappe.whitelist()
+@cached_dashboard_tile("cell_dashboard_snapshot")
+def get_cell_dashboard_snapshot(physical_cell=None, periods=None, **kwargs):
+    """
+    All TV dashboard tiles of a physical cell in one call.
+
+    Parameters:
+    - physical_cell: physical cell name (required)
+    - periods: list (or JSON / comma separated string) of 'today', 'current_hour',
+      'last_one_hour', 'current_shift', 'previous_shift', 'shift_to_date'
+      (default: today and current_hour)
+    - bucket_minutes: width of the output line graph buckets (default: 60)
+
+    Output, defective units and defects of every period come from one pair of scan
+    queries, plus one rollup query when the rollup is enabled, targets and limits
+    from the shared per-minute get_limits cache and efficiency from one Hourly
+    Target query. Tiles return the same data as get_production_count,
+    get_defective_unit_count, get_defects_count and get_efficiency_count per
+    period, and get_top_defects_last_hour, get_output_line_graph and
+    get_rft_wip_style_operators_count once. One of those three failing returns
+    {"error": ...} in its place.
+    """
+    try:
+        if not physical_cell:
+            frappe.throw("Physical Cell is required")
+
+        periods = parse_snapshot_periods(periods)
+        windows = {period: get_start_and_end_time(period, physical_cell) for period in periods}
+
+        from trackerx_live.trackerx_live.services.output_service import get_scan_counts_by_window
+        from trackerx_live.trackerx_live.services.target_service import LiveTargetService
+
+        scan_counts = get_scan_counts_by_window(
+            {'log_status': 'Completed', 'physical_cell': physical_cell},
+            windows,
+            DEFECT_STATUSES
+        )
+        rollup_counts = get_rollup_counts_by_window(physical_cell, windows)
+        efficiency_minutes = get_efficiency_minutes_by_period(physical_cell, windows)
+        target_service = LiveTargetService()
+        inputs = {"physical_cell": physical_cell}
+
+        period_tiles = {}
+        for period, (start_time, end_time) in windows.items():
+            counts = scan_counts[period]
+            limits = target_service.get_limits(inputs=inputs, from_date=start_time, to_date=end_time)
+
+            # tiles read these from Production Minute Rollup when it is enabled
+            defective_count = (rollup_counts or counts)[period]["defective_units"]
+            defects_count = (rollup_counts or counts)[period]["defects_count"]
+
+            ie_target = math.ceil(limits.target)
+            defective_unit_limit = math.floor(limits.defective_unit_limit)
+            defects_limit = math.floor(limits.defects_limit)
+
+            period_tiles[period] = {
+                "production_count": {
+                    "output_count": counts["output"],
+                    "ie_target": ie_target,
+                    "full_ie_target": ie_target,
+                    "plan_target": get_plan_target(inputs),
+                    "color": get_output_color(counts["output"], ie_target, ie_target)
+                },
+                "defective_unit_count": {
+                    "defective_unit_count": defective_count,
+                    "limit": defective_unit_limit,
+                    "color": get_defective_unit_threshold(defective_count, defective_unit_limit)
+                },
+                "defects_count": {
+                    "defects_count": defects_count,
+                    "limit": defects_limit,
+                    "color": get_defective_unit_threshold(defects_count, defects_limit)
+                },
+                "efficiency": get_efficiency_data(*efficiency_minutes[period])
+            }
+
+        return {
+            "data": {
+                "physical_cell": physical_cell,
+                "periods": period_tiles,
+                "top_defects": get_snapshot_tile(get_top_defects_last_hour, "top_defects", physical_cell=physical_cell),
+                "output_line_graph": get_snapshot_tile(
+                    get_output_line_graph,
+                    physical_cell=physical_cell,
+                    bucket_minutes=kwargs.get('bucket_minutes')
+                ),
+                "rft_wip_style_operators": get_snapshot_tile(get_rft_wip_style_operators_count, physical_cell=physical_cell)
+            }
+        }
+
+    except Exception as e:
+        frappe.log_error(f"Error in get_cell_dashboard_snapshot: {str(e)}")
+        return {
+            "data": {},
+            "error": str(e)
+        }
+
+
+def get_rollup_counts_by_window(physical_cell, windows):
+    """Rollup defective units and defects of every window in one query, None when the rollup is disabled"""
+    from trackerx_live.trackerx_live.utils.trackerx_live_settings_util import TrackerXLiveSettings
+    from trackerx_live.trackerx_live.services import production_rollup_service
+
+    if not TrackerXLiveSettings.is_dashboard_rollup_enabled():
+        return None
+
+    return production_rollup_service.get_rollup_counts_by_window(
+        {'physical_cell': physical_cell},
+        windows,
+        DEFECT_STATUSES
+    )
+
+
+def get_snapshot_tile(tile, key=None, **kwargs):
+    """Data of a tile shared by the snapshot, a failing tile returns its error and leaves the others"""
+    try:
+        result = tile(**kwargs)
+        # most tiles catch their own errors and return them next to empty data
+        if result.get("error"):
+            return {"error": result["error"]}
+        data = result["data"]
+        return data[key] if key else data
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), f"Error in get_cell_dashboard_snapshot tile {getattr(tile, '__name__', tile)}")
+        return {"error": str(e)}
+
+
+def parse_snapshot_periods(periods):
+    if not periods:
+        return ['today', 'current_hour']
+
+    if isinstance(periods, str):
+        periods = frappe.parse_json(periods) if periods.strip().startswith('[') else periods.split(',')
+
+    periods = [period.strip() for period in periods if period and period.strip()]
+    invalid = [period for period in periods if period not in SNAPSHOT_PERIODS]
+    if invalid:
+        frappe.throw(f"Invalid period {', '.join(invalid)}. Allowed values: {', '.join(SNAPSHOT_PERIODS)}")
+
+    # keep the order, drop repeats
+    return list(dict.fromkeys(periods))
+
+
+def get_efficiency_minutes_by_period(physical_cell, windows):
+    """(produced, available, target) minutes of each period as get_efficiency_count sums them, in one query"""
+    values = {"physical_cell": physical_cell}
+    columns = []
+    for idx, (start_time, end_time) in enumerate(windows.values()):
+        values[f"p{idx}_from"] = start_time
+        values[f"p{idx}_to"] = end_time
+        in_period = f"from_time >= %(p{idx}_from)s AND to_time <= %(p{idx}_to)s"
+        columns.extend([
+            f"SUM(IF({in_period}, produced_minutes, 0)) AS produced_{idx}",
+            f"SUM(IF({in_period}, available_minutes, 0)) AS available_{idx}",
+            f"SUM(IF({in_period}, target_minutes, 0)) AS target_{idx}",
+        ])
+
+    row = frappe.db.sql(f"""
+        SELECT {", ".join(columns)}
+        FROM `tabHourly Target`
+        WHERE physical_cell = %(physical_cell)s
+          AND from_time >= %(range_from)s
+          AND to_time <= %(range_to)s
+    """, dict(values,
+              range_from=min(window[0] for window in windows.values()),
+              range_to=max(window[1] for window in windows.values())), as_dict=True)[0]
+
+    return {
+        period: (row.get(f"produced_{idx}") or 0, row.get(f"available_{idx}") or 0, row.get(f"target_{idx}") or 0)
+        for idx, period in enumerate(windows)
+    }
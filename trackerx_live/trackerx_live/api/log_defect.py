@@ -3,6 +3,8 @@ import json
 from frappe.utils import now_datetime
 
 from trackerx_live.trackerx_live.utils.trackerx_live_settings_util import TrackerXLiveSettings
+from trackerx_live.trackerx_live.services.production_rollup_service import build_rollup_changes, build_rollup_row, record_scan_logs
+from trackerx_live.trackerx_live.services.live_counter_service import publish_counter_deltas
 
 @frappe.whitelist()
 def log_defective_units(scan_id=None, defective_units=None, device_id=None):
@@ -50,6 +52,9 @@ def log_defective_units(scan_id=None, defective_units=None, device_id=None):
         parent_prod = frappe.get_doc("Production Item", parent_prod_name)
         prod_type = (parent_prod.get("type") or "").strip()
 
+        # the parent log may be Completed already, its earlier counts are replaced
+        previous_parent_scan = parent_scan.as_dict()
+
         # Update parent scan log (status fixed for now)
         # Take defect_type from first unit, if available
         first_defect_type = (defective_units[0].get("defect_type") or "QC Rework").strip()
@@ -86,6 +91,11 @@ def log_defective_units(scan_id=None, defective_units=None, device_id=None):
                         })
             parent_scan.remarks = "DUT is Off, so defective units logged on the same parent bundle"
             parent_scan.save(ignore_permissions=True)
+            removed_rows, rollup_rows = build_rollup_changes(previous_parent_scan, parent_scan, quantity=parent_prod.quantity)
+            record_scan_logs(removed_rows, sign=-1)
+            publish_counter_deltas(removed_rows, sign=-1)
+            record_scan_logs(rollup_rows)
+            publish_counter_deltas(rollup_rows)
             frappe.db.commit()
             return {
                 "status": "success",
@@ -103,6 +113,7 @@ def log_defective_units(scan_id=None, defective_units=None, device_id=None):
             parent_scan.status = "DUT Parent Defect"
             parent_scan.save(ignore_permissions=True)
             created = []
+            removed_rows, rollup_rows = build_rollup_changes(previous_parent_scan, parent_scan, quantity=parent_prod.quantity)
 
             parent_number = parent_prod.get("production_item_number") or parent_prod.name
             
@@ -255,6 +266,7 @@ def log_defective_units(scan_id=None, defective_units=None, device_id=None):
                             "defect": defect_id
                         })
                 child_scan.insert(ignore_permissions=True)
+                rollup_rows.append(build_rollup_row(child_scan, quantity=1))
 
                 new_prod.last_scan_log = child_scan.name
                 new_prod.save()
@@ -273,6 +285,10 @@ def log_defective_units(scan_id=None, defective_units=None, device_id=None):
                 ''' Partial bundle is enabled, so reduced the bundles to good units and mark them as passed '''
                 reduced_the_bundle_to_good_units_bundle(parent_scan, parent_prod, parent_bc, defective_units, is_dut_on, child_prod_items)
 
+            record_scan_logs(removed_rows, sign=-1)
+            publish_counter_deltas(removed_rows, sign=-1)
+            record_scan_logs(rollup_rows)
+            publish_counter_deltas(rollup_rows)
             frappe.db.commit()
             return {
                 "status": "success",
@@ -356,6 +372,9 @@ def reduced_the_bundle_to_good_units_bundle(parent_scan, parent_prod, parent_bc,
         item_scan_log.dut = "ON" if is_dut_on else "OFF"
         item_scan_log.device_id = parent_scan.device_id
         item_scan_log.insert(ignore_permissions=True)
+        rollup_rows = [build_rollup_row(item_scan_log, quantity=reduced_qty)]
+        record_scan_logs(rollup_rows)
+        publish_counter_deltas(rollup_rows)
 
         # add information into swith log
         all_child_items = unit_child_prod_items.copy()
@@ -5,10 +5,22 @@ import json
 
 from trackerx_live.trackerx_live.utils.trackerx_live_settings_util import TrackerXLiveSettings
 from trackerx_live.trackerx_live.utils.sequence_of_operation import SequenceOfOpeationUtil
+from trackerx_live.trackerx_live.utils.tracking_tag_util import resolve_tags
+from trackerx_live.trackerx_live.services.master_data_cache import get_master_data
+from trackerx_live.trackerx_live.services.scan_write_service import enqueue_scan_write, get_scan_write_status, persist_scan
 
 @frappe.whitelist()
-def scan_item(tags, workstation, scan_source="QC",remarks=None):
+def scan_item(tags, workstation, scan_source="QC",remarks=None, async_write=None):
+    """
+    async_write: validate now and queue the scan log write, returning a provisional
+    scan_log_id to confirm with scan_write_status. Defaults to the
+    'Async Scan Writes' setting.
+    """
     try:
+        if async_write is None:
+            async_write = TrackerXLiveSettings.is_async_scan_writes_enabled()
+        async_write = frappe.utils.cint(async_write)
+
         # If tags is string, convert to list
         if isinstance(tags, str):
             try:
@@ -23,6 +35,7 @@ def scan_item(tags, workstation, scan_source="QC",remarks=None):
             )
 
         results = []
+        queued_writes = []
 
         # Fetch operation + physical cell from workstation ---
         ws_info_list = get_cell_operator_by_ws(workstation)
@@ -36,31 +49,21 @@ def scan_item(tags, workstation, scan_source="QC",remarks=None):
         operation = ws_info["operation_name"]
         physical_cell = ws_info["cell_id"]
 
+        # Resolve all tags to their production items in one query
+        resolved_tags = resolve_tags(tags)
 
         for tag_number in tags:
             try:
                 # --- Validate Tag ---
-                tag = frappe.get_all(
-                    "Tracking Tag",
-                    filters={"tag_number": tag_number},
-                    fields=["name"]
-                )
-                if not tag:
+                if tag_number in resolved_tags.missing:
                     frappe.throw(
                         f"Invalid tag! This tag is not activated, Please use activated tag. Contact your supervisor",
                         frappe.ValidationError
                     )
 
-                tag_id = tag[0]["name"]
-
-                tag_map = frappe.db.get_value(
-                    "Production Item Tag Map",
-                    {"tracking_tag": tag_id, "is_active": True},
-                    ["name", "is_active", "production_item"],
-                    as_dict=True
-                )
+                production_item_doc = resolved_tags.tags.get(tag_number)
 
-                if not tag_map or not tag_map.is_active:
+                if not production_item_doc:
                     frappe.throw(
                         f"Invalid Tag! Tag already unlinked, Please use activated tag. Contact your supervisor"
                     )
@@ -69,7 +72,7 @@ def scan_item(tags, workstation, scan_source="QC",remarks=None):
                 
 
                 # --- Get Production Item ---
-                production_item_name = tag_map.production_item
+                production_item_name = production_item_doc.production_item
 
                 result = SequenceOfOpeationUtil.can_this_item_scan_in_this_operation(production_item=production_item_name, workstation=workstation, operation=operation, physical_cell=physical_cell)
                 if not result["is_allowed"]:
@@ -78,27 +81,32 @@ def scan_item(tags, workstation, scan_source="QC",remarks=None):
                         frappe.ValidationError
                     )
 
-                production_item_doc = frappe.get_doc("Production Item", production_item_name)
+                production_item_bc_doc = get_master_data("Tracking Order Bundle Configuration", production_item_doc.bundle_configuration)
 
-                production_item_bc_doc = frappe.get_doc("Tracking Order Bundle Configuration", production_item_doc.bundle_configuration)
+                operation_doc = get_master_data("Operation", operation)
 
-                operation_doc = frappe.get_doc("Operation", operation)
+                operation_group_doc = get_master_data("Operation Group", operation_doc.custom_operation_group)
 
-                operation_group_doc = frappe.get_doc("Operation Group", operation_doc.custom_operation_group)
+                tracking_order_doc = get_master_data("Tracking Order", production_item_doc.tracking_order)
 
-                tracking_order_doc = frappe.get_doc("Tracking Order", production_item_doc.tracking_order)
+                fg_item_doc = get_master_data("Item", tracking_order_doc.item)
 
-                fg_item_doc = frappe.get_doc("Item", tracking_order_doc.item)
+                style_master_doc = get_master_data("Style Master", fg_item_doc.custom_style_master)
 
-                style_master_doc = frappe.get_doc("Style Master", fg_item_doc.custom_style_master)
+                physical_cell_doc = get_master_data("Physical Cell", physical_cell)
 
-                physical_cell_doc = frappe.get_doc("Physical Cell", physical_cell)
-
-                prev_operations = []
-                # from trackerx_live.trackerx_live.utils.operation_map_util import OperationMapManager
-                # operation_map_manager = OperationMapManager()
-                # operation_map = operation_map_manager.get_operation_map(tracking_order_number=tracking_order_doc.name)
-                # prev_operations = operation_map.get_all_previous_operations(current_operation=operation, component=production_item_doc.component,sequence_no=1)
+                flow = SequenceOfOpeationUtil.check_operation_flow(
+                    production_item=production_item_name,
+                    tracking_order=tracking_order_doc.name,
+                    component=production_item_doc.component,
+                    operation=operation
+                )
+                if not flow["is_allowed"]:
+                    frappe.throw(
+                        f"This item skipped operations: {', '.join(flow['skipped_operations'])}",
+                        frappe.ValidationError
+                    )
+                prev_operations = flow["previous_operations"]
 
                 last_scan_log_doc = frappe.get_doc("Item Scan Log", production_item_doc.last_scan_log) if production_item_doc.last_scan_log else None
 
@@ -118,29 +126,9 @@ def scan_item(tags, workstation, scan_source="QC",remarks=None):
                 # validate_workstation_for_supported_operation
                 validate_workstation_for_supported_operation(workstation=workstation, operation=operation, api_source=scan_source)        
 
-                # --- Cancel existing logs for same op/ws ---
-                existing_logs = frappe.get_all(
-                    "Item Scan Log",
-                    filters={
-                        "production_item": production_item_name,
-                        "operation": operation,
-                        "workstation": workstation,
-                        "log_status": ["!=", "Cancelled"]
-                    },
-                    fields=["name"]
-                )
-                for log in existing_logs:
-                    frappe.db.set_value(
-                        "Item Scan Log",
-                        log["name"],
-                        "log_status",
-                        "Cancelled",
-                        update_modified=False
-                    )
-
-                # --- Create new scan log ---
-                scan_log_doc = frappe.get_doc({
-                    "doctype": "Item Scan Log",
+                # --- Create new scan log, cancelling existing logs for same op/ws ---
+                scan_log = {
+                    "name": frappe.generate_hash(length=10),
                     "production_item": production_item_name,
                     "operation": operation,
                     "workstation": workstation,
@@ -152,13 +140,19 @@ def scan_item(tags, workstation, scan_source="QC",remarks=None):
                     "log_status": "Draft",
                     "log_type": "User Scanned",
                     "remarks": remarks or ""
-                })
-                scan_log_doc.insert(ignore_permissions=True)
+                }
+                if async_write:
+                    # queued once every tag passed validation
+                    queued_writes.append((scan_log, production_item_doc.quantity))
+                    scan_log_id = scan_log["name"]
+                else:
+                    scan_log_id = persist_scan(scan_log, quantity=production_item_doc.quantity).name
                 
                 
                 results.append({
-                    "message": "Item Scanned",
-                    "scan_log_id": scan_log_doc.name,
+                    "message": "Item Scan Queued" if async_write else "Item Scanned",
+                    "scan_log_id": scan_log_id,
+                    "write_status": "Queued" if async_write else "Persisted",
                     "production_item_number": production_item_doc.production_item_number,
                     "tracking_order": production_item_doc.tracking_order,
                     "bundle_configuration": production_item_doc.bundle_configuration,
@@ -194,7 +188,11 @@ def scan_item(tags, workstation, scan_source="QC",remarks=None):
             except Exception as inner_e:
                 raise inner_e
         
-        frappe.db.commit()
+        if async_write:
+            for scan_log, quantity in queued_writes:
+                enqueue_scan_write(scan_log, quantity=quantity)
+        else:
+            frappe.db.commit()
         return {
             "status": "completed",
             "code": 1200,
@@ -214,3 +212,33 @@ def scan_item(tags, workstation, scan_source="QC",remarks=None):
         return {"status": "error", "message": str(e)}
     
 
+
+@frappe.whitelist()
+def scan_write_status(scan_log_ids):
+    """Persistence status of scans returned by scan_item, see async_write"""
+    try:
+        if isinstance(scan_log_ids, str):
+            try:
+                scan_log_ids = json.loads(scan_log_ids) if scan_log_ids.strip().startswith("[") else [scan_log_ids]
+            except Exception:
+                scan_log_ids = [scan_log_ids]
+
+        if not isinstance(scan_log_ids, list) or not scan_log_ids:
+            frappe.throw(
+                f"Please provide at least one scan_log_id",
+                frappe.ValidationError
+            )
+
+        return {
+            "status": "success",
+            "data": get_scan_write_status(scan_log_ids)
+        }
+
+    except frappe.ValidationError as e:
+        frappe.log_error(frappe.get_traceback(), "Scan Write Status API Error")
+        frappe.local.response.http_status_code = 400
+        return {"status": "error", "message": str(e)}
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "Scan Write Status API Error")
+        frappe.local.response.http_status_code = 500
+        return {"status": "error", "message": str(e)}
@@ -74,6 +74,56 @@ def get_tracking_orders_pending_activation():
         return {"status": "error", "message": str(e)}
 
 
+@frappe.whitelist()
+def get_activation_progress(tracking_order):
+    """Progress of a Tracking Order's bundle activation, pushed live as trackerx_bulk_activation_progress"""
+    try:
+        if not tracking_order:
+            frappe.throw(_("Tracking Order is required"), frappe.ValidationError)
+
+        from trackerx_live.trackerx_live.services.bulk_activation_service import get_activation_progress as get_progress
+
+        return {
+            "status": "success",
+            "data": get_progress(tracking_order)
+        }
+
+    except frappe.ValidationError as e:
+        frappe.log_error(frappe.get_traceback(), "get_activation_progress() error")
+        frappe.local.response.http_status_code = 400
+        return {"status": "error", "message": str(e)}
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "get_activation_progress() error")
+        frappe.local.response.http_status_code = 500
+        return {"status": "error", "message": str(e)}
+
+
+@frappe.whitelist()
+def retry_bulk_activation(tracking_order):
+    """Queue a failed bundle activation again, bundles already activated are skipped"""
+    try:
+        if not tracking_order:
+            frappe.throw(_("Tracking Order is required"), frappe.ValidationError)
+
+        frappe.has_permission("Tracking Order", "write", tracking_order, throw=True)
+
+        from trackerx_live.trackerx_live.services.bulk_activation_service import retry_bulk_activation as retry_activation
+
+        return {
+            "status": "success",
+            "data": retry_activation(tracking_order)
+        }
+
+    except frappe.ValidationError as e:
+        frappe.log_error(frappe.get_traceback(), "retry_bulk_activation() error")
+        frappe.local.response.http_status_code = 400
+        return {"status": "error", "message": str(e)}
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "retry_bulk_activation() error")
+        frappe.local.response.http_status_code = 500
+        return {"status": "error", "message": str(e)}
+
+
 @frappe.whitelist()
 def get_operation_map_test_api(tracking_order_number, component=None, current_operation=None):
 
@@ -1,9 +1,16 @@
 # Copyright (c) 2025, CognitionX and contributors
 # For license information, please see license.txt
 
-# import frappe
+import frappe
 from frappe.model.document import Document
 
 
+HOURLY_TARGET_UNIQUE_KEY = ["physical_cell", "operation", "workstation", "from_time", "to_time"]
+
+
 class HourlyTarget(Document):
 	pass
+
+
+def on_doctype_update():
+	frappe.db.add_unique("Hourly Target", HOURLY_TARGET_UNIQUE_KEY, constraint_name="unique_hourly_target")
@@ -4,6 +4,16 @@
 # import frappe
 from frappe.model.document import Document
 
+from trackerx_live.trackerx_live.services.operation_status_service import record_operation_statuses
+
 
 class ItemScanLog(Document):
-	pass
+	def on_update(self):
+		# in the same transaction as the log
+		record_operation_statuses([self])
+
+
+def on_doctype_update():
+	from trackerx_live.trackerx_live.utils.db_index_util import add_item_scan_log_indexes
+
+	add_item_scan_log_indexes()
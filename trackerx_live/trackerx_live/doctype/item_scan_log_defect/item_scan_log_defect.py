@@ -7,3 +7,9 @@ from frappe.model.document import Document
 
 class ItemScanLogDefect(Document):
 	pass
+
+
+def on_doctype_update():
+	from trackerx_live.trackerx_live.utils.db_index_util import add_item_scan_log_defect_indexes
+
+	add_item_scan_log_defect_indexes()
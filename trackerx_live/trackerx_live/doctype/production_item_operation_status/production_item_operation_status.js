@@ -0,0 +1,8 @@
+// Copyright (c) 2026, CognitionX and contributors
+// For license information, please see license.txt
+
+// frappe.ui.form.on("Production Item Operation Status", {
+// 	refresh(frm) {
+
+// 	},
+// });
@@ -0,0 +1,14 @@
+# Copyright (c) 2026, CognitionX and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class ProductionMinuteRollup(Document):
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_index("Production Minute Rollup", ["physical_cell", "minute"])
+	frappe.db.add_index("Production Minute Rollup", ["minute", "operation"])
@@ -1,9 +1,16 @@
 # Copyright (c) 2025, CognitionX and contributors
 # For license information, please see license.txt
 
-# import frappe
+import frappe
 from frappe.model.document import Document
 
 
 class TrackerXLiveSettings(Document):
-	pass
\ No newline at end of file
+	def on_update(self):
+		# Seed today's rollup so dashboards switched to it don't start from zero
+		if self.read_dashboards_from_rollup and self.has_value_changed("read_dashboards_from_rollup"):
+			frappe.enqueue(
+				"trackerx_live.trackerx_live.services.production_rollup_service.rebuild_today_production_rollup",
+				queue="long",
+				enqueue_after_commit=True,
+			)
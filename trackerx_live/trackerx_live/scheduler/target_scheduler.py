@@ -3,9 +3,12 @@ from __future__ import annotations
 import frappe
 from frappe.utils import now_datetime, get_datetime, flt
 from datetime import timedelta
+import hashlib
 import traceback
 import logging
 
+from trackerx_live.trackerx_live.utils.shift_period_util import get_cell_shift, get_working_windows, overlaps_working_time
+
 logger = frappe.logger("target_scheduler")
 logger.setLevel(logging.INFO) 
 
@@ -13,250 +16,446 @@ logger.setLevel(logging.INFO)
 # scheduler entrypoint (cron in hooks.py should call this)
 @frappe.whitelist()
 def run_every_min():
-    minute_from = now_datetime().replace(second=0, microsecond=0)
-    minute_to = minute_from + timedelta(minutes=1)
-    hour_from = minute_from.replace(minute=0)
-    hour_to = hour_from + timedelta(hours=1)
+    # minutes before `until` are complete, the job catches every cell up to it
+    until = now_datetime().replace(second=0, microsecond=0)
 
     try:
-        # correct filters usage: exclude a name using list-of-lists
-        cells = frappe.get_all("Physical Cell", fields=["name"],
-                               filters=[["name", "!=", "QR/Barcode Cut Bundle Activation"]])
-        for c in cells:
-            # enqueue a job per cell (safer than raw threads)
-            frappe.enqueue(
-                "trackerx_live.trackerx_live.scheduler.target_scheduler.calculate_cell_target_enqueue",
-                queue="long",
-                timeout=600,
-                is_async=True,
-                cell_name=c.get("name"),
-                minute_from=minute_from,
-                minute_to=minute_to,
-                hour_from=hour_from,
-                hour_to=hour_to,
-            )
-        frappe.logger("target_scheduler").info(f"Enqueued {len(cells)} tasks for window {minute_from} - {minute_to}")
+        # one job computes every cell, see calculate_all_cells_target
+        frappe.enqueue(
+            "trackerx_live.trackerx_live.scheduler.target_scheduler.calculate_all_cells_target_enqueue",
+            queue="long",
+            timeout=600,
+            is_async=True,
+            job_id=f"trackerx_cell_targets|{until}",
+            deduplicate=True,
+            until=until,
+        )
+        frappe.logger("target_scheduler").info(f"Enqueued cell targets until {until}")
     except Exception:
         frappe.logger("target_scheduler").error(f"Scheduler failed: {traceback.format_exc()}")
 
 
-def calculate_cell_target_enqueue(cell_name, minute_from, minute_to, hour_from, hour_to):
+# Manual recomputes go through backfill_cell_targets, which holds the same lock and
+# rebuilds whole hours instead of adding to them
+def calculate_all_cells_target_enqueue(until):
     """Wrapper called by frappe.enqueue (arguments will be passed as strings sometimes)"""
-    # if any args are string timestamps, convert
+    calculate_all_cells_target(get_datetime(until))
+
+
+EXCLUDED_TARGET_CELLS = ("QR/Barcode Cut Bundle Activation",)
+
+# older gaps are left to backfill_cell_targets
+MAX_CATCH_UP_MINUTES = 24 * 60
+
+TARGET_ENGINE_LOCK = "trackerx_target_engine_lock"
+TARGET_ENGINE_LOCK_TIMEOUT = 15 * 60  # seconds
+
+HOURLY_TARGET_INSERT_FIELDS = (
+    "name", "creation", "modified", "owner", "modified_by", "docstatus",
+    "physical_cell", "operation", "workstation", "company", "from_time", "to_time",
+    "target", "defective_unit_limit", "defects_limit", "output",
+    "cell_sam", "cell_sam_per_minutes", "no_of_operators", "working_time_in_mins",
+    "produced_minutes", "available_minutes", "target_minutes",
+)
+
+
+def calculate_all_cells_target(until):
+    """
+    Catch every cell up from its Cell Target Watermark to `until` (exclusive).
+
+    Normally that is the last minute, after an outage all missed minutes (up to
+    MAX_CATCH_UP_MINUTES) are processed in the same pass by compute_cell_targets.
+    """
+    if not acquire_target_engine_lock():
+        frappe.logger("target_scheduler").info(f"Target engine busy, minutes until {until} are caught up by the next run")
+        return
+
     try:
-        if isinstance(minute_from, str):
-            minute_from = get_datetime(minute_from)
-        if isinstance(minute_to, str):
-            minute_to = get_datetime(minute_to)
-        if isinstance(hour_from, str):
-            hour_from = get_datetime(hour_from)
-        if isinstance(hour_to, str):
-            hour_to = get_datetime(hour_to)
+        watermarks = get_target_watermarks()
+        earliest = until - timedelta(minutes=MAX_CATCH_UP_MINUTES)
+
+        ranges = {}
+        for cell in get_target_cells():
+            start = get_datetime(watermarks[cell.name]) if watermarks.get(cell.name) else until - timedelta(minutes=1)
+            start = max(start, earliest)
+            if start < until:
+                ranges[cell.name] = (start, until)
+
+        row_count = compute_cell_targets(ranges)
+        set_target_watermarks({cell_name: until for cell_name in ranges})
+        frappe.db.commit()
+        frappe.logger("target_scheduler").info(f"Upserted {row_count} hourly target rows for {len(ranges)} cells until {until}")
+
     except Exception:
-        pass
+        frappe.db.rollback()
+        frappe.logger("target_scheduler").error(f"Error processing cell targets: {traceback.format_exc()}")
+
+    finally:
+        release_target_engine_lock()
+
+
+def backfill_cell_targets(from_date, to_date, physical_cell=None):
+    """
+    Recompute Hourly Target for whole hours between from_date and to_date.
 
-    calculate_cell_target(cell_name, minute_from, minute_to, hour_from, hour_to)
+    Rows in the range are deleted and rebuilt from Item Scan Log in one pass.
+    The hour in progress is left to the scheduler. Watermarks behind the range
+    end are moved to it.
 
+    bench --site <site> backfill-cell-targets --from-date "2026-10-16 06:00" --to-date "2026-10-16 14:00"
+    """
+    range_from = get_datetime(from_date).replace(minute=0, second=0, microsecond=0)
+    range_to = get_datetime(to_date)
+    if range_to != range_to.replace(minute=0, second=0, microsecond=0):
+        range_to = range_to.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    range_to = min(range_to, now_datetime().replace(minute=0, second=0, microsecond=0))
+
+    if range_from >= range_to:
+        frappe.throw(f"Nothing to backfill between {range_from} and {range_to}, only completed hours can be backfilled")
+
+    if not acquire_target_engine_lock():
+        frappe.throw("The target scheduler is running, please retry in a minute")
 
-def calculate_cell_target(cell_name: str, minute_from, minute_to, hours_from, hours_to):
     try:
-        cell = frappe.get_cached_doc("Physical Cell", cell_name)
-        now_time = minute_from.time()
-
-        minutes = (minute_to - hours_from).total_seconds()/60
-
-        # check breaks
-        for br in (cell.get("cell_breaks") or []):
-            b_start = _parse_time(br.get("break_start") or br.get("from") or br.get("start"))
-            b_end = _parse_time(br.get("break_end") or br.get("to") or br.get("end"))
-            if b_start and b_end and _time_in_range(now_time, b_start, b_end):
-                frappe.logger("target_scheduler").info(f"Cell {cell_name} is in break ({b_start}-{b_end}). Skipping.")
-                return
-
-        # check cell working window
-        cell_start = _parse_time(cell.get("start_time"))
-        cell_end = _parse_time(cell.get("end_time"))
-        if cell_start and cell_end and not _time_in_range(now_time, cell_start, cell_end):
-            frappe.logger("target_scheduler").info(f"Cell {cell_name} outside working window. Skipping.")
-            return
-        
-        # get attendance
-        attendance_query = """
-            SELECT COALESCE(value, 0) AS total_count
-            FROM `tabOperator Attendance`
-            WHERE physical_cell = %s
-            AND hour = %s
-            """
-        result = frappe.db.sql(attendance_query, (cell.name, hours_from), as_dict=True)
-        attendance_count = result[0].total_count if result else 0
-
-        # running style resolution (ensure get_running_style returns expected doc)
-        from trackerx_live.trackerx_live.api.live_dashboard import get_running_style
-        running_style = get_running_style(workstation=None, operation=None, physical_cell=cell.name)
-        if not running_style or not getattr(running_style, "item", None):
-            # nothing to do for this cell if no style
-            frappe.logger("target_scheduler").info(f"No Running style for the cell {cell_name} ignoreing")
-            return
-        style = running_style.item
-
-        pt_filters = {"physical_cell": cell_name, "is_active": 1, "style": style}
-        pt_list = frappe.get_all("Production Target Configuration", filters=pt_filters,
-                                 fields=["name", "hour_target", "start", "end", "style", "operator", "sam"],
-                                 order_by="modified desc")
-        if not pt_list:
-            frappe.logger("target_scheduler").info(f"No active Production Target Configuration for {cell_name} / style {style}")
-            return
-
-        hour_target = flt(pt_list[0].get("hour_target") or 0)
-        cell_sam = flt(pt_list[0].get("sam") or 0)
-        if hour_target <= 0:
-            frappe.logger("target_scheduler").info(f"hour_target <= 0 for {cell_name} / style {style}")
-            return
-
-        per_minute_per_operation = hour_target / 60.0
-
-        rows = frappe.get_all("Physical Cell Operation", filters={"parent": cell_name}, fields=["operation", "workstation"]) or []
-        op_ws = {}
-        for r in rows:
-            op = r.get("operation")
-            ws = r.get("workstation")
-            if not op:
-                continue
-            op_ws.setdefault(op, set())
-            if ws:
-                op_ws[op].add(ws)
+        cell_names = [cell.name for cell in get_target_cells() if not physical_cell or cell.name == physical_cell]
+        if not cell_names:
+            frappe.throw(f"Physical Cell {physical_cell} not found")
+
+        frappe.db.sql("""
+            DELETE FROM `tabHourly Target`
+            WHERE physical_cell IN %(cells)s
+              AND from_time >= %(range_from)s
+              AND from_time < %(range_to)s
+        """, {"cells": tuple(cell_names), "range_from": range_from, "range_to": range_to})
+
+        row_count = compute_cell_targets({cell_name: (range_from, range_to) for cell_name in cell_names})
 
+        watermarks = get_target_watermarks()
+        set_target_watermarks({
+            cell_name: range_to for cell_name in cell_names
+            if not watermarks.get(cell_name) or get_datetime(watermarks[cell_name]) < range_to
+        })
+        frappe.db.commit()
+
+    except Exception:
+        frappe.db.rollback()
+        raise
+
+    finally:
+        release_target_engine_lock()
+
+    return row_count
+
+
+def compute_cell_targets(ranges):
+    """
+    Add the minutes of each cell's [from, to) range to Hourly Target in one pass.
+
+    ranges: {physical_cell: (from, to)} on minute boundaries
+
+    Config is loaded with one query per source, the output of all cells and minutes
+    comes from one grouped query and each Hourly Target row gets one upsert with
+    the sum of its minutes. Running styles are resolved per hour, target
+    configuration and operation limits are the current ones.
+    Returns the number of upserted rows.
+    """
+    if not ranges:
+        return 0
+
+    cells = {cell.name: cell for cell in get_target_cells() if cell.name in ranges}
+    cell_names = tuple(cells)
+    if not cell_names:
+        return 0
+
+    # working minutes of each cell grouped by hour: {cell: {hour_from: [minute, ...]}},
+    # working time is the same as the dashboards' shift periods, see shift_period_util
+    working_minutes = {}
+    for cell_name, (range_from, range_to) in ranges.items():
+        if cell_name not in cells:
+            continue
+        # cells without working hours work all day, as on the output line graph
+        has_working_hours = get_cell_shift(cell_name, range_from) is not None
+        windows = get_working_windows(cell_name, range_from, range_to)
+        minute = range_from
+        while minute < range_to:
+            if not has_working_hours or overlaps_working_time(windows, minute, minute + timedelta(minutes=1)):
+                hour_from = minute.replace(minute=0, second=0, microsecond=0)
+                working_minutes.setdefault(cell_name, {}).setdefault(hour_from, []).append(minute)
+            minute += timedelta(minutes=1)
+
+    if not working_minutes:
+        return 0
+
+    hours = sorted({hour_from for cell_hours in working_minutes.values() for hour_from in cell_hours})
+    overall_from = min(range_from for range_from, range_to in ranges.values())
+    overall_to = max(range_to for range_from, range_to in ranges.values())
+
+    # attendance of each hour, first row per cell and hour
+    attendance = {}
+    for row in frappe.db.sql("""
+        SELECT physical_cell, hour, COALESCE(value, 0) AS total_count
+        FROM `tabOperator Attendance`
+        WHERE physical_cell IN %(cells)s
+        AND hour IN %(hours)s
+        """, {"cells": cell_names, "hours": tuple(hours)}, as_dict=True):
+        attendance.setdefault((row.physical_cell, get_datetime(row.hour)), row.total_count)
+
+    from trackerx_live.trackerx_live.api.live_dashboard import get_running_styles
+    running_styles = {}
+    for hour_from in hours:
+        hour_cells = [cell_name for cell_name, cell_hours in working_minutes.items() if hour_from in cell_hours]
+        as_of = min(hour_from + timedelta(hours=1), overall_to)
+        for cell_name, running_style in get_running_styles(hour_cells, as_of=as_of).items():
+            running_styles[(cell_name, hour_from)] = running_style
+
+    # latest active Production Target Configuration per (cell, style)
+    target_configs = {}
+    for pt in frappe.get_all("Production Target Configuration",
+                             filters={"physical_cell": ["in", cell_names], "is_active": 1},
+                             fields=["name", "physical_cell", "hour_target", "style", "sam"],
+                             order_by="modified desc"):
+        target_configs.setdefault((pt.physical_cell, pt.style), pt)
+
+    op_ws_by_cell = {}
+    for r in frappe.get_all("Physical Cell Operation",
+                            filters={"parent": ["in", cell_names], "parenttype": "Physical Cell"},
+                            fields=["parent", "operation", "workstation"]):
+        if not r.operation:
+            continue
+        workstations = op_ws_by_cell.setdefault(r.parent, {}).setdefault(r.operation, set())
+        if r.workstation:
+            workstations.add(r.workstation)
+
+    operations = list({op for ops in op_ws_by_cell.values() for op in ops})
+    operation_limits = {
+        op.name: op
+        for op in frappe.get_all("Operation",
+                                 filters={"name": ["in", operations]},
+                                 fields=["name", "custom_allowed_defective_unit_limit", "custom_allowed_defects_limit"])
+    } if operations else {}
+
+    output = get_minute_output_by_cell(cell_names, overall_from, overall_to)
+    company = frappe.defaults.get_user_default("Company") or None
+
+    rows = []
+    for cell_name, cell_hours in working_minutes.items():
+        op_ws = op_ws_by_cell.get(cell_name)
         if not op_ws:
             frappe.logger("target_scheduler").info(f"no operations configured for {cell_name}")
-            return
-
-        for operation, workstations in op_ws.items():
-            ws_list = list(workstations) if workstations else [None]
-            num_ws = len(ws_list)
-            op_target_minute = per_minute_per_operation
-            per_ws_target = op_target_minute / num_ws if num_ws else op_target_minute
-
-            op_doc = frappe.get_cached_doc("Operation", operation) if operation else None
-            allowed_unit_pct = flt(op_doc.get("custom_allowed_defective_unit_limit") or 0)
-            allowed_defects_pct = flt(op_doc.get("custom_allowed_defects_limit") or 0)
-
-            for ws in ws_list:
-                # build SQL conditionally
-                if ws:
-                    workstation_clause = "AND sl.workstation = %s"
-                    params = (cell_name, operation, ws, minute_from, minute_to)
-                else:
-                    workstation_clause = "AND sl.workstation IS NOT NULL"
-                    params = (cell_name, operation, minute_from, minute_to)
-
-                # sum quantity with COALESCE
-                sql = f"""
-                    SELECT COALESCE(SUM(pi.quantity), 0) as output_count
-                    FROM `tabItem Scan Log` sl
-                    LEFT JOIN `tabProduction Item` pi ON pi.name = sl.production_item
-                    WHERE sl.physical_cell = %s
-                      AND sl.operation = %s
-                      {workstation_clause}
-                      AND sl.scan_time >= %s
-                      AND sl.scan_time < %s
-                      AND sl.log_status = 'Completed'
-                      AND sl.status IN ('Pass','SP Pass','Counted')
-                """
-
-                try:
-                    res = frappe.db.sql(sql, params)
-                    produced_qty = flt(res[0][0]) if res and res[0] and res[0][0] is not None else 0.0
-                except Exception:
-                    # fallback to safe count
-                    try:
-                        cond = {"physical_cell": cell_name, "operation": operation,
-                                "scan_time": [">=", minute_from, "<", minute_to], "log_status": "Completed"}
-                        if ws:
-                            cond["workstation"] = ws
-                        produced_qty = flt(frappe.db.count("Item Scan Log", cond))
-                    except Exception:
-                        produced_qty = 0.0
-
-                defective_unit_limit = produced_qty * (allowed_unit_pct / 100.0)
-                defects_limit = produced_qty * (allowed_defects_pct / 100.0)
-
-                # atomic upsert pattern: try to get existing row, else create; protect against duplicates by retrying
-                try:
-                    # try to find existing hourly row
-                    existing = frappe.db.get_value("Hourly Target", {
-                        "physical_cell": cell_name,
-                        "operation": operation,
-                        "workstation": ws,
-                        "from_time": hours_from,
-                        "to_time": hours_to
-                    }, ["name", "target", "defective_unit_limit", "defects_limit", "cell_sam_per_minutes"])
-
-                    if existing:
-                        name, prev_target, prev_def_unit, prev_defects, prev_cell_sam_per_minutes = existing[0], flt(existing[1] or 0), flt(existing[2] or 0), flt(existing[3] or 0), flt(existing[4] or 0)
-                        new_cell_sam_per_minutes = ((prev_cell_sam_per_minutes * (minutes - 1)) + cell_sam )/minutes
-
-                        produced_minutes = produced_qty * new_cell_sam_per_minutes
-                        available_minutes = attendance_count * minutes
-                        target_minutes = per_ws_target * new_cell_sam_per_minutes
-                        # update atomically using ORM
-                        frappe.db.sql("""UPDATE `tabHourly Target`
-                                         SET `target` = %s, `defective_unit_limit` = %s, `defects_limit` = %s,
-                                            `cell_sam_per_minutes` = %s, `working_time_in_mins` = %s, `produced_minutes` = %s, `available_minutes` = %s, `target_minutes` = %s
-                                         WHERE name = %s""",
-                                      (prev_target + per_ws_target, prev_def_unit + defective_unit_limit, prev_defects + defects_limit, new_cell_sam_per_minutes, minutes, produced_minutes, available_minutes, target_minutes, name))
+            continue
+
+        for hour_from, minutes_list in cell_hours.items():
+            running_style = running_styles.get((cell_name, hour_from))
+            if not running_style or not running_style.item:
+                frappe.logger("target_scheduler").info(f"No Running style for the cell {cell_name} ignoreing")
+                continue
+            style = running_style.item
+
+            pt = target_configs.get((cell_name, style))
+            if not pt:
+                frappe.logger("target_scheduler").info(f"No active Production Target Configuration for {cell_name} / style {style}")
+                continue
+
+            hour_target = flt(pt.hour_target or 0)
+            cell_sam = flt(pt.sam or 0)
+            if hour_target <= 0:
+                frappe.logger("target_scheduler").info(f"hour_target <= 0 for {cell_name} / style {style}")
+                continue
+
+            hour_to = hour_from + timedelta(hours=1)
+            # minutes of the hour elapsed at the last processed minute
+            elapsed_minutes = (minutes_list[-1] - hour_from).total_seconds()/60 + 1
+            per_minute_per_operation = hour_target / 60.0
+            attendance_count = flt(attendance.get((cell_name, hour_from)) or 0)
+
+            for operation, workstations in op_ws.items():
+                ws_list = list(workstations) if workstations else [None]
+                per_ws_target = per_minute_per_operation / len(ws_list)
+
+                op_limits = operation_limits.get(operation) or {}
+                allowed_unit_pct = flt(op_limits.get("custom_allowed_defective_unit_limit") or 0)
+                allowed_defects_pct = flt(op_limits.get("custom_allowed_defects_limit") or 0)
+
+                for ws in ws_list:
+                    if ws:
+                        minute_output = output.get((cell_name, operation, ws)) or {}
                     else:
-                        new_record = frappe.new_doc("Hourly Target")
-                        new_record.physical_cell = cell_name
-                        new_record.operation = operation
-                        new_record.workstation = ws
-                        new_record.company = frappe.defaults.get_user_default("Company") or None
-                        new_record.from_time = hours_from
-                        new_record.to_time = hours_to
-                        new_record.target = per_ws_target
-                        new_record.defective_unit_limit = defective_unit_limit
-                        new_record.defects_limit = defects_limit
-                        new_record.output = produced_qty
-                        new_record.cell_sam = cell_sam
-                        new_record.cell_sam_per_minutes = cell_sam
-                        new_record.no_of_operators = attendance_count
-                        new_record.working_time_in_mins = minutes
-                        new_record.produced_minutes = new_record.output * new_record.cell_sam_per_minutes
-                        new_record.available_minutes = new_record.no_of_operators * new_record.working_time_in_mins
-                        new_record.target_minutes = new_record.target * new_record.cell_sam_per_minutes
-                        new_record.insert(ignore_permissions=True)
-                        # insert new row
-                        # frappe.db.sql("""INSERT INTO `tabHourly Target`
-                        #                  ( `physical_cell`, `operation`, `workstation`, `company`, `from`, `to`, `target`, `defective_unit_limit`, `defects_limit`)
-                        #                  VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)""",
-                        #               ( cell_name, operation, ws, frappe.defaults.get_user_default("Company") or None,
-                        #                hours_from, hours_to, per_ws_target, defective_unit_limit, defects_limit))
-                    # commit after each cell's work to persist changes
-                    frappe.db.commit()
-                except Exception:
-                    frappe.logger("target_scheduler").error(f"Failed upsert for {cell_name} {operation} {ws}: {traceback.format_exc()}")
+                        # operation without workstations counts output of every workstation
+                        minute_output = {}
+                        for (c, op, w), qty_by_minute in output.items():
+                            if c == cell_name and op == operation and w:
+                                for minute, qty in qty_by_minute.items():
+                                    minute_output[minute] = minute_output.get(minute, 0) + qty
 
-    except Exception:
-        frappe.logger("target_scheduler").error(f"Error processing cell {cell_name}: {traceback.format_exc()}")
+                    produced_qty = flt(sum(minute_output.get(minute, 0) for minute in minutes_list))
 
+                    rows.append(build_hourly_target_row(
+                        cell_name, operation, ws, hour_from, hour_to,
+                        company=company,
+                        minutes=elapsed_minutes,
+                        per_ws_target=per_ws_target * len(minutes_list),
+                        produced_qty=produced_qty,
+                        allowed_unit_pct=allowed_unit_pct,
+                        allowed_defects_pct=allowed_defects_pct,
+                        cell_sam=cell_sam,
+                        attendance_count=attendance_count,
+                    ))
 
-# small helpers (copy from your file)
-from datetime import datetime as _dt, time as _dt_time
-def _parse_time(value):
-    if not value:
-        return None
-    if isinstance(value, _dt_time):
-        return value
-    try:
-        return _dt.strptime(value, "%H:%M:%S").time()
-    except Exception:
-        try:
-            return _dt.strptime(value, "%H:%M").time()
-        except Exception:
-            return None
-
-def _time_in_range(now_time: _dt_time, start: _dt_time, end: _dt_time) -> bool:
-    if start is None or end is None:
-        return False
-    if start <= end:
-        return start <= now_time < end
-    return now_time >= start or now_time < end
+    upsert_hourly_targets(rows)
+    return len(rows)
+
+
+def get_target_cells():
+    """Physical Cells handled by the target scheduler"""
+    return frappe.get_all("Physical Cell", fields=["name"],
+                          filters=[["name", "not in", EXCLUDED_TARGET_CELLS]])
+
+
+def get_minute_output_by_cell(cell_names, range_from, range_to):
+    """Produced quantity as {(physical_cell, operation, workstation): {minute: qty}} in [range_from, range_to)"""
+    result = frappe.db.sql("""
+        SELECT sl.physical_cell, sl.operation, sl.workstation,
+            DATE_FORMAT(sl.scan_time, '%%Y-%%m-%%d %%H:%%i:00') AS minute,
+            COALESCE(SUM(pi.quantity), 0) AS output_count
+        FROM `tabItem Scan Log` sl
+        LEFT JOIN `tabProduction Item` pi ON pi.name = sl.production_item
+        WHERE sl.physical_cell IN %(cells)s
+          AND sl.workstation IS NOT NULL
+          AND sl.scan_time >= %(range_from)s
+          AND sl.scan_time < %(range_to)s
+          AND sl.log_status = 'Completed'
+          AND sl.status IN ('Pass','SP Pass','Counted')
+        GROUP BY sl.physical_cell, sl.operation, sl.workstation, minute
+    """, {"cells": tuple(cell_names), "range_from": range_from, "range_to": range_to}, as_dict=True)
+
+    output = {}
+    for row in result:
+        output.setdefault((row.physical_cell, row.operation, row.workstation), {})[get_datetime(row.minute)] = flt(row.output_count)
+    return output
+
+
+def get_target_watermarks():
+    return dict(frappe.get_all("Cell Target Watermark", fields=["physical_cell", "processed_until"], as_list=True))
+
+
+def set_target_watermarks(processed_until_by_cell):
+    """Move the watermarks forward, never back"""
+    if not processed_until_by_cell:
+        return
+
+    now = now_datetime()
+    user = frappe.session.user
+    placeholders = []
+    values = []
+    for cell_name, processed_until in processed_until_by_cell.items():
+        placeholders.append("(%s, %s, %s, %s, %s, 0, %s, %s)")
+        values.extend([cell_name, now, now, user, user, cell_name, processed_until])
+
+    frappe.db.sql(f"""
+        INSERT INTO `tabCell Target Watermark`
+            (`name`, `creation`, `modified`, `owner`, `modified_by`, `docstatus`, `physical_cell`, `processed_until`)
+        VALUES {", ".join(placeholders)}
+        ON DUPLICATE KEY UPDATE
+            `processed_until` = GREATEST(COALESCE(`processed_until`, VALUES(`processed_until`)), VALUES(`processed_until`)),
+            `modified` = VALUES(`modified`)
+    """, values)
+
+
+def acquire_target_engine_lock():
+    cache = frappe.cache()
+    return bool(cache.set(cache.make_key(TARGET_ENGINE_LOCK), 1, nx=True, ex=TARGET_ENGINE_LOCK_TIMEOUT))
+
+
+def release_target_engine_lock():
+    cache = frappe.cache()
+    cache.delete(cache.make_key(TARGET_ENGINE_LOCK))
+
+
+def get_hourly_target_name(physical_cell, operation, workstation, hours_from):
+    """Deterministic Hourly Target name, one row per (cell, operation, workstation, hour)"""
+    key = "|".join([physical_cell or "", operation or "", workstation or "", str(get_datetime(hours_from))])
+    return hashlib.md5(key.encode()).hexdigest()[:20]
+
+
+def build_hourly_target_row(physical_cell, operation, workstation, hours_from, hours_to, company, minutes,
+                            per_ws_target, produced_qty, allowed_unit_pct, allowed_defects_pct, cell_sam, attendance_count):
+    """
+    The contribution of one or more minutes to an Hourly Target row, as inserted for the first minutes of the row.
+    per_ws_target is the target of all those minutes and minutes the hour's elapsed working time after them.
+    Operations without workstations are stored with an empty workstation so the unique key applies.
+    """
+    workstation = workstation or ""
+    return frappe._dict(
+        name=get_hourly_target_name(physical_cell, operation, workstation, hours_from),
+        physical_cell=physical_cell,
+        operation=operation,
+        workstation=workstation,
+        company=company,
+        from_time=hours_from,
+        to_time=hours_to,
+        target=per_ws_target,
+        defective_unit_limit=produced_qty * (allowed_unit_pct / 100.0),
+        defects_limit=produced_qty * (allowed_defects_pct / 100.0),
+        output=produced_qty,
+        cell_sam=cell_sam,
+        cell_sam_per_minutes=cell_sam,
+        no_of_operators=attendance_count,
+        working_time_in_mins=minutes,
+        produced_minutes=produced_qty * cell_sam,
+        available_minutes=attendance_count * minutes,
+        target_minutes=per_ws_target * cell_sam,
+    )
+
+
+def upsert_hourly_targets(rows, chunk_size=500):
+    """
+    Insert the Hourly Target rows, or add the minutes to the hour's existing rows.
+
+    Rows conflict on the unique (physical_cell, operation, workstation, from_time, to_time)
+    key, so parallel jobs add their minutes to one row instead of creating duplicates.
+    The update assignments run left to right and later ones read the values already
+    assigned, so cell_sam_per_minutes is updated first and the minute conversions use
+    the new average. The average is weighted by the working minutes the row gains, so
+    a row built from several minutes at once gets the same value as minute by minute.
+    """
+    if not rows:
+        return
+
+    # same lock order in every job
+    rows = sorted(rows, key=lambda row: (row.physical_cell, row.operation, row.workstation))
+
+    for start in range(0, len(rows), chunk_size):
+        _upsert_hourly_target_chunk(rows[start:start + chunk_size])
+
+
+def _upsert_hourly_target_chunk(rows):
+    now = now_datetime()
+    user = frappe.session.user
+    placeholders = []
+    values = []
+
+    for row in rows:
+        row.update({"creation": now, "modified": now, "owner": user, "modified_by": user, "docstatus": 0})
+        placeholders.append("(" + ", ".join(["%s"] * len(HOURLY_TARGET_INSERT_FIELDS)) + ")")
+        values.extend(row.get(field) for field in HOURLY_TARGET_INSERT_FIELDS)
+
+    columns = ", ".join(f"`{field}`" for field in HOURLY_TARGET_INSERT_FIELDS)
+    frappe.db.sql(f"""
+        INSERT INTO `tabHourly Target` ({columns})
+        VALUES {", ".join(placeholders)}
+        ON DUPLICATE KEY UPDATE
+            `cell_sam_per_minutes` = IF(VALUES(`working_time_in_mins`) > COALESCE(`working_time_in_mins`, 0),
+                ((COALESCE(`cell_sam_per_minutes`, 0) * COALESCE(`working_time_in_mins`, 0))
+                    + VALUES(`cell_sam`) * (VALUES(`working_time_in_mins`) - COALESCE(`working_time_in_mins`, 0))) / VALUES(`working_time_in_mins`),
+                `cell_sam_per_minutes`),
+            `target` = COALESCE(`target`, 0) + VALUES(`target`),
+            `defective_unit_limit` = COALESCE(`defective_unit_limit`, 0) + VALUES(`defective_unit_limit`),
+            `defects_limit` = COALESCE(`defects_limit`, 0) + VALUES(`defects_limit`),
+            `output` = COALESCE(`output`, 0) + VALUES(`output`),
+            `produced_minutes` = COALESCE(`produced_minutes`, 0) + VALUES(`output`) * `cell_sam_per_minutes`,
+            `target_minutes` = COALESCE(`target_minutes`, 0) + VALUES(`target`) * `cell_sam_per_minutes`,
+            `no_of_operators` = VALUES(`no_of_operators`),
+            `working_time_in_mins` = GREATEST(COALESCE(`working_time_in_mins`, 0), VALUES(`working_time_in_mins`)),
+            `available_minutes` = GREATEST(COALESCE(`available_minutes`, 0), VALUES(`available_minutes`)),
+            `modified` = VALUES(`modified`)
+    """, values)
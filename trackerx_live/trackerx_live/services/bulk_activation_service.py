@@ -0,0 +1,348 @@
+import frappe
+from frappe.utils import now_datetime
+
+from trackerx_live.trackerx_live.services.operation_status_service import record_operation_statuses
+from trackerx_live.trackerx_live.services.production_rollup_service import build_rollup_row, record_scan_logs
+from trackerx_live.trackerx_live.services.live_counter_service import publish_counter_deltas
+from trackerx_live.trackerx_live.services.master_data_cache import clear_master_data
+
+
+# Cut orders with more bundles than this are activated in a background job
+BULK_ACTIVATION_SYNC_LIMIT = 200
+BULK_ACTIVATION_CHUNK_SIZE = 500
+BULK_ACTIVATION_STATUS_TTL = 24 * 60 * 60  # seconds
+BULK_ACTIVATION_PROGRESS_EVENT = "trackerx_bulk_activation_progress"
+
+# Barcode/QR bundles are activated at this virtual cell, operation and workstation
+CUT_BUNDLE_ACTIVATION = "QR/Barcode Cut Bundle Activation"
+
+STANDARD_FIELDS = ("name", "creation", "modified", "owner", "modified_by", "docstatus")
+
+TRACKING_TAG_FIELDS = STANDARD_FIELDS + (
+    "tag_number",
+    "tag_type",
+    "status",
+    "activation_time",
+    "last_used_on",
+    "activation_source",
+)
+
+PRODUCTION_ITEM_FIELDS = STANDARD_FIELDS + (
+    "production_item_number",
+    "tracking_order",
+    "bundle_configuration",
+    "tracking_tag",
+    "component",
+    "device_id",
+    "size",
+    "quantity",
+    "status",
+    "current_operation",
+    "next_operation",
+    "current_workstation",
+    "next_workstation",
+    "source",
+    "tracking_status",
+    "physical_cell",
+    "type",
+    "last_scan_log",
+)
+
+TAG_MAP_FIELDS = STANDARD_FIELDS + (
+    "production_item",
+    "tracking_tag",
+    "linked_on",
+    "is_active",
+    "activated_source",
+)
+
+SCAN_LOG_FIELDS = STANDARD_FIELDS + (
+    "production_item",
+    "workstation",
+    "operation",
+    "physical_cell",
+    "scanned_by",
+    "scan_time",
+    "logged_time",
+    "status",
+    "log_status",
+    "log_type",
+    "production_item_type",
+)
+
+
+def get_status_key(tracking_order):
+    return f"trackerx_bulk_activation|{tracking_order}"
+
+
+def set_activation_progress(tracking_order, status, done=0, total=0, message=None):
+    """Keep the activation progress for polling and push it to the Tracking Order room"""
+    progress = {"status": status, "done": done, "total": total, "message": message}
+    frappe.cache().set_value(get_status_key(tracking_order), progress, expires_in_sec=BULK_ACTIVATION_STATUS_TTL)
+    frappe.publish_realtime(
+        BULK_ACTIVATION_PROGRESS_EVENT,
+        dict(progress, tracking_order=tracking_order),
+        doctype="Tracking Order",
+        docname=tracking_order
+    )
+
+
+def get_activation_progress(tracking_order):
+    """Returns {"status": Queued | In Progress | Completed | Failed, "done", "total", "message"}"""
+    progress = frappe.cache().get_value(get_status_key(tracking_order))
+    if progress:
+        return progress
+
+    # progress expires, the Tracking Order keeps the outcome
+    activation_status = frappe.db.get_value("Tracking Order", tracking_order, "activation_status")
+    return {"status": activation_status, "done": None, "total": None, "message": None}
+
+
+def set_activation_status(tracking_order, status):
+    """db.set_value skips the doc_events, so the cached Tracking Order projection is dropped here"""
+    frappe.db.set_value("Tracking Order", tracking_order, "activation_status", status)
+    clear_master_data("Tracking Order", tracking_order)
+    frappe.db.after_commit.add(lambda: clear_master_data("Tracking Order", tracking_order))
+
+
+def activate_cut_bundles(bundle_creation, tracking_order):
+    """
+    Create the production items of a submitted Bundle Creation's bundles.
+
+    Small cut orders are activated in the submit request. Larger ones are queued
+    after commit, the Tracking Order stays "In Progress" until the job finishes.
+    """
+    if len(bundle_creation.table_bundle_details) <= BULK_ACTIVATION_SYNC_LIMIT:
+        create_production_items(bundle_creation, tracking_order)
+        set_activation_status(tracking_order.name, "Completed")
+        return
+
+    set_activation_status(tracking_order.name, "In Progress")
+    set_activation_progress(tracking_order.name, "Queued", total=len(bundle_creation.table_bundle_details))
+    frappe.enqueue(
+        "trackerx_live.trackerx_live.services.bulk_activation_service.process_bulk_activation",
+        queue="long",
+        timeout=3600,
+        job_id=get_status_key(tracking_order.name),
+        deduplicate=True,
+        enqueue_after_commit=True,
+        bundle_creation=bundle_creation.name,
+        tracking_order=tracking_order.name,
+        user=frappe.session.user
+    )
+
+
+def process_bulk_activation(bundle_creation, tracking_order, user=None):
+    """Background job for activate_cut_bundles, safe to run again after a failure"""
+    # the Bundle Creation shows the activation as the last step of its Tracking Order creation
+    from trackerx_live.hook.bundle_configuration import set_tracking_order_creation_status
+
+    if user:
+        frappe.set_user(user)
+
+    try:
+        set_tracking_order_creation_status(bundle_creation, "In Progress", tracking_order, "Activating cut bundles")
+        frappe.db.commit()
+
+        create_production_items(
+            frappe.get_doc("Bundle Creation", bundle_creation),
+            frappe.get_doc("Tracking Order", tracking_order),
+            commit_chunks=True
+        )
+        set_activation_status(tracking_order, "Completed")
+        set_tracking_order_creation_status(bundle_creation, "Completed", tracking_order)
+        frappe.db.commit()
+
+        progress = frappe.cache().get_value(get_status_key(tracking_order)) or {}
+        set_activation_progress(tracking_order, "Completed", progress.get("total"), progress.get("total"))
+
+    except Exception as e:
+        frappe.db.rollback()
+        frappe.log_error(frappe.get_traceback(), "process_bulk_activation() error")
+        set_activation_status(tracking_order, "Failed")
+        set_tracking_order_creation_status(bundle_creation, "Failed", tracking_order, str(e))
+        frappe.db.commit()
+
+        progress = frappe.cache().get_value(get_status_key(tracking_order)) or {}
+        set_activation_progress(tracking_order, "Failed", progress.get("done") or 0, progress.get("total") or 0, str(e))
+
+
+def retry_bulk_activation(tracking_order):
+    """Activate the bundles a failed activation left out, see create_production_items"""
+    tracking_order = frappe.get_doc("Tracking Order", tracking_order)
+    if tracking_order.activation_status != "Failed":
+        frappe.throw(f"Bundle activation of {tracking_order.name} has not failed", frappe.ValidationError)
+
+    bundle_creation = frappe.get_doc("Bundle Creation", tracking_order.reference_order_number)
+    activate_cut_bundles(bundle_creation, tracking_order)
+    return get_activation_progress(tracking_order.name)
+
+
+def get_component_bundle_configurations(tracking_order):
+    """
+    Component bundle configurations keyed by size, component, shade and bundle quantity,
+    inserting the missing ones. A resumed activation reuses the ones already created.
+    """
+    component_bc_dict = {}
+
+    for row in frappe.get_all(
+        "Tracking Order Bundle Configuration",
+        filters={
+            "parent": tracking_order.name,
+            "parenttype": "Tracking Order",
+            "parentfield": "component_bundle_configuration",
+            "source": "Activation"
+        },
+        fields=["name", "size", "component", "shade", "bundle_quantity"],
+        order_by="creation asc"
+    ):
+        key = f'{row.size}---{row.component}---{row.shade}---{row.bundle_quantity}'
+        component_bc_dict.setdefault(key, row)
+
+    for bundle_configuration in tracking_order.bundle_configurations:
+        for component in tracking_order.tracking_components:
+            key = f'{bundle_configuration.size}---{component.component_name}---{bundle_configuration.shade}---{bundle_configuration.bundle_quantity}'
+
+            if key not in component_bc_dict:
+                component_bundle_configuration = frappe.new_doc("Tracking Order Bundle Configuration")
+                component_bundle_configuration.bc_name = bundle_configuration.bc_name
+                component_bundle_configuration.size = bundle_configuration.size
+                component_bundle_configuration.bundle_quantity = bundle_configuration.bundle_quantity
+                component_bundle_configuration.number_of_bundles = bundle_configuration.number_of_bundles
+                component_bundle_configuration.production_type = bundle_configuration.production_type
+                component_bundle_configuration.component = component.component_name
+                component_bundle_configuration.parent_component = bundle_configuration.name
+                component_bundle_configuration.parent = tracking_order.name
+                component_bundle_configuration.parenttype = "Tracking Order"
+                component_bundle_configuration.parentfield = "component_bundle_configuration"
+                component_bundle_configuration.source = "Activation"
+                component_bundle_configuration.activation_status = "Completed"
+                component_bundle_configuration.shade = bundle_configuration.shade
+
+                component_bundle_configuration.insert(ignore_permissions=True)
+                component_bc_dict[key] = component_bundle_configuration
+
+    return component_bc_dict
+
+
+def create_production_items(bundle_creation, tracking_order, commit_chunks=False):
+    """
+    Activate every bundle of a Bundle Creation: a Tracking Tag, Production Item,
+    Production Item Tag Map and activation Item Scan Log each, written with
+    multi-row INSERTs under pre-generated names.
+
+    Bundles already activated for the tracking order are skipped, so an
+    interrupted activation picks up where it stopped. With commit_chunks, each
+    chunk is committed and reported as progress.
+    """
+    component_bc_dict = get_component_bundle_configurations(tracking_order)
+    component_by_name = {comp.component_name: comp.name for comp in tracking_order.tracking_components}
+    item_type = "Component" if len(tracking_order.tracking_components) > 1 else "Unit"
+
+    bundles = list(bundle_creation.table_bundle_details)
+    total = len(bundles)
+
+    activated = set(frappe.get_all(
+        "Production Item",
+        filters={"tracking_order": tracking_order.name, "source": "Activation"},
+        pluck="production_item_number"
+    ))
+
+    for start in range(0, total, BULK_ACTIVATION_CHUNK_SIZE):
+        chunk = [bundle for bundle in bundles[start:start + BULK_ACTIVATION_CHUNK_SIZE] if bundle.bundle_id not in activated]
+        insert_bundle_chunk(bundle_creation, tracking_order, chunk, component_bc_dict, component_by_name, item_type)
+
+        done = min(start + BULK_ACTIVATION_CHUNK_SIZE, total)
+        if commit_chunks:
+            frappe.db.commit()
+            set_activation_progress(tracking_order.name, "In Progress", done, total)
+
+
+def insert_bundle_chunk(bundle_creation, tracking_order, bundles, component_bc_dict, component_by_name, item_type):
+    if not bundles:
+        return
+
+    existing_tags = frappe.get_all(
+        "Tracking Tag",
+        filters={"tag_number": ["in", [bundle.bundle_id for bundle in bundles]]},
+        pluck="tag_number"
+    )
+    if existing_tags:
+        frappe.throw(
+            f"Tags already exist: {', '.join(existing_tags[:20])}",
+            frappe.DuplicateEntryError
+        )
+
+    now = now_datetime()
+    user = frappe.session.user
+    standard = (now, now, user, user, 0)
+
+    tags, items, tag_maps, scan_logs, rollup_rows = [], [], [], [], []
+
+    for bundle in bundles:
+        key = f'{bundle.size}---{bundle.component}---{bundle.shade}---{bundle.unitsbundle}'
+        if key not in component_bc_dict:
+            frappe.log_error(f"Component bundle configuration not found for key: {key}")
+            continue
+
+        tag_name = frappe.generate_hash(length=10)
+        item_name = frappe.generate_hash(length=10)
+        scan_log = frappe._dict(
+            name=frappe.generate_hash(length=10),
+            production_item=item_name,
+            workstation=CUT_BUNDLE_ACTIVATION,
+            operation=CUT_BUNDLE_ACTIVATION,
+            physical_cell=CUT_BUNDLE_ACTIVATION,
+            scanned_by=user,
+            scan_time=now,
+            logged_time=now,
+            status="Activated",
+            log_status="Completed",
+            log_type="Auto",
+            production_item_type=item_type,
+        )
+
+        tags.append((
+            tag_name, *standard,
+            bundle.bundle_id, bundle_creation.tracking_tech, "Active", now, now, "Cut Bundle",
+        ))
+        items.append((
+            item_name, *standard,
+            bundle.bundle_id,
+            tracking_order.name,
+            component_bc_dict[key].name,
+            tag_name,
+            component_by_name[bundle.component],
+            "None",
+            bundle.size,
+            bundle.unitsbundle,
+            "Activated",
+            CUT_BUNDLE_ACTIVATION,
+            "Activation",
+            CUT_BUNDLE_ACTIVATION,
+            "Activation WS",
+            "Activation",
+            "Active",
+            CUT_BUNDLE_ACTIVATION,
+            item_type,
+            scan_log.name,
+        ))
+        tag_maps.append((
+            frappe.generate_hash(length=10), *standard,
+            item_name, tag_name, now, 1, "Cut Bundle",
+        ))
+        scan_logs.append(scan_log)
+        rollup_rows.append(build_rollup_row(scan_log, quantity=bundle.unitsbundle, defects_count=0))
+
+    frappe.db.bulk_insert("Tracking Tag", TRACKING_TAG_FIELDS, tags, chunk_size=BULK_ACTIVATION_CHUNK_SIZE)
+    frappe.db.bulk_insert("Production Item", PRODUCTION_ITEM_FIELDS, items, chunk_size=BULK_ACTIVATION_CHUNK_SIZE)
+    frappe.db.bulk_insert("Production Item Tag Map", TAG_MAP_FIELDS, tag_maps, chunk_size=BULK_ACTIVATION_CHUNK_SIZE)
+    frappe.db.bulk_insert(
+        "Item Scan Log",
+        SCAN_LOG_FIELDS,
+        [(log.name, *standard, *(log.get(field) for field in SCAN_LOG_FIELDS[len(STANDARD_FIELDS):])) for log in scan_logs],
+        chunk_size=BULK_ACTIVATION_CHUNK_SIZE
+    )
+    record_operation_statuses(scan_logs)
+    record_scan_logs(rollup_rows)
+    publish_counter_deltas(rollup_rows)
@@ -0,0 +1,129 @@
+import functools
+import hashlib
+import json
+import time
+from datetime import timedelta
+
+import frappe
+from frappe.utils import now_datetime
+
+from trackerx_live.trackerx_live.utils.trackerx_live_settings_util import TrackerXLiveSettings
+
+
+# Stale results are kept this long after their TTL, to be served while one request recomputes
+DASHBOARD_CACHE_STALE_FOR = 60  # seconds
+DASHBOARD_CACHE_LOCK_TIMEOUT = 30  # seconds
+DASHBOARD_CACHE_WAIT = 5  # seconds a request waits for a concurrent computation
+DASHBOARD_CACHE_POLL_INTERVAL = 0.05  # seconds
+
+# Request arguments that are not filters
+IGNORED_ARGS = ("cmd", "_")
+
+
+def normalize_filters(kwargs):
+    """
+    Filters in a stable form for the cache key: comma separated strings and lists
+    become sorted lists, so the same filters sent differently share one entry.
+    """
+    filters = {}
+    for key, value in (kwargs or {}).items():
+        if key in IGNORED_ARGS or value in (None, "", []):
+            continue
+        if isinstance(value, str) and "," in value:
+            value = [v.strip() for v in value.split(",")]
+        if isinstance(value, (list, tuple)):
+            value = sorted(str(v) for v in value)
+        filters[key] = value
+    return filters
+
+
+def get_dashboard_cache_key(api, kwargs, minute):
+    filters = normalize_filters(kwargs)
+    key = json.dumps({
+        "api": api,
+        "filters": filters,
+        "period": filters.get("period"),
+        "minute": minute,
+    }, sort_keys=True, default=str)
+    return f"trackerx_dashboard|{api}|{hashlib.md5(key.encode()).hexdigest()}"
+
+
+def get_entry(key):
+    value = frappe.cache().get(frappe.cache().make_key(key))
+    return json.loads(value) if value else None
+
+
+def set_entry(key, result, ttl):
+    entry = {"result": result, "computed_at": time.time()}
+    frappe.cache().set(frappe.cache().make_key(key), frappe.as_json(entry, indent=None), ex=ttl + DASHBOARD_CACHE_STALE_FOR)
+
+
+def is_fresh(entry, ttl):
+    return entry and time.time() - entry["computed_at"] < ttl
+
+
+def acquire_lock(key):
+    cache = frappe.cache()
+    return bool(cache.set(cache.make_key(f"{key}|lock"), 1, nx=True, ex=DASHBOARD_CACHE_LOCK_TIMEOUT))
+
+
+def release_lock(key):
+    cache = frappe.cache()
+    cache.delete(cache.make_key(f"{key}|lock"))
+
+
+def cached_dashboard_tile(api):
+    """
+    Cache a live dashboard API result for the TTL set in TrackerX Live Settings.
+
+    Results are keyed by api, normalized filters, period and minute, so every screen
+    polling the same tile shares one computation:
+    - a fresh entry is returned as is
+    - otherwise one request takes the lock and recomputes, the others get the stale
+      entry (this minute's or the previous minute's) without waiting
+    - with no entry at all, they wait for the computing request instead of running
+      the same queries themselves
+
+    Results with an "error" key are not cached. A TTL of 0 disables the cache.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(**kwargs):
+            ttl = TrackerXLiveSettings.get_dashboard_cache_ttl()
+            if ttl <= 0:
+                return fn(**kwargs)
+
+            minute = now_datetime().replace(second=0, microsecond=0)
+            key = get_dashboard_cache_key(api, kwargs, minute)
+
+            entry = get_entry(key)
+            if is_fresh(entry, ttl):
+                return entry["result"]
+
+            stale = entry or get_entry(get_dashboard_cache_key(api, kwargs, minute - timedelta(minutes=1)))
+
+            if not acquire_lock(key):
+                if stale:
+                    return stale["result"]
+
+                # single flight: wait for the request holding the lock
+                waited = 0
+                while waited < DASHBOARD_CACHE_WAIT:
+                    time.sleep(DASHBOARD_CACHE_POLL_INTERVAL)
+                    waited += DASHBOARD_CACHE_POLL_INTERVAL
+                    entry = get_entry(key)
+                    if entry:
+                        return entry["result"]
+
+                return fn(**kwargs)
+
+            try:
+                result = fn(**kwargs)
+                if not (isinstance(result, dict) and result.get("error")):
+                    set_entry(key, result, ttl)
+                return result
+            finally:
+                release_lock(key)
+
+        return wrapper
+    return decorator
@@ -0,0 +1,141 @@
+from collections import defaultdict
+
+import frappe
+from frappe.utils import now_datetime
+
+from trackerx_live.trackerx_live.services.production_rollup_service import (
+    DEFECTIVE_STATUSES,
+    GOOD_STATUSES,
+    ROLLUP_COUNTERS,
+    get_rollup_totals,
+)
+from trackerx_live.trackerx_live.utils.trackerx_live_settings_util import TrackerXLiveSettings
+
+
+LIVE_COUNTER_EVENT = "trackerx_live_counter"
+
+# Clients re-read the snapshot this often to correct missed or cancelled deltas
+LIVE_COUNTER_RECONCILE_INTERVAL = 300  # seconds
+LIVE_COUNTER_SEQUENCE_TTL = 2 * 24 * 60 * 60  # seconds
+
+
+def get_sequence_key(doctype, docname):
+    return frappe.cache().make_key(f"trackerx_live_counter_seq|{doctype}|{docname}")
+
+
+def get_current_sequence(doctype, docname):
+    value = frappe.cache().get(get_sequence_key(doctype, docname))
+    return int(value) if value else 0
+
+
+def next_sequence(doctype, docname):
+    cache = frappe.cache()
+    key = get_sequence_key(doctype, docname)
+    sequence = cache.incr(key)
+    cache.expire(key, LIVE_COUNTER_SEQUENCE_TTL)
+    return sequence
+
+
+def publish_counter_deltas(rows, sign=1):
+    """
+    Publish the counter changes of completed scan logs to live screens and handhelds.
+
+    rows: list of dicts from build_rollup_row, same input as record_scan_logs
+    sign: 1 when logs are completed, -1 when completed logs are cancelled
+
+    One event per (cell, operation, workstation, status) is sent to the Physical Cell
+    room, and to the Workstation room when there is one, after the transaction commits.
+    Events are numbered per room, a gap tells the client to reconcile early.
+    """
+    deltas = defaultdict(lambda: dict.fromkeys(ROLLUP_COUNTERS, 0))
+
+    for row in rows or []:
+        status = row.get("status")
+        if not status or not row.get("physical_cell"):
+            continue
+
+        counters = deltas[(row.get("physical_cell"), row.get("operation"), row.get("workstation"), status)]
+        counters["scan_count"] += sign
+        counters["defects_count"] += sign * int(row.get("defects_count") or 0)
+
+        if status in GOOD_STATUSES:
+            counters["good_qty"] += sign * int(row.get("quantity") or 0)
+        elif status in DEFECTIVE_STATUSES:
+            counters["defective_units"] += sign
+
+    for (physical_cell, operation, workstation, status), counters in deltas.items():
+        message = {
+            "ts": now_datetime().isoformat(),
+            "cell": physical_cell,
+            "operation": operation,
+            "workstation": workstation,
+            "status": status,
+            "qty": counters["good_qty"],
+            **counters,
+        }
+
+        rooms = [("Physical Cell", physical_cell)]
+        if workstation:
+            rooms.append(("Workstation", workstation))
+
+        for doctype, docname in rooms:
+            frappe.publish_realtime(
+                LIVE_COUNTER_EVENT,
+                dict(message, seq=next_sequence(doctype, docname)),
+                doctype=doctype,
+                docname=docname,
+                after_commit=True
+            )
+
+
+def get_live_counter_snapshot(physical_cell=None, workstation=None):
+    """
+    Today's and the current hour's counters, the baseline the published deltas apply to.
+    Returns {"today": {counter: value}, "current_hour": {counter: value}}
+    """
+    now = now_datetime()
+    windows = {
+        "today": now.replace(hour=0, minute=0, second=0, microsecond=0),
+        "current_hour": now.replace(minute=0, second=0, microsecond=0),
+    }
+    filters = {}
+    if physical_cell:
+        filters["physical_cell"] = physical_cell
+    if workstation:
+        filters["workstation"] = workstation
+
+    if TrackerXLiveSettings.is_dashboard_rollup_enabled():
+        return {period: dict(get_rollup_totals(filters, start, now)) for period, start in windows.items()}
+
+    conditions = ["sl.log_status = 'Completed'", "sl.logged_time >= %(today)s"]
+    values = {
+        "today": windows["today"],
+        "current_hour": windows["current_hour"],
+        "good_statuses": GOOD_STATUSES,
+        "defective_statuses": DEFECTIVE_STATUSES,
+    }
+    for field, value in filters.items():
+        conditions.append(f"sl.`{field}` = %({field})s")
+        values[field] = value
+
+    columns = []
+    for period in windows:
+        in_period = f"sl.logged_time >= %({period})s"
+        columns.extend([
+            f"SUM(IF({in_period} AND sl.status IN %(good_statuses)s, COALESCE(pi.quantity, 1), 0)) AS {period}_good_qty",
+            f"SUM(IF({in_period} AND sl.status IN %(defective_statuses)s, 1, 0)) AS {period}_defective_units",
+            f"SUM(IF({in_period}, (SELECT COUNT(*) FROM `tabItem Scan Log Defect` d WHERE d.parent = sl.name), 0)) AS {period}_defects_count",
+            f"SUM(IF({in_period}, 1, 0)) AS {period}_scan_count",
+        ])
+
+    row = frappe.db.sql(f"""
+        SELECT {", ".join(columns)}
+        FROM `tabItem Scan Log` sl
+        LEFT JOIN `tabProduction Item` pi ON pi.name = sl.production_item
+        WHERE {" AND ".join(conditions)}
+    """, values, as_dict=True)[0]
+
+    return {
+        period: {counter: int(row.get(f"{period}_{counter}") or 0) for counter in ROLLUP_COUNTERS}
+        for period in windows
+    }
@@ -0,0 +1,97 @@
+import frappe
+from frappe import _
+
+
+MASTER_DATA_CACHE_TTL = 600  # seconds
+
+# Fields kept in the cached projection of each master doctype
+MASTER_DATA_FIELDS = {
+    "Operation": ["name", "custom_operation_group", "custom_operation_type", "total_operation_time"],
+    "Operation Group": ["name", "group_name"],
+    "Tracking Order": ["name", "item", "production_type", "reference_order_type", "reference_order_number", "order_status", "activation_status"],
+    "Tracking Order Bundle Configuration": ["name", "parent", "bc_name", "size", "bundle_quantity", "production_type", "component", "type", "activation_status", "work_order", "sales_order", "shade"],
+    "Item": ["name", "item_name", "custom_style_master", "custom_colour_name", "custom_season", "custom_material_composition"],
+    "Style Master": ["name", "style_name"],
+    "Physical Cell": ["name", "cell_number", "cell_name"],
+}
+
+
+class MasterDataProjection(frappe._dict):
+    """Read-only projection of a master document"""
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(f"{self.get('doctype')} {self.get('name')} is a read-only cached projection")
+
+    __setitem__ = __setattr__ = __delitem__ = __delattr__ = _read_only
+    update = pop = popitem = setdefault = clear = _read_only
+
+
+def get_cache_key(doctype, name):
+    return f"trackerx_master_data|{doctype}|{name}"
+
+
+def get_request_memo():
+    if not hasattr(frappe.local, "trackerx_master_data"):
+        frappe.local.trackerx_master_data = {}
+    return frappe.local.trackerx_master_data
+
+
+def get_master_data(doctype, name):
+    """
+    Return a read-only projection of a master document.
+
+    Looks in the per-request memo first, then Redis, then the database.
+    Returns None when name is empty and throws DoesNotExistError when the record is missing.
+    """
+    if not name:
+        return None
+
+    if doctype not in MASTER_DATA_FIELDS:
+        frappe.throw(_("{0} is not a cached master doctype").format(doctype))
+
+    memo = get_request_memo()
+    memo_key = (doctype, name)
+    if memo_key in memo:
+        return memo[memo_key]
+
+    cache_key = get_cache_key(doctype, name)
+    values = frappe.cache().get_value(cache_key)
+
+    if values is None:
+        values = frappe.db.get_value(doctype, name, MASTER_DATA_FIELDS[doctype], as_dict=True)
+        if not values:
+            frappe.throw(_("{0} {1} not found").format(_(doctype), name), frappe.DoesNotExistError)
+
+        # plain dict in Redis, the read-only wrapper can't be unpickled
+        values = dict(values, doctype=doctype)
+        frappe.cache().set_value(cache_key, values, expires_in_sec=MASTER_DATA_CACHE_TTL)
+
+    projection = MasterDataProjection(values)
+    memo[memo_key] = projection
+    return projection
+
+
+def clear_master_data(doctype, name):
+    frappe.cache().delete_value(get_cache_key(doctype, name))
+    get_request_memo().pop((doctype, name), None)
+
+
+def invalidate_master_data(doc, method=None):
+    """
+    doc_events hook: drop the cached projection when a master document is saved or deleted.
+    Cleared again after commit so a concurrent request can't re-cache the old values.
+    """
+    keys = [(doc.doctype, doc.name)]
+
+    if doc.doctype == "Tracking Order":
+        for fieldname in ("bundle_configurations", "component_bundle_configurations"):
+            for row in doc.get(fieldname) or []:
+                if row.doctype == "Tracking Order Bundle Configuration":
+                    keys.append((row.doctype, row.name))
+
+    def clear():
+        for doctype, name in keys:
+            clear_master_data(doctype, name)
+
+    clear()
+    frappe.db.after_commit.add(clear)
@@ -0,0 +1,118 @@
+import frappe
+from redis.exceptions import WatchError
+
+from trackerx_live.trackerx_live.services.operation_status_service import get_passed_operations
+from trackerx_live.trackerx_live.utils.operation_map_util import OperationMapManager
+
+
+# Completed operations of a production item, as a bitset over the nodes of its
+# tracking order's operation map. Stored as "<map version>|<hex mask>", a mask of
+# another map version is rebuilt from Production Item Operation Status.
+OPERATION_PROGRESS_TTL = 7 * 24 * 60 * 60  # seconds
+OPERATION_PROGRESS_UPDATE_RETRIES = 5
+
+
+def get_progress_key(production_item):
+    return frappe.cache().make_key(f"trackerx_operation_progress|{production_item}")
+
+
+def get_operation_map(tracking_order):
+    """Cached operation map of a tracking order, None when it has none or it is invalid"""
+    if not tracking_order:
+        return None
+    try:
+        return OperationMapManager().get_operation_map(tracking_order)
+    except Exception:
+        frappe.log_error(frappe.get_traceback(), f"Operation map of {tracking_order} not available")
+        return None
+
+
+def parse_mask(value, op_map):
+    """Mask of a stored progress value, None when there is none for the map's version"""
+    if not value:
+        return None
+    version, _, mask = frappe.safe_decode(value).partition("|")
+    return int(mask, 16) if version == op_map.version else None
+
+
+def get_completed_mask(production_item, component, op_map, refresh=False):
+    """refresh: rebuild the mask from Production Item Operation Status"""
+    cache = frappe.cache()
+    key = get_progress_key(production_item)
+
+    mask = None if refresh else parse_mask(cache.get(key), op_map)
+    if mask is not None:
+        return mask
+
+    mask = op_map.get_operations_mask(component, get_passed_operations(production_item))
+    cache.set(key, f"{op_map.version}|{mask:x}", ex=OPERATION_PROGRESS_TTL)
+    return mask
+
+
+def check_operation_sequence(production_item, tracking_order, component, operation):
+    """
+    Check a scan of the item at `operation` against the operation map.
+
+    Returns {"is_allowed", "skipped_operations", "previous_operations"}: the scan is
+    not allowed when operations before it were not passed yet. Items whose tracking
+    order has no usable operation map are always allowed.
+    """
+    op_map = get_operation_map(tracking_order)
+    if not op_map:
+        return {"is_allowed": True, "skipped_operations": [], "previous_operations": []}
+
+    completed_mask = get_completed_mask(production_item, component, op_map)
+    skipped = op_map.get_missing_previous_operations(component, operation, completed_mask)
+    if skipped:
+        # confirm against the database before rejecting, the cached mask may be behind
+        completed_mask = get_completed_mask(production_item, component, op_map, refresh=True)
+        skipped = op_map.get_missing_previous_operations(component, operation, completed_mask)
+
+    return {
+        "is_allowed": not skipped,
+        "skipped_operations": [node.operation for node in skipped],
+        "previous_operations": op_map.get_all_previous_operations(operation, component),
+    }
+
+
+def mark_operation_completed(production_item, tracking_order, component, operation):
+    """Set the operation's bit in the item's mask once the pass is committed"""
+    def update():
+        op_map = get_operation_map(tracking_order)
+        if not op_map:
+            return
+
+        cache = frappe.cache()
+        key = get_progress_key(production_item)
+        operation_mask = op_map.get_operations_mask(component, [operation])
+
+        # WATCH/MULTI, so passes of the item committed at the same time keep each other's bit
+        with cache.pipeline() as pipe:
+            for _ in range(OPERATION_PROGRESS_UPDATE_RETRIES):
+                try:
+                    pipe.watch(key)
+                    mask = parse_mask(pipe.get(key), op_map)
+                    if mask is None:
+                        mask = op_map.get_operations_mask(component, get_passed_operations(production_item))
+                    pipe.multi()
+                    pipe.set(key, f"{op_map.version}|{mask | operation_mask:x}", ex=OPERATION_PROGRESS_TTL)
+                    pipe.execute()
+                    return
+                except WatchError:
+                    continue
+
+        # still contended, the mask is rebuilt on next use
+        cache.delete(key)
+
+    frappe.db.after_commit.add(update)
+
+
+def clear_operation_progress(production_items):
+    """Completed logs were cancelled, the masks are rebuilt on next use"""
+    def clear():
+        cache = frappe.cache()
+        for production_item in production_items:
+            cache.delete(get_progress_key(production_item))
+
+    clear()
+    frappe.db.after_commit.add(clear)
@@ -0,0 +1,191 @@
+import hashlib
+
+import frappe
+from frappe.utils import now_datetime
+
+from trackerx_live.trackerx_live.services.production_rollup_service import GOOD_STATUSES
+
+
+OPERATION_STATUS_DOCTYPE = "Production Item Operation Status"
+
+# A log in one of these states no longer replaces the item's latest log in the operation
+INACTIVE_LOG_STATUSES = ("Cancelled", "SP Override")
+
+OPERATION_STATUS_FIELDS = (
+    "workstation",
+    "physical_cell",
+    "status",
+    "log_status",
+    "scan_time",
+    "logged_time",
+)
+
+
+def get_operation_status_name(production_item, operation):
+    """Deterministic name so (production_item, operation) is one row and a primary key lookup"""
+    return hashlib.md5(f"{production_item or ''}|{operation or ''}".encode()).hexdigest()
+
+
+def is_passed(scan_log):
+    return scan_log.get("log_status") == "Completed" and scan_log.get("status") in GOOD_STATUSES
+
+
+def record_operation_statuses(scan_logs):
+    """
+    Upsert Production Item Operation Status for new or changed Item Scan Logs.
+
+    scan_logs: Item Scan Log documents or dicts with name, production_item, operation
+    and the OPERATION_STATUS_FIELDS
+
+    The row follows the item's latest log in the operation, a log that is cancelled
+    after a newer one was written leaves it as is. The passed_* fields keep the
+    completed pass until that log itself is cancelled or changed.
+    Runs in the caller's transaction.
+    """
+    now = now_datetime()
+    user = frappe.session.user
+    placeholders = []
+    values = []
+
+    for scan_log in scan_logs or []:
+        if not scan_log.get("production_item") or not scan_log.get("operation"):
+            continue
+
+        passed = is_passed(scan_log)
+        placeholders.append("(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)")
+        values.extend([
+            get_operation_status_name(scan_log.get("production_item"), scan_log.get("operation")),
+            now, now, user, user,
+            scan_log.get("production_item"),
+            scan_log.get("operation"),
+            scan_log.get("name"),
+            *(scan_log.get(field) for field in OPERATION_STATUS_FIELDS),
+            scan_log.get("name") if passed else None,
+            scan_log.get("status") if passed else None,
+            scan_log.get("logged_time") if passed else None,
+        ])
+
+    if not placeholders:
+        return
+
+    # MariaDB applies the assignments in order, so scan_log and passed_log, which the
+    # conditions read, are assigned after the fields that depend on them
+    inactive = ", ".join(frappe.db.escape(log_status) for log_status in INACTIVE_LOG_STATUSES)
+    keep_latest = f"VALUES(`log_status`) IN ({inactive}) AND `scan_log` != VALUES(`scan_log`)"
+    latest_assignments = [
+        f"`{field}` = IF({keep_latest}, `{field}`, VALUES(`{field}`))"
+        for field in OPERATION_STATUS_FIELDS
+    ]
+    passed_assignments = [
+        f"`{field}` = IF(VALUES(`passed_log`) IS NOT NULL, VALUES(`{field}`), IF(`passed_log` = VALUES(`scan_log`), NULL, `{field}`))"
+        for field in ("passed_status", "passed_time", "passed_log")
+    ]
+
+    frappe.db.sql(f"""
+        INSERT INTO `tab{OPERATION_STATUS_DOCTYPE}`
+            (`name`, `creation`, `modified`, `owner`, `modified_by`,
+             `production_item`, `operation`, `scan_log`,
+             {", ".join(f"`{field}`" for field in OPERATION_STATUS_FIELDS)},
+             `passed_log`, `passed_status`, `passed_time`)
+        VALUES {", ".join(placeholders)}
+        ON DUPLICATE KEY UPDATE
+            {", ".join(latest_assignments + passed_assignments)},
+            `scan_log` = IF({keep_latest}, `scan_log`, VALUES(`scan_log`)),
+            `modified` = VALUES(`modified`)
+    """, values)
+
+
+def get_operation_status(production_item, operation):
+    """The item's status row in the operation, None when it was never scanned there"""
+    return frappe.db.get_value(
+        OPERATION_STATUS_DOCTYPE,
+        get_operation_status_name(production_item, operation),
+        ["production_item", "operation", "scan_log", *OPERATION_STATUS_FIELDS,
+         "passed_log", "passed_status", "passed_time"],
+        as_dict=True
+    )
+
+
+def get_passed_operation_statuses(production_items, operation):
+    """{production_item: status row} for the items already passed in the operation"""
+    names = [get_operation_status_name(item, operation) for item in production_items]
+    if not names:
+        return {}
+
+    return {
+        row.production_item: row
+        for row in frappe.get_all(
+            OPERATION_STATUS_DOCTYPE,
+            filters={"name": ["in", names], "passed_log": ["is", "set"]},
+            fields=["production_item", "passed_log", "passed_status", "passed_time"]
+        )
+    }
+
+
+def get_passed_operations(production_item):
+    """Operations the item has passed"""
+    return frappe.get_all(
+        OPERATION_STATUS_DOCTYPE,
+        filters={"production_item": production_item, "passed_log": ["is", "set"]},
+        pluck="operation"
+    )
+
+
+def rebuild_operation_statuses():
+    """
+    Recompute Production Item Operation Status from Item Scan Log.
+    Seeds the table on install and repairs it after manual data fixes.
+
+    bench --site <site> execute trackerx_live.trackerx_live.services.operation_status_service.rebuild_operation_statuses
+    """
+    now = now_datetime()
+    values = {
+        "now": now,
+        "user": frappe.session.user,
+        "good_statuses": GOOD_STATUSES,
+        "inactive": INACTIVE_LOG_STATUSES,
+    }
+
+    frappe.db.sql(f"DELETE FROM `tab{OPERATION_STATUS_DOCTYPE}`")
+
+    frappe.db.sql(f"""
+        INSERT INTO `tab{OPERATION_STATUS_DOCTYPE}`
+            (`name`, `creation`, `modified`, `owner`, `modified_by`,
+             `production_item`, `operation`, `scan_log`,
+             `workstation`, `physical_cell`, `status`, `log_status`, `scan_time`, `logged_time`,
+             `passed_log`, `passed_status`, `passed_time`)
+        SELECT
+            MD5(CONCAT_WS('|', latest.production_item, latest.operation)),
+            %(now)s, %(now)s, %(user)s, %(user)s,
+            latest.production_item, latest.operation, latest.name,
+            latest.workstation, latest.physical_cell, latest.status, latest.log_status,
+            latest.scan_time, latest.logged_time,
+            passed.name, passed.status, passed.logged_time
+        FROM (
+            SELECT
+                sl.name, sl.production_item, sl.operation, sl.workstation, sl.physical_cell,
+                sl.status, sl.log_status, sl.scan_time, sl.logged_time,
+                ROW_NUMBER() OVER (
+                    PARTITION BY sl.production_item, sl.operation
+                    ORDER BY sl.log_status IN %(inactive)s, sl.creation DESC
+                ) AS rn
+            FROM `tabItem Scan Log` sl
+            WHERE sl.production_item IS NOT NULL AND sl.operation IS NOT NULL
+        ) latest
+        LEFT JOIN (
+            SELECT
+                sl.name, sl.production_item, sl.operation, sl.status, sl.logged_time,
+                ROW_NUMBER() OVER (
+                    PARTITION BY sl.production_item, sl.operation
+                    ORDER BY sl.logged_time DESC
+                ) AS rn
+            FROM `tabItem Scan Log` sl
+            WHERE sl.log_status = 'Completed' AND sl.status IN %(good_statuses)s
+        ) passed
+            ON passed.production_item = latest.production_item
+            AND passed.operation = latest.operation
+            AND passed.rn = 1
+        WHERE latest.rn = 1
+    """, values)
+
+    frappe.db.commit()
@@ -0,0 +1,247 @@
+import frappe
+
+
+SCAN_LOG_FILTER_FIELDS = (
+    "name",
+    "production_item",
+    "workstation",
+    "operation",
+    "physical_cell",
+    "scan_time",
+    "logged_time",
+    "status",
+    "log_status",
+    "log_type",
+    "device_id",
+)
+
+
+def build_scan_log_conditions(filters, alias="sl", values=None):
+    """
+    Convert a frappe style filters dict (as built by live_dashboard.build_filters)
+    into a SQL WHERE clause on `tabItem Scan Log`.
+
+    Supported values:
+    - plain value                     -> field = value
+    - ['in' | 'not in', [values]]     -> field IN (...)
+    - ['between', [from, to]]         -> field BETWEEN from AND to
+    - ['=', '!=', '>', '>=', '<', '<=', value]
+
+    Returns (where_clause, values)
+    """
+    conditions = []
+    values = values if values is not None else {}
+
+    for idx, (field, value) in enumerate((filters or {}).items()):
+        if field not in SCAN_LOG_FILTER_FIELDS:
+            frappe.throw(f"Unsupported Item Scan Log filter: {field}")
+
+        column = f"{alias}.`{field}`"
+        key = f"f{idx}_{field}"
+
+        if isinstance(value, (list, tuple)) and len(value) == 2 and isinstance(value[0], str):
+            operator = value[0].lower().strip()
+            operand = value[1]
+
+            if operator in ("in", "not in"):
+                operand = [v for v in (operand or []) if v is not None]
+                if not operand:
+                    conditions.append("1=0" if operator == "in" else "1=1")
+                    continue
+                conditions.append(f"{column} {operator.upper()} %({key})s")
+                values[key] = tuple(operand)
+
+            elif operator == "between":
+                conditions.append(f"{column} BETWEEN %({key}_from)s AND %({key}_to)s")
+                values[f"{key}_from"] = operand[0]
+                values[f"{key}_to"] = operand[1]
+
+            elif operator in ("=", "!=", ">", ">=", "<", "<="):
+                conditions.append(f"{column} {operator} %({key})s")
+                values[key] = operand
+
+            else:
+                frappe.throw(f"Unsupported filter operator '{operator}' for {field}")
+
+        else:
+            conditions.append(f"{column} = %({key})s")
+            values[key] = value
+
+    where_clause = " AND ".join(conditions) if conditions else "1=1"
+    return where_clause, values
+
+
+def get_output_quantity(filters):
+    """
+    Returns the produced quantity for the matching Item Scan Logs.
+
+    Each production item is counted once (distinct by production item) and
+    contributes its `Production Item.quantity`, defaulting to 1 when the item
+    or its quantity is missing. Computed as a single grouped query instead of
+    loading every Production Item document.
+    """
+    where_clause, values = build_scan_log_conditions(filters)
+
+    result = frappe.db.sql(f"""
+        SELECT COALESCE(SUM(COALESCE(pi.quantity, 1)), 0) AS total_quantity
+        FROM (
+            SELECT DISTINCT sl.production_item
+            FROM `tabItem Scan Log` sl
+            WHERE {where_clause}
+        ) items
+        LEFT JOIN `tabProduction Item` pi ON pi.name = items.production_item
+    """, values, as_dict=True)
+
+    return int(result[0].total_quantity or 0) if result else 0
+
+
+def get_output_quantity_by_bucket(filters, bucket_origin, bucket_minutes=60):
+    """
+    Returns output quantity grouped into fixed width time buckets of `logged_time`
+    as {bucket_index: quantity}, where bucket 0 starts at `bucket_origin`.
+
+    Production items are counted once per bucket, the same way get_output_quantity
+    counts them for a single window, but a whole day costs one query.
+    """
+    bucket_minutes = int(bucket_minutes)
+    if bucket_minutes <= 0:
+        frappe.throw("Bucket width must be a positive number of minutes")
+
+    where_clause, values = build_scan_log_conditions(filters)
+    values["bucket_origin"] = bucket_origin
+    values["bucket_seconds"] = bucket_minutes * 60
+
+    result = frappe.db.sql(f"""
+        SELECT
+            items.bucket,
+            COALESCE(SUM(COALESCE(pi.quantity, 1)), 0) AS total_quantity
+        FROM (
+            SELECT DISTINCT
+                FLOOR(TIMESTAMPDIFF(SECOND, %(bucket_origin)s, sl.logged_time) / %(bucket_seconds)s) AS bucket,
+                sl.production_item
+            FROM `tabItem Scan Log` sl
+            WHERE {where_clause}
+        ) items
+        LEFT JOIN `tabProduction Item` pi ON pi.name = items.production_item
+        GROUP BY items.bucket
+    """, values, as_dict=True)
+
+    return {int(row.bucket): int(row.total_quantity or 0) for row in result if row.bucket is not None}
+
+
+def get_scan_counts_by_window(filters, windows, defect_statuses):
+    """
+    Output quantity, defective unit count and defects count of several time windows
+    of `logged_time`, each computed the same way as its dashboard tile:
+    - output: distinct Pass production items, weighted by Production Item.quantity
+    - defective_units: logs with a status in defect_statuses
+    - defects_count: Item Scan Log Defect rows of the logs
+
+    filters: build_filters style filters without logged_time or status
+    windows: {key: (from, to)}
+    Returns {key: {"output", "defective_units", "defects_count"}} from two queries
+    over the union of the windows.
+    """
+    if not windows:
+        return {}
+
+    keys = list(windows)
+    where_clause, values = build_scan_log_conditions(filters)
+    values["range_from"] = min(window[0] for window in windows.values())
+    values["range_to"] = max(window[1] for window in windows.values())
+    values["defect_statuses"] = tuple(defect_statuses)
+
+    in_window = {}
+    for idx, key in enumerate(keys):
+        values[f"w{idx}_from"], values[f"w{idx}_to"] = windows[key]
+        in_window[key] = f"sl.logged_time BETWEEN %(w{idx}_from)s AND %(w{idx}_to)s"
+
+    output_row = frappe.db.sql(f"""
+        SELECT {", ".join(f"COALESCE(SUM(items.w{idx} * COALESCE(pi.quantity, 1)), 0) AS output_{idx}" for idx in range(len(keys)))}
+        FROM (
+            SELECT
+                sl.production_item,
+                {", ".join(f"MAX({in_window[key]}) AS w{idx}" for idx, key in enumerate(keys))}
+            FROM `tabItem Scan Log` sl
+            WHERE {where_clause}
+              AND sl.status = 'Pass'
+              AND sl.logged_time BETWEEN %(range_from)s AND %(range_to)s
+            GROUP BY sl.production_item
+        ) items
+        LEFT JOIN `tabProduction Item` pi ON pi.name = items.production_item
+    """, values, as_dict=True)[0]
+
+    defects_row = frappe.db.sql(f"""
+        SELECT
+            {", ".join(
+                f"COUNT(DISTINCT CASE WHEN sl.status IN %(defect_statuses)s AND {in_window[key]} THEN sl.name END) AS defective_units_{idx}, "
+                f"COUNT(CASE WHEN {in_window[key]} THEN d.name END) AS defects_count_{idx}"
+                for idx, key in enumerate(keys)
+            )}
+        FROM `tabItem Scan Log` sl
+        LEFT JOIN `tabItem Scan Log Defect` d ON d.parent = sl.name
+        WHERE {where_clause}
+          AND sl.logged_time BETWEEN %(range_from)s AND %(range_to)s
+    """, values, as_dict=True)[0]
+
+    return {
+        key: {
+            "output": int(output_row.get(f"output_{idx}") or 0),
+            "defective_units": int(defects_row.get(f"defective_units_{idx}") or 0),
+            "defects_count": int(defects_row.get(f"defects_count_{idx}") or 0),
+        }
+        for idx, key in enumerate(keys)
+    }
+
+
+def get_defects_count(filters):
+    """
+    Number of Item Scan Log Defect rows of the matching Item Scan Logs,
+    joined on the (parent, defect) index instead of an IN list of log names.
+    """
+    where_clause, values = build_scan_log_conditions(filters)
+
+    result = frappe.db.sql(f"""
+        SELECT COUNT(d.name) AS defects_count
+        FROM `tabItem Scan Log` sl
+        INNER JOIN `tabItem Scan Log Defect` d ON d.parent = sl.name AND d.parenttype = 'Item Scan Log'
+        WHERE {where_clause}
+    """, values, as_dict=True)
+
+    return int(result[0].defects_count or 0) if result else 0
+
+
+def get_top_defects(filters, limit=None):
+    """
+    Defects of the matching Item Scan Logs ordered by frequency (most used first).
+    The logs are grouped by defect alone, the descriptive columns come from
+    Tracking Order Defect Master. limit caps the number of defects returned.
+    """
+    where_clause, values = build_scan_log_conditions(filters)
+
+    limit_clause = ""
+    if limit:
+        limit_clause = "LIMIT %(limit)s"
+        values["limit"] = int(limit)
+
+    return frappe.db.sql(f"""
+        SELECT
+            top.defect,
+            m.defect_code,
+            m.defect_description,
+            m.defect_type,
+            m.severity,
+            top.frequency
+        FROM (
+            SELECT d.defect, COUNT(*) as frequency
+            FROM `tabItem Scan Log` sl
+            INNER JOIN `tabItem Scan Log Defect` d ON d.parent = sl.name AND d.parenttype = 'Item Scan Log'
+            WHERE {where_clause}
+                AND d.defect IS NOT NULL
+            GROUP BY d.defect
+            ORDER BY frequency DESC
+            {limit_clause}
+        ) top
+        LEFT JOIN `tabTracking Order Defect Master` m ON m.name = top.defect
+        ORDER BY top.frequency DESC
+    """, values, as_dict=True)
@@ -0,0 +1,273 @@
+import hashlib
+from collections import defaultdict
+
+import frappe
+from frappe.utils import get_datetime, now_datetime
+
+from trackerx_live.trackerx_live.services.output_service import build_scan_log_conditions
+
+
+GOOD_STATUSES = ("Pass", "SP Pass", "Counted")
+DEFECTIVE_STATUSES = ("QC Rework", "QC Reject", "QC Rejected", "QC Recut")
+
+ROLLUP_COUNTERS = ("good_qty", "defective_units", "defects_count", "scan_count")
+
+
+def get_rollup_minute(logged_time):
+    return get_datetime(logged_time).replace(second=0, microsecond=0)
+
+
+def get_rollup_name(minute, physical_cell, operation, workstation, status):
+    """Deterministic name so a (minute, cell, operation, workstation, status) bucket is one row"""
+    key = "|".join([
+        minute.strftime("%Y-%m-%d %H:%M:%S"),
+        physical_cell or "",
+        operation or "",
+        workstation or "",
+        status or "",
+    ])
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def build_rollup_row(scan_log, quantity=None, defects_count=None):
+    """
+    Build the rollup input for a completed Item Scan Log (document or dict).
+    `quantity` is the Production Item quantity, `defects_count` defaults to the
+    length of the log's defect_list.
+    """
+    if defects_count is None:
+        defects_count = len(scan_log.get("defect_list") or [])
+
+    return {
+        "logged_time": scan_log.get("logged_time") or now_datetime(),
+        "physical_cell": scan_log.get("physical_cell"),
+        "operation": scan_log.get("operation"),
+        "workstation": scan_log.get("workstation"),
+        "status": scan_log.get("status"),
+        "quantity": quantity if quantity is not None else 1,
+        "defects_count": defects_count,
+    }
+
+
+def build_rollup_changes(previous, scan_log, quantity=None):
+    """
+    (removed, added) rollup rows of an update to an existing Item Scan Log: its previous
+    values when they were already Completed, to record with sign=-1, and the updated log
+    when it is Completed. Completing a log again then doesn't count it twice.
+
+    previous: the log's values before the update, e.g. scan_log.as_dict() taken up front
+    """
+    removed = [build_rollup_row(previous, quantity=quantity)] if previous.get("log_status") == "Completed" else []
+    added = [build_rollup_row(scan_log, quantity=quantity)] if scan_log.get("log_status") == "Completed" else []
+    return removed, added
+
+
+def record_scan_logs(rows, sign=1):
+    """
+    Incrementally apply completed scan logs to Production Minute Rollup.
+
+    rows: list of dicts from build_rollup_row
+    sign: 1 when logs are completed, -1 when completed logs are cancelled
+
+    Runs in the caller's transaction, so the rollup commits or rolls back
+    together with the scan logs.
+    """
+    buckets = defaultdict(lambda: dict.fromkeys(ROLLUP_COUNTERS, 0))
+
+    for row in rows or []:
+        status = row.get("status")
+        if not status:
+            continue
+
+        key = (
+            get_rollup_minute(row.get("logged_time")),
+            row.get("physical_cell"),
+            row.get("operation"),
+            row.get("workstation"),
+            status,
+        )
+        counters = buckets[key]
+        counters["scan_count"] += sign
+        counters["defects_count"] += sign * int(row.get("defects_count") or 0)
+
+        if status in GOOD_STATUSES:
+            counters["good_qty"] += sign * int(row.get("quantity") or 0)
+        elif status in DEFECTIVE_STATUSES:
+            counters["defective_units"] += sign
+
+    if not buckets:
+        return
+
+    now = now_datetime()
+    user = frappe.session.user
+    placeholders = []
+    values = []
+
+    for (minute, physical_cell, operation, workstation, status), counters in buckets.items():
+        placeholders.append("(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)")
+        values.extend([
+            get_rollup_name(minute, physical_cell, operation, workstation, status),
+            now, now, user, user,
+            minute, physical_cell, operation, workstation, status,
+            counters["good_qty"], counters["defective_units"], counters["defects_count"], counters["scan_count"],
+        ])
+
+    frappe.db.sql(f"""
+        INSERT INTO `tabProduction Minute Rollup`
+            (`name`, `creation`, `modified`, `owner`, `modified_by`,
+             `minute`, `physical_cell`, `operation`, `workstation`, `status`,
+             `good_qty`, `defective_units`, `defects_count`, `scan_count`)
+        VALUES {", ".join(placeholders)}
+        ON DUPLICATE KEY UPDATE
+            `good_qty` = `good_qty` + VALUES(`good_qty`),
+            `defective_units` = `defective_units` + VALUES(`defective_units`),
+            `defects_count` = `defects_count` + VALUES(`defects_count`),
+            `scan_count` = `scan_count` + VALUES(`scan_count`),
+            `modified` = VALUES(`modified`)
+    """, values)
+
+
+def get_rollup_totals(filters, from_time, to_time):
+    """
+    Sum the rollup counters between from_time and to_time (minute granularity).
+
+    filters: dict with any of physical_cell, operation, workstation, status as
+    a value or ['in', [...]], same shape as live_dashboard.build_filters
+    """
+    filters = {
+        key: value for key, value in (filters or {}).items()
+        if key in ("physical_cell", "operation", "workstation", "status")
+    }
+    where_clause, values = build_scan_log_conditions(filters, alias="r")
+    values["from_minute"] = get_rollup_minute(from_time)
+    values["to_time"] = to_time
+
+    result = frappe.db.sql(f"""
+        SELECT
+            COALESCE(SUM(r.good_qty), 0) AS good_qty,
+            COALESCE(SUM(r.defective_units), 0) AS defective_units,
+            COALESCE(SUM(r.defects_count), 0) AS defects_count,
+            COALESCE(SUM(r.scan_count), 0) AS scan_count
+        FROM `tabProduction Minute Rollup` r
+        WHERE r.minute >= %(from_minute)s
+          AND r.minute <= %(to_time)s
+          AND {where_clause}
+    """, values, as_dict=True)
+
+    totals = result[0] if result else {}
+    return frappe._dict({counter: int(totals.get(counter) or 0) for counter in ROLLUP_COUNTERS})
+
+
+def get_rollup_counts_by_window(filters, windows, defect_statuses):
+    """
+    Defective units of defect_statuses and defects count of several time windows,
+    read from the rollup in one query. Same shape as
+    output_service.get_scan_counts_by_window without the output.
+
+    windows: {key: (from, to)}
+    """
+    if not windows:
+        return {}
+
+    keys = list(windows)
+    filters = {
+        key: value for key, value in (filters or {}).items()
+        if key in ("physical_cell", "operation", "workstation", "status")
+    }
+    where_clause, values = build_scan_log_conditions(filters, alias="r")
+    values["range_from"] = min(get_rollup_minute(window[0]) for window in windows.values())
+    values["range_to"] = max(window[1] for window in windows.values())
+    values["defect_statuses"] = tuple(defect_statuses)
+
+    in_window = {}
+    for idx, key in enumerate(keys):
+        values[f"w{idx}_from"] = get_rollup_minute(windows[key][0])
+        values[f"w{idx}_to"] = windows[key][1]
+        in_window[key] = f"r.minute >= %(w{idx}_from)s AND r.minute <= %(w{idx}_to)s"
+
+    row = frappe.db.sql(f"""
+        SELECT
+            {", ".join(
+                f"COALESCE(SUM(IF({in_window[key]} AND r.status IN %(defect_statuses)s, r.defective_units, 0)), 0) AS defective_units_{idx}, "
+                f"COALESCE(SUM(IF({in_window[key]}, r.defects_count, 0)), 0) AS defects_count_{idx}"
+                for idx, key in enumerate(keys)
+            )}
+        FROM `tabProduction Minute Rollup` r
+        WHERE r.minute >= %(range_from)s
+          AND r.minute <= %(range_to)s
+          AND {where_clause}
+    """, values, as_dict=True)[0]
+
+    return {
+        key: {
+            "defective_units": int(row.get(f"defective_units_{idx}") or 0),
+            "defects_count": int(row.get(f"defects_count_{idx}") or 0),
+        }
+        for idx, key in enumerate(keys)
+    }
+
+
+def rebuild_production_rollup(from_time, to_time):
+    """
+    Recompute Production Minute Rollup from Item Scan Log for a window.
+    Used to seed the rollup when it is enabled and to repair it after manual data fixes.
+
+    bench --site <site> execute trackerx_live.trackerx_live.services.production_rollup_service.rebuild_production_rollup --kwargs "{'from_time': '2026-10-16', 'to_time': '2026-10-17'}"
+    """
+    from_minute = get_rollup_minute(from_time)
+    to_time = get_datetime(to_time)
+    now = now_datetime()
+    values = {
+        "from_minute": from_minute,
+        "to_time": to_time,
+        "now": now,
+        "user": frappe.session.user,
+        "good_statuses": GOOD_STATUSES,
+        "defective_statuses": DEFECTIVE_STATUSES,
+    }
+
+    frappe.db.sql("""
+        DELETE FROM `tabProduction Minute Rollup`
+        WHERE minute >= %(from_minute)s AND minute <= %(to_time)s
+    """, values)
+
+    frappe.db.sql("""
+        INSERT INTO `tabProduction Minute Rollup`
+            (`name`, `creation`, `modified`, `owner`, `modified_by`,
+             `minute`, `physical_cell`, `operation`, `workstation`, `status`,
+             `good_qty`, `defective_units`, `defects_count`, `scan_count`)
+        SELECT
+            MD5(CONCAT_WS('|', DATE_FORMAT(logs.minute, '%%Y-%%m-%%d %%H:%%i:%%s'),
+                COALESCE(logs.physical_cell, ''), COALESCE(logs.operation, ''),
+                COALESCE(logs.workstation, ''), logs.status)),
+            %(now)s, %(now)s, %(user)s, %(user)s,
+            logs.minute, logs.physical_cell, logs.operation, logs.workstation, logs.status,
+            SUM(IF(logs.status IN %(good_statuses)s, logs.quantity, 0)),
+            SUM(IF(logs.status IN %(defective_statuses)s, 1, 0)),
+            SUM(logs.defects_count),
+            COUNT(*)
+        FROM (
+            SELECT
+                DATE_FORMAT(sl.logged_time, '%%Y-%%m-%%d %%H:%%i:00') AS minute,
+                sl.physical_cell,
+                sl.operation,
+                sl.workstation,
+                sl.status,
+                COALESCE(pi.quantity, 1) AS quantity,
+                (SELECT COUNT(*) FROM `tabItem Scan Log Defect` d WHERE d.parent = sl.name) AS defects_count
+            FROM `tabItem Scan Log` sl
+            LEFT JOIN `tabProduction Item` pi ON pi.name = sl.production_item
+            WHERE sl.log_status = 'Completed'
+              AND sl.status IS NOT NULL AND sl.status != ''
+              AND sl.logged_time >= %(from_minute)s
+              AND sl.logged_time <= %(to_time)s
+        ) logs
+        GROUP BY logs.minute, logs.physical_cell, logs.operation, logs.workstation, logs.status
+    """, values)
+
+    frappe.db.commit()
+
+
+def rebuild_today_production_rollup():
+    now = now_datetime()
+    rebuild_production_rollup(now.replace(hour=0, minute=0, second=0, microsecond=0), now)
@@ -0,0 +1,86 @@
+import frappe
+from frappe.utils import now_datetime
+
+
+SCAN_LOG_INSERT_FIELDS = (
+    "name",
+    "creation",
+    "modified",
+    "owner",
+    "modified_by",
+    "docstatus",
+    "production_item",
+    "operation",
+    "workstation",
+    "physical_cell",
+    "scanned_by",
+    "scan_time",
+    "logged_time",
+    "status",
+    "log_status",
+    "log_type",
+    "production_item_type",
+    "dut",
+    "device_id",
+    "remarks",
+)
+
+
+def build_scan_log_row(**values):
+    """
+    Build an Item Scan Log row for insert_scan_logs with a pre-generated name,
+    so callers can reference the log before it is written.
+    """
+    scan_log = frappe._dict(values)
+    scan_log.name = scan_log.name or frappe.generate_hash(length=10)
+    return scan_log
+
+
+def insert_scan_logs(scan_logs, chunk_size=500):
+    """
+    Insert Item Scan Logs (without defect rows) using multi-row INSERTs.
+
+    Skips document validation and hooks, so callers must validate the batch up front
+    and call operation_status_service.record_operation_statuses for the logs, which
+    ItemScanLog.on_update does for single inserts.
+    """
+    if not scan_logs:
+        return
+
+    now = now_datetime()
+    user = frappe.session.user
+    values = []
+
+    for scan_log in scan_logs:
+        row = dict(scan_log)
+        row.setdefault("creation", now)
+        row.setdefault("modified", now)
+        row.setdefault("owner", user)
+        row.setdefault("modified_by", user)
+        row.setdefault("docstatus", 0)
+        values.append(tuple(row.get(field) for field in SCAN_LOG_INSERT_FIELDS))
+
+    frappe.db.bulk_insert("Item Scan Log", SCAN_LOG_INSERT_FIELDS, values, chunk_size=chunk_size)
+
+
+def set_last_scan_logs(last_scan_log_by_item):
+    """Point Production Item.last_scan_log at the new logs with a single UPDATE"""
+    if not last_scan_log_by_item:
+        return
+
+    cases = []
+    values = []
+    for production_item, scan_log in last_scan_log_by_item.items():
+        cases.append("WHEN %s THEN %s")
+        values.extend([production_item, scan_log])
+
+    production_items = list(last_scan_log_by_item)
+    values.append(now_datetime())
+    values.extend(production_items)
+
+    frappe.db.sql(f"""
+        UPDATE `tabProduction Item`
+        SET last_scan_log = CASE name {" ".join(cases)} END,
+            modified = %s
+        WHERE name IN ({", ".join(["%s"] * len(production_items))})
+    """, values)
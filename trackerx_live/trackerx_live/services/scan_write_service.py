@@ -0,0 +1,203 @@
+import json
+
+import frappe
+from frappe.utils.background_jobs import get_queues_timeout
+
+from trackerx_live.trackerx_live.services.production_rollup_service import build_rollup_row, record_scan_logs
+from trackerx_live.trackerx_live.services.live_counter_service import publish_counter_deltas
+from trackerx_live.trackerx_live.services.operation_progress_service import clear_operation_progress
+from trackerx_live.trackerx_live.services.operation_status_service import get_operation_status, record_operation_statuses
+
+
+# Dedicated RQ queue for scan writes, configured in common_site_config.json:
+#   "workers": {"trackerx_scan": {"timeout": 300}}
+# Falls back to the short queue on benches without it.
+SCAN_WRITE_QUEUE = "trackerx_scan"
+
+SCAN_WRITE_STATUS_TTL = 24 * 60 * 60  # seconds
+SCAN_WRITE_LOCK_TTL = 60  # seconds, renewed after every write
+
+
+def persist_scan(scan_log, quantity):
+    """
+    Write a Draft Item Scan Log for a scan: cancel the earlier logs of the item
+    in the same operation/workstation, take completed ones back out of the
+    production rollup, and insert the new log under its pre-generated name.
+    """
+    existing_logs = []
+    # items never scanned in the operation have no logs to cancel
+    if get_operation_status(scan_log["production_item"], scan_log["operation"]):
+        existing_logs = frappe.get_all(
+            "Item Scan Log",
+            filters={
+                "production_item": scan_log["production_item"],
+                "operation": scan_log["operation"],
+                "workstation": scan_log["workstation"],
+                "log_status": ["!=", "Cancelled"]
+            },
+            fields=["name", "log_status", "status", "scan_time", "logged_time", "physical_cell", "operation", "workstation"]
+        )
+
+    if existing_logs:
+        frappe.db.sql("""
+            UPDATE `tabItem Scan Log`
+            SET log_status = 'Cancelled'
+            WHERE name IN %(names)s
+        """, {"names": tuple(log["name"] for log in existing_logs)})
+        record_operation_statuses([
+            dict(log, production_item=scan_log["production_item"], log_status="Cancelled")
+            for log in existing_logs
+        ])
+
+    # Completed logs were already counted in the production rollup, take them back out
+    completed_logs = [log for log in existing_logs if log["log_status"] == "Completed"]
+    if completed_logs:
+        defects_by_log = {
+            row.parent: row.defects_count
+            for row in frappe.get_all(
+                "Item Scan Log Defect",
+                filters={"parent": ["in", [log["name"] for log in completed_logs]]},
+                fields=["parent", "count(name) as defects_count"],
+                group_by="parent"
+            )
+        }
+        rollup_rows = [
+            build_rollup_row(log, quantity=quantity, defects_count=defects_by_log.get(log["name"], 0))
+            for log in completed_logs
+        ]
+        record_scan_logs(rollup_rows, sign=-1)
+        publish_counter_deltas(rollup_rows, sign=-1)
+        clear_operation_progress([scan_log["production_item"]])
+
+    scan_log_doc = frappe.get_doc(dict(scan_log, doctype="Item Scan Log"))
+    scan_log_doc.insert(ignore_permissions=True, set_name=scan_log["name"])
+    return scan_log_doc
+
+
+def get_scan_write_queue():
+    return SCAN_WRITE_QUEUE if SCAN_WRITE_QUEUE in get_queues_timeout() else "short"
+
+
+def get_status_key(scan_log_id):
+    return f"trackerx_scan_write|{scan_log_id}"
+
+
+def get_pending_key(production_item):
+    # the RedisWrapper list methods add the site prefix
+    return f"trackerx_scan_pending|{production_item}"
+
+
+def get_lock_key(production_item):
+    return frappe.cache().make_key(f"trackerx_scan_write_lock|{production_item}")
+
+
+def set_scan_write_status(scan_log_id, status, message=None):
+    frappe.cache().set_value(
+        get_status_key(scan_log_id),
+        {"status": status, "message": message},
+        expires_in_sec=SCAN_WRITE_STATUS_TTL
+    )
+
+
+def enqueue_scan_write(scan_log, quantity):
+    """
+    Queue persist_scan for a validated scan and return its provisional scan log id.
+
+    Writes of one production item are appended to a Redis list and applied in that
+    order by whichever job holds the item's write lock.
+    """
+    cache = frappe.cache()
+    pending_key = get_pending_key(scan_log["production_item"])
+    cache.rpush(pending_key, frappe.as_json({
+        "scan_log": scan_log,
+        "quantity": quantity,
+        "user": frappe.session.user
+    }))
+    cache.expire(cache.make_key(pending_key), SCAN_WRITE_STATUS_TTL)
+
+    set_scan_write_status(scan_log["name"], "Queued")
+    frappe.enqueue(
+        "trackerx_live.trackerx_live.services.scan_write_service.process_scan_writes",
+        queue=get_scan_write_queue(),
+        production_item=scan_log["production_item"]
+    )
+    return scan_log["name"]
+
+
+def process_scan_writes(production_item):
+    """
+    Background job for enqueue_scan_write, applies the item's pending writes in order.
+
+    Returns right away when another job holds the item's lock, that job checks the
+    list again after releasing it. Writes of a lost job stay pending until the next
+    scan of the item.
+    """
+    cache = frappe.cache()
+    lock_key = get_lock_key(production_item)
+
+    while cache.llen(get_pending_key(production_item)):
+        if not cache.set(lock_key, 1, nx=True, ex=SCAN_WRITE_LOCK_TTL):
+            return
+        try:
+            apply_pending_scan_writes(production_item, lock_key)
+        finally:
+            cache.delete(lock_key)
+
+
+def apply_pending_scan_writes(production_item, lock_key):
+    cache = frappe.cache()
+    pending_key = get_pending_key(production_item)
+
+    while True:
+        # the write leaves the list only once it is done, a worker that dies
+        # in between leaves it to the next job
+        head = cache.lrange(pending_key, 0, 0)
+        if not head:
+            return
+
+        apply_scan_write(frappe._dict(json.loads(frappe.safe_decode(head[0]))))
+        cache.lpop(pending_key)
+        cache.expire(lock_key, SCAN_WRITE_LOCK_TTL)
+
+
+def apply_scan_write(write):
+    scan_log = write.scan_log
+    if write.user:
+        frappe.set_user(write.user)
+
+    try:
+        # committed before the worker died
+        if not frappe.db.exists("Item Scan Log", scan_log["name"]):
+            persist_scan(scan_log, write.quantity)
+            frappe.db.commit()
+        set_scan_write_status(scan_log["name"], "Persisted")
+
+    except Exception as e:
+        # not applied, the item's later writes go on in order
+        frappe.db.rollback()
+        frappe.log_error(frappe.get_traceback(), "process_scan_writes() error")
+        set_scan_write_status(scan_log["name"], "Failed", str(e))
+
+
+def get_scan_write_status(scan_log_ids):
+    """Returns {scan_log_id: {"status": Queued | Persisted | Failed | Unknown, "message"}}"""
+    statuses = {}
+    unknown = []
+
+    for scan_log_id in scan_log_ids:
+        status = frappe.cache().get_value(get_status_key(scan_log_id))
+        if status:
+            statuses[scan_log_id] = status
+        else:
+            unknown.append(scan_log_id)
+
+    # status keys expire, synchronous scans never had one
+    if unknown:
+        persisted = set(frappe.get_all("Item Scan Log", filters={"name": ["in", unknown]}, pluck="name"))
+        for scan_log_id in unknown:
+            statuses[scan_log_id] = {
+                "status": "Persisted" if scan_log_id in persisted else "Unknown",
+                "message": None
+            }
+
+    return statuses
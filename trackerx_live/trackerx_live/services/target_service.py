@@ -1,8 +1,48 @@
+from __future__ import annotations
 from datetime import datetime, timedelta
+import hashlib
+import json
 import random
 import abc
 import math
 import frappe
+from frappe.utils import now_datetime
+
+
+HOURLY_TARGET_GROUP_FIELDS = ("physical_cell", "operation", "workstation")
+
+LIMITS_CACHE_TTL = 120  # seconds, keys change every minute anyway
+
+
+def build_hourly_target_conditions(inputs, from_date, to_date, alias="ht"):
+    """
+    WHERE clause on `tabHourly Target` for rows overlapping the date range.
+    Filter values in inputs can be a single value or a list of values.
+    Returns (where_clause, values)
+    """
+    conditions = [f"{alias}.`from_time` <= %(to_date)s", f"{alias}.`to_time` >= %(from_date)s"]
+    values = {"from_date": from_date, "to_date": to_date}
+
+    for key in HOURLY_TARGET_GROUP_FIELDS:
+        value = (inputs or {}).get(key)
+        if not value:
+            continue
+        if isinstance(value, (list, tuple)):
+            conditions.append(f"{alias}.`{key}` IN %({key})s")
+            values[key] = tuple(value)
+        else:
+            conditions.append(f"{alias}.`{key}` = %({key})s")
+            values[key] = value
+
+    return " AND ".join(conditions), values
+
+
+def get_bucket_origin(from_date, bucket_minutes):
+    """Start of the bucket containing from_date, buckets are aligned to midnight"""
+    day_start = from_date.replace(hour=0, minute=0, second=0, microsecond=0)
+    minutes = int((from_date - day_start).total_seconds() // 60)
+    return day_start + timedelta(minutes=minutes - minutes % bucket_minutes)
+
 
 class TargetService(abc.ABC):
 
@@ -13,7 +53,8 @@ class TargetService(abc.ABC):
     
 
     @abc.abstractmethod
-    def get_hourly_target(self, inputs: dict, from_date: datetime, to_date: datetime) -> dict:
+    def get_hourly_target(self, inputs: dict, from_date: datetime, to_date: datetime,
+                          bucket_minutes: int = 60, group_by: list | None = None) -> dict:
         pass
 
     @abc.abstractmethod
@@ -44,130 +85,148 @@ class LiveTargetService(TargetService):
 
     def get_total_target(self, inputs: dict, from_date: datetime, to_date: datetime) -> float:
         """
-        Returns the sum of 'target' from Hourly Target based on filters and date range using SQL.
+        Returns the sum of 'target' from Hourly Target based on filters and date range.
         """
-        conditions = ["`from_time` <= %(to_date)s", "`to_time` >= %(from_date)s"]
-        values = {"from_date": from_date, "to_date": to_date}
+        return self.get_limits(inputs, from_date, to_date).target
 
-        # Optional filters
-        for key in ["physical_cell", "operation", "workstation"]:
-            if key in inputs and inputs[key]:
-                conditions.append(f"`{key}` = %({key})s")
-                values[key] = inputs[key]
-
-        where_clause = " AND ".join(conditions)
-
-        query = f"""
-            SELECT SUM(target) as total_target
-            FROM `tabHourly Target`
-            WHERE {where_clause}
+    def get_limits(self, inputs: dict, from_date: datetime, to_date: datetime) -> dict:
         """
+        Returns {"target", "defective_unit_limit", "defects_limit"} summed over the
+        Hourly Target rows matching the filters and date range, in one query.
 
-        result = frappe.db.sql(query, values, as_dict=True)
-
-        return result[0]["total_target"] or 0.0
-
-
-
-    def get_hourly_target(self, inputs: dict, from_date: datetime, to_date: datetime) -> dict:
-        """
-        Returns hour-wise target for the given filters and date range.
-        Distributes each record's target evenly across the hours it covers.
+        Memoized in Redis per filters and minute, so the dashboard tiles of one
+        refresh (output, defective units, defects) share a single query.
         """
-        conditions = ["`from_time` <= %(to_date)s", "`to_time` >= %(from_date)s"]
-        values = {"from_date": from_date, "to_date": to_date}
-
-        # Add optional filters
-        for key in ["physical_cell", "operation", "workstation"]:
-            if key in inputs and inputs[key]:
-                conditions.append(f"`{key}` = %({key})s")
-                values[key] = inputs[key]
-
-        where_clause = " AND ".join(conditions)
-
-        query = f"""
-            SELECT from_time, to_time, target
-            FROM `tabHourly Target`
+        cache_key = self.get_limits_cache_key(inputs, from_date, to_date)
+        limits = frappe.cache().get_value(cache_key)
+        if limits is not None:
+            return frappe._dict(limits)
+
+        where_clause, values = build_hourly_target_conditions(inputs, from_date, to_date)
+
+        result = frappe.db.sql(f"""
+            SELECT
+                COALESCE(SUM(ht.target), 0) AS target,
+                COALESCE(SUM(ht.defective_unit_limit), 0) AS defective_unit_limit,
+                COALESCE(SUM(ht.defects_limit), 0) AS defects_limit
+            FROM `tabHourly Target` ht
             WHERE {where_clause}
+        """, values, as_dict=True)
+
+        row = result[0] if result else {}
+        limits = {
+            "target": float(row.get("target") or 0),
+            "defective_unit_limit": float(row.get("defective_unit_limit") or 0),
+            "defects_limit": float(row.get("defects_limit") or 0),
+        }
+        frappe.cache().set_value(cache_key, limits, expires_in_sec=LIMITS_CACHE_TTL)
+        return frappe._dict(limits)
+
+    def get_limits_cache_key(self, inputs, from_date, to_date):
+        minute = now_datetime().replace(second=0, microsecond=0)
+        key = json.dumps({
+            "filters": {field: (inputs or {}).get(field) for field in HOURLY_TARGET_GROUP_FIELDS},
+            "from_date": from_date,
+            "to_date": to_date.replace(second=0, microsecond=0) if to_date else None,
+            "minute": minute,
+        }, sort_keys=True, default=str)
+        return f"trackerx_target_limits|{hashlib.md5(key.encode()).hexdigest()}"
+
+    def get_hourly_target(self, inputs: dict, from_date: datetime, to_date: datetime,
+                          bucket_minutes: int = 60, group_by: list | None = None) -> dict:
         """
-        results = frappe.db.sql(query, values, as_dict=True)
+        Returns the target per time bucket for the given filters and date range.
+        Each record's target is spread evenly over the part of it inside the range,
+        and every bucket gets its overlapping share.
 
-        # Prepare hourly buckets
-        hourly_targets = {}
-        current_time = from_date.replace(minute=0, second=0, microsecond=0)
-        while current_time <= to_date:
-            hourly_targets[current_time] = 0.0
-            current_time += timedelta(hours=1)
+        Buckets are bucket_minutes wide and aligned to midnight, the first one holds
+        from_date. The overlaps are computed in one grouped query against a bucket
+        sequence, so a week of rows for the whole factory is a single round-trip.
 
-        # Distribute each target across hours it spans
+        Returns {bucket_start: target} for every bucket up to to_date, or with group_by
+        (any of physical_cell, operation, workstation) {(group values...): {bucket_start: target}}.
+        """
+        bucket_minutes = int(bucket_minutes or 60)
+        if bucket_minutes <= 0:
+            frappe.throw("Bucket width must be a positive number of minutes")
+
+        group_by = list(group_by or [])
+        for field in group_by:
+            if field not in HOURLY_TARGET_GROUP_FIELDS:
+                frappe.throw(f"Unsupported Hourly Target group by: {field}")
+
+        bucket_origin = get_bucket_origin(from_date, bucket_minutes)
+        bucket_seconds = bucket_minutes * 60
+        bucket_count = int((to_date - bucket_origin).total_seconds() // bucket_seconds) + 1
+        bucket_starts = [bucket_origin + timedelta(minutes=bucket * bucket_minutes) for bucket in range(max(bucket_count, 0))]
+
+        def empty_buckets():
+            return {bucket_start: 0.0 for bucket_start in bucket_starts}
+
+        if not bucket_starts:
+            return {} if group_by else empty_buckets()
+
+        where_clause, values = build_hourly_target_conditions(inputs, from_date, to_date)
+        values.update({"bucket_origin": bucket_origin, "bucket_seconds": bucket_seconds, "bucket_count": len(bucket_starts)})
+
+        group_columns = "".join(f", spans.`{field}`" for field in group_by)
+
+        # start/end: offsets in seconds from bucket_origin of the record's part inside the range
+        results = frappe.db.sql(f"""
+            WITH RECURSIVE buckets (bucket) AS (
+                SELECT 0
+                UNION ALL
+                SELECT bucket + 1 FROM buckets WHERE bucket + 1 < %(bucket_count)s
+            )
+            SELECT
+                buckets.bucket{group_columns},
+                SUM(spans.target
+                    * (LEAST(spans.end_offset, (buckets.bucket + 1) * %(bucket_seconds)s)
+                        - GREATEST(spans.start_offset, buckets.bucket * %(bucket_seconds)s))
+                    / (spans.end_offset - spans.start_offset)) AS target
+            FROM (
+                SELECT
+                    {", ".join(f"ht.`{field}`" for field in group_by) + "," if group_by else ""}
+                    COALESCE(ht.target, 0) AS target,
+                    TIMESTAMPDIFF(SECOND, %(bucket_origin)s, GREATEST(ht.from_time, %(from_date)s)) AS start_offset,
+                    TIMESTAMPDIFF(SECOND, %(bucket_origin)s, LEAST(ht.to_time, %(to_date)s)) AS end_offset
+                FROM `tabHourly Target` ht
+                WHERE {where_clause}
+            ) spans
+            INNER JOIN buckets
+                ON buckets.bucket >= FLOOR(spans.start_offset / %(bucket_seconds)s)
+                AND buckets.bucket * %(bucket_seconds)s < spans.end_offset
+            WHERE spans.end_offset > spans.start_offset
+            GROUP BY buckets.bucket{group_columns}
+        """, values, as_dict=True)
+
+        if not group_by:
+            bucket_targets = empty_buckets()
+            for row in results:
+                bucket_targets[bucket_starts[int(row.bucket)]] += float(row.target or 0)
+            return bucket_targets
+
+        grouped_targets = {}
         for row in results:
-            start = max(from_date, row["from_time"])
-            end = min(to_date, row["to_time"])
-
-            if end <= start:
-                continue
+            key = tuple(row[field] for field in group_by)
+            if key not in grouped_targets:
+                grouped_targets[key] = empty_buckets()
+            grouped_targets[key][bucket_starts[int(row.bucket)]] += float(row.target or 0)
 
-            # Calculate number of hours covered
-            total_hours = (end - start).total_seconds() / 3600.0
-            if total_hours <= 0:
-                continue
-
-            target_per_hour = row["target"] / total_hours
-
-            # Assign to each hour bucket
-            hour_pointer = start.replace(minute=0, second=0, microsecond=0)
-            while hour_pointer < end:
-                next_hour = hour_pointer + timedelta(hours=1)
-                overlap = (min(end, next_hour) - max(start, hour_pointer)).total_seconds() / 3600.0
-                if overlap > 0:
-                    hourly_targets[hour_pointer] += target_per_hour * overlap
-                hour_pointer = next_hour
-
-        return hourly_targets
+        return grouped_targets
 
     
     def get_defective_unit_limit(self, inputs, from_date, to_date):
         """
-        Returns the sum of 'target' from Hourly Target based on filters and date range using SQL.
+        Returns the sum of 'defective_unit_limit' from Hourly Target based on filters and date range.
         """
-        conditions = ["`from_time` <= %(to_date)s", "`to_time` >= %(from_date)s"]
-        values = {"from_date": from_date, "to_date": to_date}
-
-        # Optional filters
-        for key in ["physical_cell", "operation", "workstation"]:
-            if key in inputs and inputs[key]:
-                conditions.append(f"`{key}` = %({key})s")
-                values[key] = inputs[key]
-
-        where_clause = " AND ".join(conditions)
+        return self.get_limits(inputs, from_date, to_date).defective_unit_limit
 
-        query = f"""
-            SELECT SUM(defective_unit_limit) as limit
-            FROM `tabHourly Target`
-            WHERE {where_clause}
-        """
-    
     def get_defects_limit(self, inputs, from_date, to_date):
         """
-        Returns the sum of 'target' from Hourly Target based on filters and date range using SQL.
+        Returns the sum of 'defects_limit' from Hourly Target based on filters and date range.
         """
-        conditions = ["`from_time` <= %(to_date)s", "`to_time` >= %(from_date)s"]
-        values = {"from_date": from_date, "to_date": to_date}
-
-        # Optional filters
-        for key in ["physical_cell", "operation", "workstation"]:
-            if key in inputs and inputs[key]:
-                conditions.append(f"`{key}` = %({key})s")
-                values[key] = inputs[key]
-
-        where_clause = " AND ".join(conditions)
-
-        query = f"""
-            SELECT SUM(defects_limit) as limit
-            FROM `tabHourly Target`
-            WHERE {where_clause}
-        """
-    
+        return self.get_limits(inputs, from_date, to_date).defects_limit
 
 
 class ConfigTargetService(TargetService):
@@ -190,13 +249,15 @@ class ConfigTargetService(TargetService):
     def get_total_target(self, inputs: dict, from_date: datetime, to_date: datetime) -> float:
         return math.ceil(random.uniform(1000.0, 5000.0))
 
-    def get_hourly_target(self, inputs: dict, from_date: datetime, to_date: datetime) -> dict:
+    def get_hourly_target(self, inputs: dict, from_date: datetime, to_date: datetime,
+                          bucket_minutes: int = 60, group_by: list | None = None) -> dict:
+        bucket_minutes = int(bucket_minutes or 60)
         hourly_targets = {}
-        current_time = from_date.replace(minute=0, second=0, microsecond=0)
+        current_time = get_bucket_origin(from_date, bucket_minutes)
         while current_time <= to_date:
             # Simulate a live data point
-            hourly_targets[current_time] = random.uniform(50.0, 250.0)
-            current_time += timedelta(hours=1)
-        return hourly_targets
+            hourly_targets[current_time] = random.uniform(50.0, 250.0) * bucket_minutes / 60.0
+            current_time += timedelta(minutes=bucket_minutes)
+        return {(): hourly_targets} if group_by else hourly_targets
     
 
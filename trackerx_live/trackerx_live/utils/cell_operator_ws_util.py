@@ -3,37 +3,80 @@ from frappe.utils import flt
 from trackerx_live.trackerx_live.enums.operation_type import OperationType
 
 
+WORKSTATION_CONTEXT_CACHE_KEY = "trackerx_workstation_context"
+WORKSTATION_CONTEXT_BUILT_FIELD = "__built"
+
+
 def get_cell_operator_by_ws(ws_name):
+    """
+    Cell/operation context of a workstation, served from the cached workstation context index.
+    Returns a list of {workstation, cell_number, cell_name, cell_id, operation_group, operation_name, operation_type}.
+    """
     workstation_info_list = []
     try:
-        cell_operation_ws_list = frappe.get_all( "Physical Cell Operation",
-            filters={
-                "workstation": ws_name,  
-            },
-            fields=["name", "operation", "parent"]
-        )
+        cache = frappe.cache()
+        workstation_info_list = cache.hget(WORKSTATION_CONTEXT_CACHE_KEY, ws_name)
+
+        if workstation_info_list is None:
+            if cache.hget(WORKSTATION_CONTEXT_CACHE_KEY, WORKSTATION_CONTEXT_BUILT_FIELD):
+                workstation_info_list = []
+            else:
+                workstation_info_list = build_workstation_context_index().get(ws_name, [])
 
-        
-
-        for cell_operation_ws in cell_operation_ws_list:
-            cell = frappe.get_doc("Physical Cell", cell_operation_ws.parent)
-            operation = frappe.get_doc("Operation", cell_operation_ws.operation)
-            workstation_info_list.append({
-                 "workstation": ws_name,
-                 "cell_number": cell.cell_number,
-                 "cell_name": cell.cell_name,
-                 "cell_id": cell.name,
-                 "operation_group": cell.supported_operation_group,
-                 "operation_name": operation.name,
-                 "operation_type": operation.custom_operation_type
-            })
+        # callers get their own copies, the cached lists are shared within the request
+        workstation_info_list = [dict(info) for info in workstation_info_list]
 
     except Exception as e:
-            pass
+            workstation_info_list = []
     
     return workstation_info_list
 
 
+def build_workstation_context_index():
+    """
+    Build the workstation -> [cell/operation context] index with one query and store it in a Redis hash.
+    """
+    rows = frappe.db.sql("""
+        SELECT
+            pco.workstation,
+            pc.cell_number,
+            pc.cell_name,
+            pc.name AS cell_id,
+            pc.supported_operation_group AS operation_group,
+            op.name AS operation_name,
+            op.custom_operation_type AS operation_type
+        FROM `tabPhysical Cell Operation` pco
+        INNER JOIN `tabPhysical Cell` pc ON pc.name = pco.parent
+        INNER JOIN `tabOperation` op ON op.name = pco.operation
+        WHERE pco.parenttype = 'Physical Cell'
+          AND IFNULL(pco.workstation, '') != ''
+        ORDER BY pco.modified DESC
+    """, as_dict=True)
+
+    index = {}
+    for row in rows:
+        index.setdefault(row.workstation, []).append(dict(row))
+
+    cache = frappe.cache()
+    cache.delete_value(WORKSTATION_CONTEXT_CACHE_KEY)
+    for workstation, workstation_info_list in index.items():
+        cache.hset(WORKSTATION_CONTEXT_CACHE_KEY, workstation, workstation_info_list)
+    cache.hset(WORKSTATION_CONTEXT_CACHE_KEY, WORKSTATION_CONTEXT_BUILT_FIELD, 1)
+
+    return index
+
+
+def clear_workstation_context_index(doc=None, method=None):
+    """doc_events hook for Physical Cell and Operation: drop the index now and rebuild it after commit"""
+    frappe.cache().delete_value(WORKSTATION_CONTEXT_CACHE_KEY)
+    frappe.db.after_commit.add(build_workstation_context_index)
+
+
+def warm_workstation_context_index():
+    """after_migrate hook, also usable from `bench execute` when workers are restarted"""
+    build_workstation_context_index()
+
+
 def validate_workstation_for_supported_operation(workstation, operation, api_source):
     if not workstation or not operation or not api_source:
         frappe.throw("Workstation, Operation, and API Source must be provided.")
@@ -55,7 +98,9 @@ def validate_workstation_for_supported_operation(workstation, operation, api_sou
 
 
 def get_operation_type(operation):
-    operation_doc = frappe.get_doc("Operation", operation)
+    from trackerx_live.trackerx_live.services.master_data_cache import get_master_data
+
+    operation_doc = get_master_data("Operation", operation)
     operation_type = operation_doc.custom_operation_type
 
     try:
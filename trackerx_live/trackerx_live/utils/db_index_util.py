@@ -0,0 +1,166 @@
+import frappe
+from frappe.utils import now_datetime
+
+
+# Composite indexes on Item Scan Log, one per hot access path.
+# The leading columns are the equality filters, the trailing column is the range filter.
+ITEM_SCAN_LOG_INDEXES = {
+    # scan_item re-scan cancel, operation_status_service.rebuild_operation_statuses
+    "idx_isl_item_operation_status": ["production_item", "operation", "log_status"],
+    # target_scheduler.get_minute_output_by_cell produced quantity
+    "idx_isl_cell_op_ws_scan_time": ["physical_cell", "operation", "workstation", "scan_time"],
+    # counted_info.get_counted_info
+    "idx_isl_ws_status_scan_time": ["workstation", "status", "scan_time"],
+    # live_dashboard counters filtered by cell
+    "idx_isl_cell_log_status_logged_time": ["physical_cell", "log_status", "logged_time"],
+    # live_dashboard counters filtered by workstation
+    "idx_isl_ws_log_status_logged_time": ["workstation", "log_status", "logged_time"],
+}
+
+
+# Item Scan Log Defect is read by joining from the parent logs on (parent, parenttype).
+# output_service.get_top_defects groups by defect alone, so the trailing defect column
+# makes the index covering for the join and the grouping.
+ITEM_SCAN_LOG_DEFECT_INDEXES = {
+    "idx_isld_parent_parenttype_defect": ["parent", "parenttype", "defect"],
+}
+
+# Indexes replaced by the ones above, dropped by the index patch
+STALE_ITEM_SCAN_LOG_DEFECT_INDEXES = ["idx_isld_parent_defect"]
+
+
+# Hot queries checked by `bench verify-scan-log-indexes`.
+# Parameters are filled from the latest completed Item Scan Log, see get_hot_query_sample.
+ITEM_SCAN_LOG_HOT_QUERIES = {
+    "scan_item_cancel_existing": """
+        SELECT name
+        FROM `tabItem Scan Log`
+        WHERE production_item = %(production_item)s
+          AND operation = %(operation)s
+          AND workstation = %(workstation)s
+          AND log_status != 'Cancelled'
+    """,
+    "target_scheduler_produced_qty": """
+        SELECT COALESCE(SUM(COALESCE(pi.quantity, 1)), 0)
+        FROM `tabItem Scan Log` sl
+        LEFT JOIN `tabProduction Item` pi ON pi.name = sl.production_item
+        WHERE sl.physical_cell = %(physical_cell)s
+          AND sl.operation = %(operation)s
+          AND sl.workstation = %(workstation)s
+          AND sl.scan_time >= %(from_time)s
+          AND sl.scan_time < %(to_time)s
+          AND sl.log_status = 'Completed'
+          AND sl.status IN ('Pass','SP Pass','Counted')
+    """,
+    "counted_info": """
+        SELECT sl.operation, sl.production_item, COUNT(sl.name), SUM(pi.quantity)
+        FROM `tabItem Scan Log` sl
+        INNER JOIN `tabProduction Item` pi ON pi.name = sl.production_item
+        WHERE sl.workstation = %(workstation)s
+          AND sl.status = 'Counted'
+          AND sl.scan_time BETWEEN %(from_time)s AND %(to_time)s
+        GROUP BY sl.operation, sl.production_item
+    """,
+    "live_dashboard_cell_output": """
+        SELECT COUNT(*)
+        FROM `tabItem Scan Log` sl
+        WHERE sl.physical_cell = %(physical_cell)s
+          AND sl.log_status = 'Completed'
+          AND sl.logged_time >= %(from_time)s
+    """,
+    # same shape as output_service.get_top_defects
+    "live_dashboard_top_defects": """
+        SELECT top.defect, m.defect_code, m.defect_description, m.defect_type, m.severity, top.frequency
+        FROM (
+            SELECT d.defect, COUNT(*) AS frequency
+            FROM `tabItem Scan Log` sl
+            INNER JOIN `tabItem Scan Log Defect` d ON d.parent = sl.name AND d.parenttype = 'Item Scan Log'
+            WHERE sl.physical_cell = %(physical_cell)s
+              AND sl.log_status = 'Completed'
+              AND sl.logged_time >= %(from_time)s
+              AND d.defect IS NOT NULL
+            GROUP BY d.defect
+            ORDER BY frequency DESC
+            LIMIT 5
+        ) top
+        LEFT JOIN `tabTracking Order Defect Master` m ON m.name = top.defect
+        ORDER BY top.frequency DESC
+    """,
+    "live_dashboard_workstation_output": """
+        SELECT COUNT(*)
+        FROM `tabItem Scan Log` sl
+        WHERE sl.workstation = %(workstation)s
+          AND sl.log_status = 'Completed'
+          AND sl.logged_time >= %(from_time)s
+    """,
+}
+
+
+def add_item_scan_log_indexes():
+    """Create the managed Item Scan Log indexes that don't exist yet"""
+    for index_name, columns in ITEM_SCAN_LOG_INDEXES.items():
+        frappe.db.add_index("Item Scan Log", columns, index_name=index_name)
+
+
+def add_item_scan_log_defect_indexes():
+    """Create the managed Item Scan Log Defect indexes that don't exist yet"""
+    for index_name, columns in ITEM_SCAN_LOG_DEFECT_INDEXES.items():
+        frappe.db.add_index("Item Scan Log Defect", columns, index_name=index_name)
+
+
+def drop_stale_item_scan_log_defect_indexes():
+    """Drop the Item Scan Log Defect indexes that were replaced by ITEM_SCAN_LOG_DEFECT_INDEXES"""
+    for index_name in STALE_ITEM_SCAN_LOG_DEFECT_INDEXES:
+        if frappe.db.has_index("tabItem Scan Log Defect", index_name):
+            frappe.db.sql_ddl(f"ALTER TABLE `tabItem Scan Log Defect` DROP INDEX `{index_name}`")
+
+
+def get_hot_query_sample():
+    """Realistic parameter values for the hot queries, taken from the latest completed scan"""
+    now = now_datetime()
+    sample = frappe.db.sql("""
+        SELECT production_item, operation, workstation, physical_cell
+        FROM `tabItem Scan Log`
+        WHERE log_status = 'Completed'
+        ORDER BY creation DESC
+        LIMIT 1
+    """, as_dict=True)
+
+    params = {
+        "production_item": "",
+        "operation": "",
+        "workstation": "",
+        "physical_cell": "",
+    }
+    if sample:
+        params.update({key: value or "" for key, value in sample[0].items()})
+
+    params["from_time"] = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    params["to_time"] = now
+    return params
+
+
+def explain_item_scan_log_hot_queries():
+    """
+    Run EXPLAIN on every hot query.
+    Returns [{"query", "type", "key", "possible_keys", "rows", "full_scan"}], one per Item Scan Log
+    and Item Scan Log Defect access.
+    """
+    params = get_hot_query_sample()
+    report = []
+
+    for query_name, query in ITEM_SCAN_LOG_HOT_QUERIES.items():
+        plan = frappe.db.sql(f"EXPLAIN {query}", params, as_dict=True)
+        for row in plan:
+            if row.get("table") not in ("sl", "tabItem Scan Log", "d"):
+                continue
+            report.append({
+                "query": query_name,
+                "type": row.get("type"),
+                "key": row.get("key"),
+                "possible_keys": row.get("possible_keys"),
+                "rows": row.get("rows"),
+                "full_scan": (row.get("type") or "").upper() == "ALL",
+            })
+
+    return report
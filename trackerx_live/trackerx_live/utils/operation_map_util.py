@@ -78,6 +78,7 @@ class OperationMapData:
     
     def __init__(self, tracking_order_number: str):
         self.tracking_order_number = tracking_order_number
+        self.version = None  # version stamp the map was built under, set by OperationMapManager
         self.is_built = False
         self.validation_result = None
         
@@ -86,6 +87,15 @@ class OperationMapData:
         self._component_operations = {}  # component -> list of OperationNodes
         self._operation_lookup = {}  # (operation, component, sequence_no) -> OperationNode
         self._components = set()
+        self._operation_nodes = {}  # (operation, component) -> list of OperationNodes
+        
+        # Closure index, built with the lookups: nodes are numbered in topological
+        # order and reachability is kept as int bitsets over those numbers
+        self._topological_order = []  # list of OperationNodes
+        self._node_index = {}  # OperationNode -> position in topological order
+        self._ancestors = {}  # OperationNode -> bitset of nodes before it
+        self._descendants = {}  # OperationNode -> bitset of nodes after it
+        self._operation_masks = {}  # (operation, component) -> bitset of its nodes
         
         # Flow analysis cache
         self._starting_operations_cache = {}
@@ -129,12 +139,72 @@ class OperationMapData:
             )
             return self.validation_result
     
+    def __getstate__(self):
+        """
+        Nodes reference each other through next/previous lists, pickle them flat
+        with their links as node keys so long flows don't hit the recursion limit.
+        Lookups and the closure index are left out and rebuilt on load, in O(n).
+        """
+        return {
+            'tracking_order_number': self.tracking_order_number,
+            'version': self.version,
+            'is_built': self.is_built,
+            'validation_result': self.validation_result,
+            'nodes': [
+                {
+                    'operation': node.operation,
+                    'component': node.component,
+                    'operation_type': node.operation_type.value,
+                    'sequence_no': node.sequence_no,
+                    'configs': node.configs,
+                    'next_operations': [(n.operation, n.component, n.sequence_no)
+                                        for n in node.next_operations],
+                }
+                for node in self._nodes.values()
+            ],
+        }
+    
+    def __setstate__(self, state):
+        self.__init__(state['tracking_order_number'])
+        self.version = state.get('version')
+        self.validation_result = state['validation_result']
+        
+        for row in state['nodes']:
+            node_key = (row['operation'], row['component'], row['sequence_no'])
+            node = OperationNode(
+                operation=row['operation'],
+                component=row['component'],
+                operation_type=OperationType(row['operation_type']),
+                sequence_no=row['sequence_no'],
+                configs=row['configs']
+            )
+            self._nodes[node_key] = node
+            self._operation_nodes.setdefault((row['operation'], row['component']), []).append(node)
+            self._components.add(row['component'])
+        
+        for row in state['nodes']:
+            current_node = self._nodes[(row['operation'], row['component'], row['sequence_no'])]
+            for next_key in row['next_operations']:
+                next_node = self._nodes[tuple(next_key)]
+                current_node.next_operations.append(next_node)
+                next_node.previous_operations.append(current_node)
+        
+        if state['is_built']:
+            self._build_lookup_structures()
+            self.is_built = True
+    
     def _reset_data_structures(self):
         """Reset all internal data structures"""
         self._nodes.clear()
         self._component_operations.clear()
         self._operation_lookup.clear()
         self._components.clear()
+        self._operation_nodes.clear()
+        self._topological_order = []
+        self._node_index.clear()
+        self._ancestors.clear()
+        self._descendants.clear()
+        self._operation_masks.clear()
         self._starting_operations_cache.clear()
         self._final_operations_cache.clear()
         self._flow_paths_cache.clear()
@@ -156,13 +226,19 @@ class OperationMapData:
             
             # Create node
             node_key = (operation, component, sequence_no)
-            self._nodes[node_key] = OperationNode(
+            node = OperationNode(
                 operation=operation,
                 component=component,
                 operation_type=operation_type,
                 sequence_no=sequence_no,
                 configs=configs if isinstance(configs, dict) else {}
             )
+            # A repeated record replaces the earlier node
+            same_operation = self._operation_nodes.setdefault((operation, component), [])
+            if node_key in self._nodes:
+                same_operation.remove(self._nodes[node_key])
+            same_operation.append(node)
+            self._nodes[node_key] = node
             
             self._components.add(component)
     
@@ -195,32 +271,15 @@ class OperationMapData:
                 
             current_node = self._nodes[current_key]
             
-            # Find next operation nodes
-            next_nodes = self._find_next_operation_nodes(
-                next_operation, record.get('component'), operation_map_data
-            )
+            # Every sequence of the next operation in the same component
+            next_nodes = self._operation_nodes.get((next_operation, record.get('component')), [])
             
             for next_node in next_nodes:
+                if next_node in current_node.next_operations:
+                    continue
                 current_node.next_operations.append(next_node)
                 next_node.previous_operations.append(current_node)
     
-    def _find_next_operation_nodes(self, next_operation: str, component: str,
-                                 operation_map_data: List[Dict]) -> List[OperationNode]:
-        """Find all possible next operation nodes"""
-        next_nodes = []
-        
-        for record in operation_map_data:
-            if (record.get('operation') == next_operation and 
-                record.get('component') == component):
-                
-                node_key = (record.get('operation'), record.get('component'),
-                           record.get('sequence_no', 1))
-                
-                if node_key in self._nodes:
-                    next_nodes.append(self._nodes[node_key])
-        
-        return next_nodes
-    
     def _validate_operation_map(self) -> ValidationResult:
         """Validate the operation map for correctness"""
         errors = []
@@ -263,28 +322,39 @@ class OperationMapData:
         is_valid = len(errors) == 0
         return ValidationResult(is_valid=is_valid, errors=errors, warnings=warnings)
     
-    def _detect_cycles(self, nodes: List[OperationNode]) -> Optional[str]:
-        """Detect cycles in the operation flow using DFS"""
-        WHITE, GRAY, BLACK = 0, 1, 2
-        color = {node: WHITE for node in nodes}
+    def _topological_sort(self, nodes: List[OperationNode]) -> List[OperationNode]:
+        """Kahn's algorithm, nodes on or behind a cycle are left out of the order"""
+        in_degree = {node: len(node.previous_operations) for node in nodes}
+        queue = deque(node for node in nodes if not in_degree[node])
+        order = []
         
-        def dfs(node):
-            color[node] = GRAY
+        while queue:
+            node = queue.popleft()
+            order.append(node)
             for next_node in node.next_operations:
-                if color[next_node] == GRAY:
-                    return f"{node.operation}({node.component}) -> {next_node.operation}({next_node.component})"
-                elif color[next_node] == WHITE and dfs(next_node):
-                    return f"{node.operation}({node.component}) -> {next_node.operation}({next_node.component})"
-            color[node] = BLACK
-            return None
+                in_degree[next_node] -= 1
+                if not in_degree[next_node]:
+                    queue.append(next_node)
         
-        for node in nodes:
-            if color[node] == WHITE:
-                cycle = dfs(node)
-                if cycle:
-                    return cycle
+        return order
+    
+    def _detect_cycles(self, nodes: List[OperationNode]) -> Optional[str]:
+        """Detect cycles in the operation flow, without recursion so long flows are fine"""
+        ordered = set(self._topological_sort(nodes))
+        if len(ordered) == len(nodes):
+            return None
         
-        return None
+        # Walk back along unordered nodes until one repeats, that edge closes a cycle
+        node = next(n for n in nodes if n not in ordered)
+        seen = set()
+        while node not in seen:
+            seen.add(node)
+            previous_node = next(p for p in node.previous_operations if p not in ordered)
+            if previous_node in seen:
+                return f"{previous_node.operation}({previous_node.component}) -> {node.operation}({node.component})"
+            node = previous_node
+        
+        return f"{node.operation}({node.component})"
     
     def _find_disconnected_components(self, nodes: List[OperationNode]) -> List[str]:
         """Find operations that are not connected to the main flow"""
@@ -349,6 +419,49 @@ class OperationMapData:
             self._operation_lookup[lookup_key] = node
         
         self._component_operations = dict(component_ops)
+        
+        for component, nodes in self._component_operations.items():
+            self._starting_operations_cache[component] = [n for n in nodes if not n.previous_operations]
+            self._final_operations_cache[component] = [n for n in nodes if not n.next_operations]
+        
+        self._build_closure_index()
+    
+    def _build_closure_index(self):
+        """
+        Number nodes in topological order and precompute the ancestor and
+        descendant bitsets of each one, so reachability checks are O(1).
+        Only called on maps that passed validation, i.e. without cycles.
+        """
+        self._topological_order = self._topological_sort(list(self._nodes.values()))
+        self._node_index = {node: i for i, node in enumerate(self._topological_order)}
+        
+        for node in self._topological_order:
+            ancestors = 0
+            for prev_node in node.previous_operations:
+                ancestors |= self._ancestors[prev_node] | (1 << self._node_index[prev_node])
+            self._ancestors[node] = ancestors
+        
+        for node in reversed(self._topological_order):
+            descendants = 0
+            for next_node in node.next_operations:
+                descendants |= self._descendants[next_node] | (1 << self._node_index[next_node])
+            self._descendants[node] = descendants
+        
+        self._operation_masks = {}
+        for key, nodes in self._operation_nodes.items():
+            mask = 0
+            for node in nodes:
+                mask |= 1 << self._node_index[node]
+            self._operation_masks[key] = mask
+    
+    def _nodes_in_mask(self, mask: int) -> List[OperationNode]:
+        """Nodes of a bitset, in topological order"""
+        nodes = []
+        while mask:
+            low_bit = mask & -mask
+            nodes.append(self._topological_order[low_bit.bit_length() - 1])
+            mask ^= low_bit
+        return nodes
     
     def _find_shortest_path(self, start: OperationNode, end: OperationNode) -> List[OperationNode]:
         """Find shortest path between two operation nodes using BFS"""
@@ -426,38 +539,18 @@ class OperationMapData:
     def get_all_previous_operations(self, current_operation: str, component: str, 
                         sequence_no: int = 1) -> List[str]:
         """
-        Recursively get all previous operations for a given operation.
+        Get all previous operations for a given operation.
         Returns a list of operation names (strings) from all previous operations
-        in the dependency chain.
+        in the dependency chain, nearest first.
         """
-        all_prev_operations = []
-        visited = set()  # To prevent infinite loops in case of cycles
-        
-        def _collect_previous_recursive(op_name: str, comp_name: str, seq_no: int):
-            # Create a unique identifier for this operation
-            op_id = (op_name, comp_name, seq_no)
-            
-            # Skip if already visited (prevents infinite loops)
-            if op_id in visited:
-                return
-            
-            visited.add(op_id)
-            
-            # Get immediate previous operations for current operation
-            prev_operations = self.get_previous_operations(op_name, comp_name, seq_no)
-            
-            # Process each previous operation
-            for prev_op in prev_operations:
-                # Add the operation name to our result list
-                all_prev_operations.append(prev_op.operation)
-                
-                # Recursively get previous operations for this operation
-                _collect_previous_recursive(prev_op.operation, prev_op.component, prev_op.sequence_no)
+        if not self.is_valid():
+            return []
         
-        # Start the recursive collection from the given operation
-        _collect_previous_recursive(current_operation, component, sequence_no)
+        current_node = self._operation_lookup.get((current_operation, component, sequence_no))
+        if not current_node:
+            return []
         
-        return all_prev_operations
+        return [node.operation for node in reversed(self._nodes_in_mask(self._ancestors[current_node]))]
     
     def get_component_operations(self, component: str) -> List[OperationNode]:
         """Get all operations for a specific component"""
@@ -468,28 +561,74 @@ class OperationMapData:
     
     def get_skipped_operations(self, component: str, last_operation: str, 
                               current_operation: str) -> List[OperationNode]:
-        """Get operations that were skipped between last and current operation"""
+        """
+        Get operations that were skipped between last and current operation:
+        every operation after the last one that also comes before the current one,
+        in topological order
+        """
         if not self.is_valid():
             return []
         
-        # Find nodes for last and current operations
-        last_nodes = [n for n in self._nodes.values() 
-                     if n.operation == last_operation and n.component == component]
-        current_nodes = [n for n in self._nodes.values()
-                        if n.operation == current_operation and n.component == component]
+        return self._nodes_in_mask(self._get_between_mask(component, last_operation, current_operation))
+    
+    def _get_descendant_mask(self, operation: str, component: str) -> int:
+        mask = 0
+        for node in self._operation_nodes.get((operation, component), []):
+            mask |= self._descendants[node]
+        return mask
+    
+    def _get_ancestor_mask(self, operation: str, component: str) -> int:
+        mask = 0
+        for node in self._operation_nodes.get((operation, component), []):
+            mask |= self._ancestors[node]
+        return mask
+    
+    def _get_between_mask(self, component: str, from_operation: str, to_operation: str) -> int:
+        return (self._get_descendant_mask(from_operation, component)
+                & self._get_ancestor_mask(to_operation, component))
+    
+    def is_before(self, component: str, operation: str, other_operation: str) -> bool:
+        """Check if operation comes before other_operation in some flow of the component"""
+        if not self.is_valid():
+            return False
         
-        if not last_nodes or not current_nodes:
+        return bool(self._get_ancestor_mask(other_operation, component)
+                    & self._operation_masks.get((operation, component), 0))
+    
+    def has_skipped_operations(self, component: str, last_operation: str,
+                               current_operation: str) -> bool:
+        """Check if moving from last to current operation leaves operations in between"""
+        if not self.is_valid():
+            return False
+        
+        return bool(self._get_between_mask(component, last_operation, current_operation))
+    
+    def get_topological_order(self, component: Optional[str] = None) -> List[OperationNode]:
+        """Operations in flow order, optionally of a single component"""
+        if not self.is_valid():
             return []
         
-        # Find path and identify skipped operations
-        skipped = []
-        for last_node in last_nodes:
-            for current_node in current_nodes:
-                path = self._find_shortest_path(last_node, current_node)
-                if path and len(path) > 2:  # More than direct connection
-                    skipped.extend(path[1:-1])  # Exclude start and end
+        if component is None:
+            return list(self._topological_order)
+        return [node for node in self._topological_order if node.component == component]
+    
+    def get_operations_mask(self, component: str, operations) -> int:
+        """Bitset of the given operations of a component, see get_missing_previous_operations"""
+        if not self.is_valid():
+            return 0
+        
+        mask = 0
+        for operation in operations:
+            mask |= self._operation_masks.get((operation, component), 0)
+        return mask
+    
+    def get_missing_previous_operations(self, component: str, operation: str,
+                                        completed_mask: int) -> List[OperationNode]:
+        """Operations before the given one that are not in completed_mask, in flow order"""
+        if not self.is_valid():
+            return []
         
-        return list(set(skipped))  # Remove duplicates
+        return self._nodes_in_mask(self._get_ancestor_mask(operation, component) & ~completed_mask)
     
     def is_valid_transition(self, component: str, from_operation: str, 
                            to_operation: str) -> bool:
@@ -505,30 +644,16 @@ class OperationMapData:
         if not self.is_valid():
             return []
         
-        # Use cache if available
-        if component in self._starting_operations_cache:
-            return self._starting_operations_cache[component]
-        
-        component_ops = self._component_operations.get(component, [])
-        starting_ops = [op for op in component_ops if not op.previous_operations]
-        
-        self._starting_operations_cache[component] = starting_ops
-        return starting_ops
+        # Precomputed with the lookups
+        return self._starting_operations_cache.get(component, [])
     
     def get_final_operations(self, component: str) -> List[OperationNode]:
         """Get final operations for a component"""
         if not self.is_valid():
             return []
         
-        # Use cache if available
-        if component in self._final_operations_cache:
-            return self._final_operations_cache[component]
-        
-        component_ops = self._component_operations.get(component, [])
-        final_ops = [op for op in component_ops if not op.next_operations]
-        
-        self._final_operations_cache[component] = final_ops
-        return final_ops
+        # Precomputed with the lookups
+        return self._final_operations_cache.get(component, [])
     
     def is_final_operation(self, current_operation: str, component: str) -> bool:
         
@@ -653,6 +778,24 @@ class OperationMapData:
 
 
 import threading
+from collections import OrderedDict
+
+# Built maps are shared between workers through Redis, and kept per process in a bounded LRU.
+# Both are stamped with a random version kept in Redis without expiry, a map is reused only
+# while it matches. Every invalidation, and a version key that is gone, gets a new stamp
+# that no map cached before can match.
+OPERATION_MAP_CACHE_TTL = 24 * 60 * 60  # seconds
+OPERATION_MAP_LRU_SIZE = 256
+
+
+def get_operation_map_cache_key(tracking_order_number: str) -> str:
+    return f"trackerx_operation_map|{tracking_order_number}"
+
+
+def get_operation_map_version_key(tracking_order_number: str) -> str:
+    return f"trackerx_operation_map_version|{tracking_order_number}"
+
+
 # Utility class for managing multiple OperationMapData instances
 class OperationMapManager:
     """
@@ -667,7 +810,7 @@ class OperationMapManager:
             with cls._lock:
                 if cls._instance is None:
                     cls._instance = super().__new__(cls)
-                    cls._instance._operation_maps = {}
+                    cls._instance._operation_maps = OrderedDict()  # tracking order -> (version, OperationMapData)
                     cls._instance._initialized = True
         return cls._instance
 
@@ -677,53 +820,109 @@ class OperationMapManager:
         pass
     
     def _create_operation_map(self, tracking_order_number: str, 
-                           operation_map_data: List[Dict]) -> ValidationResult:
+                           operation_map_data: List[Dict]) -> Tuple[OperationMapData, ValidationResult]:
         """Create and build operation map for a tracking order"""
         op_map = OperationMapData(tracking_order_number)
         result = op_map.build_from_operation_map(operation_map_data)
+        return op_map, result
+    
+    def _remember(self, tracking_order_number: str, version: str, op_map: OperationMapData):
+        """Keep a map in the in-process LRU, evicting the least recently used"""
+        with self._lock:
+            self._operation_maps[tracking_order_number] = (version, op_map)
+            self._operation_maps.move_to_end(tracking_order_number)
+            while len(self._operation_maps) > OPERATION_MAP_LRU_SIZE:
+                self._operation_maps.popitem(last=False)
+    
+    def _get_version(self, tracking_order_number: str) -> str:
+        """Current version stamp of a tracking order's operation map"""
+        import frappe
+        cache = frappe.cache()
+        version_key = cache.make_key(get_operation_map_version_key(tracking_order_number))
+        
+        version = cache.get(version_key)
+        if version:
+            return frappe.safe_decode(version)
         
-        if result.is_valid:
-            self._operation_maps[tracking_order_number] = op_map
+        if not frappe.db.exists("Tracking Order", tracking_order_number):
+            raise frappe.DoesNotExistError(f"Tracking Order {tracking_order_number} not found")
         
-        return result
+        # first use or evicted, maps cached in the LRUs can't be trusted anymore
+        version = frappe.generate_hash(length=12)
+        # nx: another worker or an invalidation that ran meanwhile set the stamp
+        cache.set(version_key, version, nx=True)
+        return frappe.safe_decode(cache.get(version_key) or version)
     
-    def get_operation_map(self, tracking_order_number: str) -> Optional[OperationMapData]:
-        """Get operation map for a tracking order"""
-        map_from_cache = self._operation_maps.get(tracking_order_number)
-        if map_from_cache:
-            return map_from_cache
+    def _load_operation_data(self, tracking_order_number: str) -> List[Dict]:
+        """Operation map rows of a tracking order, without loading the whole document"""
+        import frappe
+        rows = frappe.get_all(
+            "Operation Map",
+            filters={
+                "parent": tracking_order_number,
+                "parenttype": "Tracking Order",
+                "parentfield": "operation_map"
+            },
+            fields=["operation", "component", "next_operation", "sequence_no", "configs"],
+            order_by="idx asc"
+        )
         
         operation_data = []
-        import frappe
-        tracking_order_doc = frappe.get_doc("Tracking Order", tracking_order_number)
-        for row in tracking_order_doc.operation_map:
-            operation = row.operation
-            component = row.component
-            next_operation = row.next_operation
-            seq_no = row.sequence_no
+        for row in rows:
             configs = row.configs
+            if isinstance(configs, str):
+                configs = frappe.parse_json(configs) if configs.strip() else {}
             operation_data.append({
-                'operation': operation,
-                'component': component,
-                'next_operation': next_operation,
-                'sequence_no': seq_no or 1,
+                'operation': row.operation,
+                'component': row.component,
+                'next_operation': row.next_operation,
+                'sequence_no': row.sequence_no or 1,
                 'configs': configs or {}
             })
-        result = self._create_operation_map(tracking_order_number, operation_data)
+        return operation_data
+    
+    def get_operation_map(self, tracking_order_number: str) -> Optional[OperationMapData]:
+        """
+        Get operation map for a tracking order.
+        
+        Looks in the in-process LRU first, then Redis, and only builds the graph
+        from the database when neither has the current version.
+        """
+        import frappe
+        version = self._get_version(tracking_order_number)
+        
+        with self._lock:
+            cached = self._operation_maps.get(tracking_order_number)
+            if cached and cached[0] == version:
+                self._operation_maps.move_to_end(tracking_order_number)
+                return cached[1]
+        
+        cache_key = get_operation_map_cache_key(tracking_order_number)
+        entry = frappe.cache().get_value(cache_key)
+        if entry and entry.get("version") == version:
+            self._remember(tracking_order_number, version, entry["operation_map"])
+            return entry["operation_map"]
+        
+        op_map, result = self._create_operation_map(
+            tracking_order_number, self._load_operation_data(tracking_order_number)
+        )
         if not result.is_valid:
             raise Exception("Invalid Operation map")
         
-        return self._operation_maps.get(tracking_order_number)
-        
-        
+        op_map.version = version
+        frappe.cache().set_value(
+            cache_key,
+            {"version": version, "operation_map": op_map},
+            expires_in_sec=OPERATION_MAP_CACHE_TTL
+        )
+        self._remember(tracking_order_number, version, op_map)
+        return op_map
 
     
     def remove_operation_map(self, tracking_order_number: str) -> bool:
         """Remove operation map for a tracking order"""
-        if tracking_order_number in self._operation_maps:
-            del self._operation_maps[tracking_order_number]
-            return True
-        return False
+        with self._lock:
+            return self._operation_maps.pop(tracking_order_number, None) is not None
     
     def get_all_tracking_orders(self) -> List[str]:
         """Get all tracking order numbers with operation maps"""
@@ -731,7 +930,61 @@ class OperationMapManager:
     
     def clear_all(self):
         """Clear all operation maps"""
-        self._operation_maps.clear()
+        with self._lock:
+            self._operation_maps.clear()
+
+
+def invalidate_operation_map(doc, method=None):
+    """
+    doc_events hook for Tracking Order and Cut Kit Plan: stamp the affected
+    operation maps with a new version so every worker rebuilds them once.
+    Stamped again after commit so a concurrent request can't re-cache the old map.
+    """
+    import frappe
+    
+    if doc.doctype == "Tracking Order":
+        tracking_orders = {doc.name}
+    else:
+        tracking_orders = get_linked_tracking_orders(doc)
+    
+    if not tracking_orders:
+        return
+    
+    def invalidate():
+        cache = frappe.cache()
+        for tracking_order_number in tracking_orders:
+            cache.set(
+                cache.make_key(get_operation_map_version_key(tracking_order_number)),
+                frappe.generate_hash(length=12)
+            )
+            cache.delete_value(get_operation_map_cache_key(tracking_order_number))
+            OperationMapManager().remove_operation_map(tracking_order_number)
+    
+    invalidate()
+    frappe.db.after_commit.add(invalidate)
+
+
+def get_linked_tracking_orders(doc) -> Set[str]:
+    """Tracking Orders a Cut Kit Plan refers to, on the document or through its bundles' production items"""
+    import frappe
+    tracking_orders = set()
+    production_items = set()
+    
+    for row in [doc] + list(doc.get_all_children()):
+        if row.get("tracking_order"):
+            tracking_orders.add(row.get("tracking_order"))
+        if row.get("production_item_id"):
+            production_items.add(row.get("production_item_id"))
+    
+    if production_items:
+        tracking_orders.update(frappe.get_all(
+            "Production Item",
+            filters={"name": ["in", list(production_items)]},
+            distinct=True,
+            pluck="tracking_order"
+        ))
+    
+    return {name for name in tracking_orders if name}
 
 
 # Example usage
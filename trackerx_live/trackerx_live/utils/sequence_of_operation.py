@@ -1,38 +1,56 @@
 
-import frappe
+from trackerx_live.trackerx_live.services.operation_progress_service import check_operation_sequence
+from trackerx_live.trackerx_live.services.operation_status_service import get_operation_status, get_passed_operation_statuses
+from trackerx_live.trackerx_live.utils.trackerx_live_settings_util import TrackerXLiveSettings
 
 class SequenceOfOpeationUtil:
     
     @staticmethod
     def can_this_item_scan_in_this_operation(production_item, workstation, operation, physical_cell):
-        old_logs = frappe.get_list("Item Scan Log",
-            filters = {
-                "production_item": production_item,
-                "operation": operation,
-                "log_status": "Completed"
-            },
-            fields=["name", "status", "creation"]
-        )
-
-        if not old_logs:
+        status = get_operation_status(production_item, operation)
+
+        if not status or not status.passed_log:
             return {
                 "is_allowed": True
             }
-        
-        for log in old_logs:
-            if log.status in ('Pass', 'SP Pass', 'Counted'):
-                # frappe.throw(
-                #     f"Item is already scanned in this operation"
-                # )
-                return {
-                    "is_allowed": False,
-                    "reason": "ALREADY_PASSED",
-                    "old_logs": old_logs
-                }
-            
+
         return {
-                "is_allowed": True
+            "is_allowed": False,
+            "reason": "ALREADY_PASSED",
+            "old_logs": [
+                {"name": status.passed_log, "status": status.passed_status, "creation": status.passed_time}
+            ]
+        }
+
+    @staticmethod
+    def get_already_passed_logs(production_items, operation):
+        """
+        Batch version of can_this_item_scan_in_this_operation for one operation.
+        Returns {production_item: old_logs} for the items already passed in the operation.
+        """
+        production_items = list({item for item in production_items or [] if item})
+        if not production_items or not operation:
+            return {}
+
+        return {
+            production_item: [
+                {"name": status.passed_log, "status": status.passed_status, "creation": status.passed_time}
+            ]
+            for production_item, status in get_passed_operation_statuses(production_items, operation).items()
         }
-        
 
-        
\ No newline at end of file
+    @staticmethod
+    def check_operation_flow(production_item, tracking_order, component, operation):
+        """
+        Check the operation map sequence for a scan, from cached data only.
+        Skipped operations reject the scan when Strict Operation Flow is enabled.
+        """
+        result = check_operation_sequence(production_item, tracking_order, component, operation)
+
+        if not result["is_allowed"] and not TrackerXLiveSettings.is_strict_operation_flow_enabled():
+            result["is_allowed"] = True
+
+        if not result["is_allowed"]:
+            result["reason"] = "SKIPPED_OPERATIONS"
+
+        return result
@@ -0,0 +1,167 @@
+from datetime import datetime, time, timedelta
+
+import frappe
+from frappe.utils import get_datetime, getdate, now_datetime
+
+
+SHIFT_PERIODS = ("current_shift", "previous_shift", "shift_to_date")
+
+CELL_SHIFT_CACHE_TTL = 36 * 60 * 60  # seconds, a day's shift is looked up until the next one ends
+
+
+def parse_time(value):
+    """Time of a Physical Cell time field, which comes back as time, timedelta or string"""
+    if not value:
+        return None
+    if isinstance(value, time):
+        return value
+    if isinstance(value, timedelta):
+        return (datetime.min + value).time()
+    try:
+        return datetime.strptime(value, "%H:%M:%S").time()
+    except Exception:
+        try:
+            return datetime.strptime(value, "%H:%M").time()
+        except Exception:
+            return None
+
+
+def time_in_range(now_time, start, end):
+    if start is None or end is None:
+        return False
+    if start <= end:
+        return start <= now_time < end
+    return now_time >= start or now_time < end
+
+
+def get_cell_shift_cache_key(physical_cell, shift_date):
+    return f"trackerx_cell_shift|{physical_cell}|{shift_date}"
+
+
+def get_cell_breaks(physical_cell):
+    """[(start, end)] break times of the cell, the break table's field names vary between sites"""
+    breaks_field = frappe.get_meta("Physical Cell").get_field("cell_breaks")
+    if not breaks_field or not breaks_field.options:
+        return []
+
+    breaks = []
+    for br in frappe.get_all(breaks_field.options,
+                             filters={"parent": physical_cell, "parenttype": "Physical Cell", "parentfield": "cell_breaks"},
+                             fields=["*"]):
+        b_start = parse_time(br.get("break_start") or br.get("from") or br.get("start"))
+        b_end = parse_time(br.get("break_end") or br.get("to") or br.get("end"))
+        if b_start and b_end:
+            breaks.append((b_start, b_end))
+    return breaks
+
+
+def get_cell_shift(physical_cell, shift_date):
+    """
+    The cell's shift starting on shift_date as {"start", "end", "breaks": [(start, end)]}
+    with datetimes. Shifts ending at or before their start time end the next day.
+    Returns None when the cell has no working hours. Cached per cell and day.
+    """
+    shift_date = getdate(shift_date)
+    cache_key = get_cell_shift_cache_key(physical_cell, shift_date)
+    shift = frappe.cache().get_value(cache_key)
+    if shift is not None:
+        return frappe._dict(shift) if shift else None
+
+    start_time, end_time = frappe.db.get_value("Physical Cell", physical_cell, ["start_time", "end_time"]) or (None, None)
+    start_time, end_time = parse_time(start_time), parse_time(end_time)
+
+    shift = {}
+    if start_time and end_time:
+        start = datetime.combine(shift_date, start_time)
+        end = datetime.combine(shift_date, end_time)
+        if end <= start:
+            end += timedelta(days=1)
+
+        breaks = []
+        for b_start_time, b_end_time in get_cell_breaks(physical_cell):
+            b_start = datetime.combine(shift_date, b_start_time)
+            if b_start < start:
+                b_start += timedelta(days=1)
+            b_end = datetime.combine(b_start.date(), b_end_time)
+            if b_end <= b_start:
+                b_end += timedelta(days=1)
+            if b_start < end:
+                breaks.append((b_start, min(b_end, end)))
+
+        shift = {"start": start, "end": end, "breaks": sorted(breaks)}
+
+    # an empty dict caches cells without working hours too
+    frappe.cache().set_value(cache_key, shift, expires_in_sec=CELL_SHIFT_CACHE_TTL)
+    return frappe._dict(shift) if shift else None
+
+
+def clear_cell_shifts(doc, method=None):
+    """doc_events hook: working hours or breaks of a Physical Cell changed"""
+    frappe.cache().delete_keys(f"trackerx_cell_shift|{doc.name}|")
+
+
+def get_shift_at(physical_cell, at):
+    """Latest shift of the cell that started at or before `at` (it may have ended already)"""
+    at = get_datetime(at)
+    for shift_date in (at.date(), at.date() - timedelta(days=1)):
+        shift = get_cell_shift(physical_cell, shift_date)
+        if shift and shift.start <= at:
+            return shift
+    return None
+
+
+def resolve_shift_period(period, physical_cell, now=None):
+    """
+    (start, end) of a shift period of the cell:
+    - current_shift: the whole shift in progress, or the last one between shifts
+    - shift_to_date: the same shift up to now
+    - previous_shift: the whole shift before it
+    """
+    if period not in SHIFT_PERIODS:
+        frappe.throw(f"Invalid shift period {period}. Allowed values: {', '.join(SHIFT_PERIODS)}")
+
+    if not physical_cell or not isinstance(physical_cell, str):
+        frappe.throw(f"A single physical_cell is required for the {period} period")
+
+    now = now or now_datetime()
+    shift = get_shift_at(physical_cell, now)
+    if not shift:
+        frappe.throw(f"Physical Cell {physical_cell} has no working hours set")
+
+    if period == "previous_shift":
+        shift = get_cell_shift(physical_cell, shift.start.date() - timedelta(days=1))
+        return shift.start, shift.end
+
+    if period == "shift_to_date":
+        return shift.start, min(shift.end, now)
+
+    return shift.start, shift.end
+
+
+def get_working_windows(physical_cell, from_time, to_time):
+    """
+    [(start, end)] of the cell's working time between from_time and to_time:
+    its shifts without their breaks. Empty when the cell has no working hours.
+    """
+    from_time, to_time = get_datetime(from_time), get_datetime(to_time)
+    windows = []
+
+    shift_date = from_time.date() - timedelta(days=1)
+    while shift_date <= to_time.date():
+        shift = get_cell_shift(physical_cell, shift_date)
+        shift_date += timedelta(days=1)
+        if not shift:
+            continue
+
+        pointer = shift.start
+        for b_start, b_end in shift.breaks + [(shift.end, shift.end)]:
+            start, end = max(pointer, from_time), min(b_start, to_time)
+            if start < end:
+                windows.append((start, end))
+            pointer = max(pointer, b_end)
+
+    return windows
+
+
+def overlaps_working_time(windows, start, end):
+    return any(w_start < end and start < w_end for w_start, w_end in windows)
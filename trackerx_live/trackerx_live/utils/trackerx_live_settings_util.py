@@ -1,4 +1,5 @@
 import frappe
+from frappe.utils import cint
 
 class TrackerXLiveSettings:
 
@@ -29,3 +30,19 @@ class TrackerXLiveSettings:
             return TrackerXLiveSettings.is_allow_partial_bundle_component_enabled()
         else:
             return TrackerXLiveSettings.is_allow_partial_bundle_progressive_enabled()
+
+    @staticmethod
+    def is_dashboard_rollup_enabled():
+        return frappe.db.get_single_value("TrackerX Live Settings", "read_dashboards_from_rollup")
+
+    @staticmethod
+    def is_async_scan_writes_enabled():
+        return frappe.db.get_single_value("TrackerX Live Settings", "async_scan_writes")
+
+    @staticmethod
+    def get_dashboard_cache_ttl():
+        return cint(frappe.db.get_single_value("TrackerX Live Settings", "dashboard_cache_ttl"))
+
+    @staticmethod
+    def is_strict_operation_flow_enabled():
+        return frappe.db.get_single_value("TrackerX Live Settings", "strict_operation_flow")
@@ -50,3 +50,75 @@ def get_active_production_item_by_tag(tag_number):
     if not pi or len(pi) <= 0:
         return None
     return pi[0].production_item
+
+
+RESOLVED_PRODUCTION_ITEM_FIELDS = (
+    "production_item_number",
+    "tracking_order",
+    "bundle_configuration",
+    "component",
+    "size",
+    "quantity",
+    "physical_cell",
+    "type",
+    "status",
+    "tracking_status",
+    "current_operation",
+    "current_workstation",
+    "last_scan_log",
+)
+
+
+def resolve_tags(tag_numbers):
+    """
+    Resolve a batch of tag numbers to their active Production Item in one query.
+
+    Returns frappe._dict with:
+    - tags: {tag_number: {tracking_tag, tag_map, production_item, <production item fields>}}
+      for tags with an active Production Item Tag Map
+    - missing: tag numbers with no Tracking Tag
+    - unlinked: tag numbers with a Tracking Tag but no active map
+    - deactivated: the unlinked tag numbers that were linked earlier (only inactive maps)
+    """
+    tag_numbers = [tag_number for tag_number in dict.fromkeys(tag_numbers or []) if tag_number]
+    resolved = frappe._dict(tags={}, missing=[], unlinked=[], deactivated=[])
+    if not tag_numbers:
+        return resolved
+
+    pi_fields = ",\n            ".join(f"pi.`{field}`" for field in RESOLVED_PRODUCTION_ITEM_FIELDS)
+    rows = frappe.db.sql(f"""
+        SELECT
+            tag.tag_number,
+            tag.name AS tracking_tag,
+            tm.name AS tag_map,
+            tm.is_active,
+            tm.production_item,
+            {pi_fields}
+        FROM `tabTracking Tag` tag
+        LEFT JOIN `tabProduction Item Tag Map` tm
+            ON tm.tracking_tag = tag.name
+        LEFT JOIN `tabProduction Item` pi
+            ON pi.name = tm.production_item AND tm.is_active = 1
+        WHERE tag.tag_number IN %(tag_numbers)s
+        ORDER BY tm.is_active DESC, tm.creation DESC
+    """, {"tag_numbers": tuple(tag_numbers)}, as_dict=True)
+
+    found, linked_before = set(), set()
+    for row in rows:
+        found.add(row.tag_number)
+        if row.tag_map:
+            linked_before.add(row.tag_number)
+        # rows are ordered active first, so the first active map wins
+        if row.is_active and row.tag_number not in resolved.tags:
+            row.pop("is_active")
+            resolved.tags[row.tag_number] = row
+
+    for tag_number in tag_numbers:
+        if tag_number not in found:
+            resolved.missing.append(tag_number)
+        elif tag_number not in resolved.tags:
+            resolved.unlinked.append(tag_number)
+            if tag_number in linked_before:
+                resolved.deactivated.append(tag_number)
+
+    return resolved